@@ -0,0 +1,56 @@
+import argparse
+import time
+
+from benchmarks.synthetic import make_loan_data
+from src.preprocessing import LoanPreprocessor, clean_loan_data, split_train_predict, \
+    transform_categorical_to_numeric
+
+TARGET = "Loan_Status"
+SELECTED_FEATURES = [
+    'Gender', 'Married', 'Dependents', 'Education',
+    'Self_Employed', 'ApplicantIncome', 'CoapplicantIncome',
+    'LoanAmount', 'Loan_Amount_Term', 'Credit_History', 'Property_Area'
+]
+
+
+def time_call(function, df_data):
+    # Chaque méthode reçoit sa propre copie : les fonctions historiques modifient le DataFrame
+    df_copy = df_data.copy()
+    start = time.perf_counter()
+    function(df_copy)
+    return time.perf_counter() - start
+
+
+def legacy_encoding(df_data):
+    df_data = clean_loan_data(df_data)
+    return transform_categorical_to_numeric(df_data)
+
+
+def run(n_rows_list):
+    """
+    Compare l'encodage historique (clean_loan_data + transform_categorical_to_numeric),
+    LoanPreprocessor.transform et le chemin vectorisé LoanPreprocessor.transform_array.
+    """
+    for n_rows in n_rows_list:
+        df_data = make_loan_data(n_rows)[[TARGET] + SELECTED_FEATURES]
+        train_data, _ = split_train_predict(df_data, TARGET)
+        preprocessor = LoanPreprocessor(TARGET).fit(train_data.head(10_000))
+
+        timings = {
+            'clean_loan_data + transform_categorical_to_numeric': time_call(legacy_encoding, df_data),
+            'LoanPreprocessor.transform': time_call(preprocessor.transform, df_data),
+            'LoanPreprocessor.transform_array': time_call(preprocessor.transform_array, df_data),
+        }
+
+        reference = timings['clean_loan_data + transform_categorical_to_numeric']
+        print(f"\n{n_rows:,} lignes")
+        for method, seconds in timings.items():
+            print(f"  {method:<52} {seconds:8.2f} s  {n_rows / seconds:14,.0f} lignes/s"
+                  f"  x{reference / seconds:.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark de l'encodage des données de crédit.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    args = parser.parse_args()
+    run(args.rows)
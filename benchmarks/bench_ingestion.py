@@ -0,0 +1,68 @@
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import make_loan_data
+from src.csv import get_data_from_csv
+
+TARGET = "Loan_Status"
+COLUMN_ID = "Loan_ID"
+SELECTED_FEATURES = [
+    'Gender', 'Married', 'Dependents', 'Education',
+    'Self_Employed', 'ApplicantIncome', 'CoapplicantIncome',
+    'LoanAmount', 'Loan_Amount_Term', 'Credit_History', 'Property_Area'
+]
+
+
+def legacy_read(path):
+    # Lecture historique : toutes les colonnes, types inférés, dédoublonnage sur les chaînes
+    df_data = pd.read_csv(path)
+    df_data = df_data.drop_duplicates(subset=[COLUMN_ID])
+    return df_data[[TARGET] + SELECTED_FEATURES]
+
+
+def run(n_rows_list):
+    """
+    Compare la lecture historique (read_csv complet + drop_duplicates) et get_data_from_csv
+    (colonnes utiles, types fixés, dédoublonnage par empreinte) sur CSV, Parquet et Feather :
+    durée de chargement et mémoire par ligne du DataFrame obtenu.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_rows in n_rows_list:
+            df_data = make_loan_data(n_rows)
+            paths = {fmt: os.path.join(tmp_dir, f"loans.{fmt}") for fmt in ['csv', 'parquet', 'feather']}
+            df_data.to_csv(paths['csv'], index=False)
+            df_data.to_parquet(paths['parquet'], index=False)
+            df_data.to_feather(paths['feather'])
+            del df_data
+
+            readers = {
+                'read_csv historique': lambda: legacy_read(paths['csv']),
+                'get_data_from_csv (CSV)': lambda: get_data_from_csv(paths['csv'], TARGET, SELECTED_FEATURES, COLUMN_ID),
+                'get_data_from_csv (Parquet)': lambda: get_data_from_csv(paths['parquet'], TARGET,
+                                                                         SELECTED_FEATURES, COLUMN_ID),
+                'get_data_from_csv (Feather)': lambda: get_data_from_csv(paths['feather'], TARGET,
+                                                                         SELECTED_FEATURES, COLUMN_ID),
+            }
+
+            print(f"\n{n_rows:,} lignes")
+            reference = None
+            for name, read in readers.items():
+                start = time.perf_counter()
+                loaded = read()
+                seconds = time.perf_counter() - start
+                bytes_per_row = loaded.memory_usage(deep=True).sum() / len(loaded)
+                reference = reference or (seconds, bytes_per_row)
+                print(f"  {name:<30} {seconds:8.2f} s  x{reference[0] / seconds:5.1f}"
+                      f"  {bytes_per_row:8.1f} octets/ligne  x{reference[1] / bytes_per_row:5.1f}")
+                del loaded
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark du chargement des données de crédit.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    args = parser.parse_args()
+    run(args.rows)
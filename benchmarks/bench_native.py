@@ -0,0 +1,81 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+MODEL_DIR = "models"
+
+# Chargement mesuré dans un interpréteur neuf (premier chargement du processus), une fois
+# xgboost importé : seule la désérialisation est comparée
+LOAD_CODE = {
+    'joblib (XGBClassifier)': ("import time, joblib, xgboost; start = time.perf_counter(); "
+                               "joblib.load('{model_dir}/xgboost_best_model.joblib'); "
+                               "print(time.perf_counter() - start)"),
+    'natif (Booster UBJSON)': ("import time, xgboost; from src.scoring import NativeBoosterModel; "
+                               "start = time.perf_counter(); NativeBoosterModel.load('{model_dir}'); "
+                               "print(time.perf_counter() - start)"),
+}
+
+
+def load_time(code, model_dir, repeats):
+    timings = []
+    for _ in range(repeats):
+        completed = subprocess.run([sys.executable, '-W', 'ignore', '-c', code.format(model_dir=model_dir)],
+                                   capture_output=True, text=True, check=True,
+                                   env=dict(os.environ, PYTHONPATH=os.getcwd()))
+        timings.append(float(completed.stdout.strip().splitlines()[-1]))
+    return float(np.median(timings))
+
+
+def call_latency(predict, x, repeats):
+    """Latence médiane d'un appel (ms)."""
+    predict(x)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(x)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def run(model_dir, batch_sizes, repeats):
+    """
+    Compare le modèle joblib (XGBClassifier) et le booster natif exporté par export_native_model :
+    taille des artefacts, temps de chargement et latence par appel selon la taille du lot.
+    """
+    import joblib
+    from src.scoring import NativeBoosterModel
+
+    paths = {'joblib (XGBClassifier)': os.path.join(model_dir, 'xgboost_best_model.joblib'),
+             'natif (Booster UBJSON)': os.path.join(model_dir, 'xgboost_best_model.ubj')}
+    print("Taille et chargement (interpréteur neuf, hors imports)")
+    for name, path in paths.items():
+        seconds = load_time(LOAD_CODE[name], model_dir, repeats=5)
+        print(f"  {name:<24} {os.path.getsize(path) / 1024:8.1f} Ko  {seconds * 1000:8.1f} ms")
+
+    wrapper = joblib.load(paths['joblib (XGBClassifier)'])
+    native = NativeBoosterModel.load(model_dir)
+    n_features = len(native.feature_names)
+    predictions = {'joblib predict_proba': wrapper.predict_proba,
+                   'natif predict_positive': native.predict_positive}
+
+    rng = np.random.default_rng(0)
+    print("\nLatence médiane par appel")
+    for batch_size in batch_sizes:
+        x = rng.normal(size=(batch_size, n_features)).astype(np.float32)
+        assert np.allclose(wrapper.predict_proba(x)[:, 1], native.predict_positive(x))
+        n_repeats = max(5, min(repeats, 100_000 // batch_size))
+        for name, predict in predictions.items():
+            print(f"  lot de {batch_size:>9,}  {name:<24} {call_latency(predict, x, n_repeats):10.3f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark du modèle joblib et du booster XGBoost natif.")
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 64, 100_000])
+    parser.add_argument('--repeats', type=int, default=1000)
+    args = parser.parse_args()
+    run(args.model_dir, args.batch_sizes, args.repeats)
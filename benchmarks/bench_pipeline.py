@@ -0,0 +1,266 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import matplotlib
+
+# Figures de evaluate_models rendues hors écran
+matplotlib.use('Agg')
+
+import numpy as np
+from matplotlib import pyplot as plt
+from skopt import BayesSearchCV
+
+from benchmarks.synthetic import make_loan_data
+from src.csv import get_data_from_csv
+from src.evaluations import evaluate_models
+from src.main_pipeline import predict_and_save, split_and_train_data
+from src.models import get_models
+from src.optimizations import hyperparameter_search
+from src.param_grids import get_param_grids
+from src.preprocessing import LoanPreprocessor, clean_loan_data, split_train_predict, \
+    transform_categorical_to_numeric
+
+TARGET = "Loan_Status"
+COLUMN_ID = "Loan_ID"
+SELECTED_FEATURES = [
+    'Gender', 'Married', 'Dependents', 'Education',
+    'Self_Employed', 'ApplicantIncome', 'CoapplicantIncome',
+    'LoanAmount', 'Loan_Amount_Term', 'Credit_History', 'Property_Area'
+]
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def current_rss():
+    """Mémoire résidente (RSS) du processus courant en octets, ou None si indisponible."""
+    try:
+        with open('/proc/self/statm', encoding='ascii') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (FileNotFoundError, OSError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+class StageRecorder:
+    """
+    Mesure chaque étape : durée (horloge murale), pic de mémoire résidente au-dessus du niveau
+    de départ de l'étape (peak_mb, comparé à la référence) et pic absolu (peak_rss_mb).
+
+    La RSS est échantillonnée par un thread (toutes les interval secondes) : contrairement à
+    tracemalloc, elle compte aussi la mémoire allouée en C (arbres sklearn, booster XGBoost)
+    et ne ralentit pas l'étape mesurée.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.results = {}
+
+    def run(self, stage, function, *args, **kwargs):
+        start_rss = current_rss()
+        peak = [start_rss or 0]
+        done = threading.Event()
+
+        def sample():
+            while not done.wait(self.interval):
+                peak[0] = max(peak[0], current_rss() or 0)
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            done.set()
+            sampler.join()
+            peak_rss = max(peak[0], current_rss() or 0)
+            peak_mb = (peak_rss - (start_rss or 0)) / (1024 * 1024)
+            self.results[stage] = {'seconds': seconds, 'peak_mb': peak_mb, 'peak_rss_mb': peak_rss / (1024 * 1024)}
+            print(f"  {stage:<52} {seconds:9.3f} s  {peak_mb:9.1f} Mo", flush=True)
+
+
+def object_columns(df_data):
+    # Les fonctions historiques attendent les chaînes d'origine, pas le type 'category' de src.csv
+    return df_data.astype({col: object for col in df_data.select_dtypes(include='category').columns})
+
+
+def run_pipeline(n_rows, work_dir, search_rows, n_iter, n_jobs):
+    """
+    Exécute toutes les étapes du pipeline sur n_rows lignes synthétiques et retourne
+    {étape: {'seconds', 'peak_mb', 'peak_rss_mb'}}.
+    """
+    csv_path = os.path.join(work_dir, f"loans_{n_rows}.csv")
+    make_loan_data(n_rows).to_csv(csv_path, index=False)
+    recorder = StageRecorder()
+
+    df_data = recorder.run('get_data_from_csv', get_data_from_csv, csv_path, TARGET, SELECTED_FEATURES, COLUMN_ID)
+    train_data, predict_data = split_train_predict(df_data, TARGET)
+
+    # Chemin historique (clean_loan_data puis transform_categorical_to_numeric)
+    legacy_data = object_columns(train_data)
+    legacy_data = recorder.run('clean_loan_data', clean_loan_data, legacy_data)
+    recorder.run('transform_categorical_to_numeric', transform_categorical_to_numeric, legacy_data)
+    del legacy_data
+
+    # Chemin actuel (LoanPreprocessor ajusté sur l'entraînement)
+    def preprocess():
+        preprocessor = LoanPreprocessor(TARGET).fit(train_data)
+        train_target = preprocessor.transform_target(train_data[TARGET])
+        features = preprocessor.transform(train_data)
+        features.insert(0, TARGET, train_target)
+        return preprocessor, features, preprocessor.transform(predict_data)
+
+    preprocessor, features, predict_features = recorder.run('LoanPreprocessor (fit + transform)', preprocess)
+    x_train, x_test, y_train, y_test = recorder.run('split_and_train_data', split_and_train_data, features, TARGET)
+    del df_data, train_data, features
+
+    # Recherche sur un sous-échantillon : son coût dépend de search_rows et n_iter, pas de n_rows
+    x_search, y_search = x_train.iloc[:search_rows], y_train.iloc[:search_rows]
+    param_grids = get_param_grids()
+    best_models = {}
+    for model_name, model in get_models().items():
+        param_grid = dict(param_grids[model_name], n_iter=n_iter)
+        # BayesSearchCV tire ses candidats dans l'état aléatoire global : mêmes candidats à chaque exécution
+        np.random.seed(0)
+        best_models[model_name] = recorder.run(f"hyperparameter_search[{model_name}]", hyperparameter_search,
+                                               model_name, model, BayesSearchCV, param_grid,
+                                               x_search, y_search, n_jobs)
+
+    recorder.run('evaluate_models', evaluate_models, best_models, x_test, y_test)
+    plt.close('all')
+
+    predict_features.insert(0, TARGET, np.nan)
+    recorder.run('predict_and_save', predict_and_save, best_models['XGBoost'], predict_features,
+                 preprocessor.feature_columns_, work_dir)
+    return recorder.results
+
+
+def compare(results, baseline, max_time_regression, max_memory_regression, min_seconds, min_mb):
+    """
+    Compare les résultats à la référence, étape par étape.
+
+    Une étape régresse si sa durée dépasse la référence de plus de max_time_regression
+    (ex. 0.2 pour +20 %) ou si son pic mémoire dépasse la référence de plus de
+    max_memory_regression. Les écarts sous min_seconds et min_mb sont ignorés (bruit de mesure).
+
+    Retourne :
+        - La liste des régressions (chaînes lisibles).
+    """
+    regressions = []
+    for n_rows, stages in results.items():
+        reference_stages = baseline.get('results', {}).get(n_rows)
+        if reference_stages is None:
+            print(f"Aucune référence pour {n_rows} lignes.")
+            continue
+        print(f"\nComparaison à la référence, {int(n_rows):,} lignes")
+        for stage, measures in stages.items():
+            reference = reference_stages.get(stage)
+            if reference is None:
+                continue
+            time_ratio = measures['seconds'] / reference['seconds'] if reference['seconds'] > 0 else 1.0
+            memory_ratio = measures['peak_mb'] / reference['peak_mb'] if reference['peak_mb'] > 0 else 1.0
+            flags = []
+            if time_ratio > 1 + max_time_regression and max(measures['seconds'], reference['seconds']) >= min_seconds:
+                flags.append('durée')
+            if memory_ratio > 1 + max_memory_regression and max(measures['peak_mb'], reference['peak_mb']) >= min_mb:
+                flags.append('mémoire')
+            status = f"RÉGRESSION ({', '.join(flags)})" if flags else 'ok'
+            print(f"  {stage:<52} durée x{time_ratio:5.2f}  mémoire x{memory_ratio:5.2f}  {status}")
+            if flags:
+                regressions.append(f"{n_rows} lignes, {stage} : {', '.join(flags)}")
+    return regressions
+
+
+def write_baseline(report, baseline_path):
+    """
+    Enregistre les résultats comme référence. Les tailles non mesurées cette fois sont gardées
+    si la référence existante a été obtenue avec les mêmes réglages (lignes et itérations des
+    recherches, cœurs) : la taille la plus longue peut ainsi être mesurée à part (--rows).
+    """
+    settings = ('search_rows', 'n_iter', 'n_jobs')
+    baseline = report
+    if os.path.exists(baseline_path):
+        with open(baseline_path, encoding='utf-8') as file:
+            previous = json.load(file)
+        if all(previous.get('meta', {}).get(name) == report['meta'][name] for name in settings):
+            baseline = {'meta': report['meta'], 'results': dict(previous.get('results', {}), **report['results'])}
+    with open(baseline_path, 'w', encoding='utf-8') as file:
+        json.dump(baseline, file, indent=2)
+    print(f"Référence enregistrée dans {baseline_path} ({', '.join(baseline['results'])} lignes).")
+
+
+def run(n_rows_list, output, baseline_path, save_baseline, max_time_regression, max_memory_regression,
+        min_seconds, min_mb, search_rows, n_iter, n_jobs):
+    """
+    Exécute le pipeline pour chaque taille, écrit les résultats en JSON puis les compare
+    à la référence. Retourne 1 en cas de régression, 0 sinon.
+    """
+    report = {
+        'meta': {'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                 'python': sys.version.split()[0],
+                 'platform': platform.platform(),
+                 'cpu_count': os.cpu_count(),
+                 'search_rows': search_rows,
+                 'n_iter': n_iter,
+                 'n_jobs': n_jobs},
+        'results': {}
+    }
+    with tempfile.TemporaryDirectory() as work_dir:
+        for n_rows in n_rows_list:
+            print(f"\n{n_rows:,} lignes")
+            report['results'][str(n_rows)] = run_pipeline(n_rows, work_dir, search_rows, n_iter, n_jobs)
+
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print(f"\nRésultats écrits dans {output}.")
+
+    if save_baseline:
+        write_baseline(report, baseline_path)
+        return 0
+
+    if not os.path.exists(baseline_path):
+        print(f"Pas de référence ({baseline_path}) : utiliser --save-baseline.")
+        return 0
+    with open(baseline_path, encoding='utf-8') as file:
+        baseline = json.load(file)
+    regressions = compare(report['results'], baseline, max_time_regression, max_memory_regression, min_seconds,
+                          min_mb)
+    for regression in regressions:
+        print(f"Régression : {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark de chaque étape du pipeline de crédit.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Enregistre les résultats comme nouvelle référence au lieu de comparer "
+                             "(tailles non mesurées conservées, à réglages identiques).")
+    parser.add_argument('--max-time-regression', type=float, default=0.25,
+                        help="Hausse de durée tolérée par étape (0.25 = +25 %%).")
+    parser.add_argument('--max-memory-regression', type=float, default=0.25,
+                        help="Hausse du pic mémoire tolérée par étape.")
+    parser.add_argument('--min-seconds', type=float, default=0.1,
+                        help="Durée en dessous de laquelle les écarts de temps sont ignorés.")
+    parser.add_argument('--min-mb', type=float, default=10.0,
+                        help="Pic mémoire en dessous duquel les écarts de mémoire sont ignorés.")
+    parser.add_argument('--search-rows', type=int, default=2_000,
+                        help="Lignes utilisées par les recherches d'hyperparamètres.")
+    parser.add_argument('--n-iter', type=int, default=5, help="Itérations de chaque recherche.")
+    parser.add_argument('--n-jobs', type=int, default=1,
+                        help="Cœurs des recherches (1 : pic mémoire mesuré dans un seul processus).")
+    args = parser.parse_args()
+    sys.exit(run(args.rows, args.output, args.baseline, args.save_baseline, args.max_time_regression,
+                 args.max_memory_regression, args.min_seconds, args.min_mb, args.search_rows, args.n_iter, args.n_jobs))
@@ -0,0 +1,69 @@
+import argparse
+import time
+
+import joblib
+import numpy as np
+
+from src.main_pipeline import prepare_data
+from src.tree_compiler import compile_model
+
+CSV_PATH = "data/loan-data.csv"
+TARGET = "Loan_Status"
+COLUMN_ID = "Loan_ID"
+SELECTED_FEATURES = [
+    'Gender', 'Married', 'Dependents', 'Education',
+    'Self_Employed', 'ApplicantIncome', 'CoapplicantIncome',
+    'LoanAmount', 'Loan_Amount_Term', 'Credit_History', 'Property_Area'
+]
+
+
+def call_latency(predict, x, repeats):
+    """Latence médiane d'un appel (ms)."""
+    predict(x)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(x)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def run(model_path, batch_sizes, repeats):
+    """
+    Compare model.predict et le moteur compilé (src.tree_compiler) pour la forêt aléatoire
+    et le booster XGBoost : identité des prédictions sur les données d'entraînement, puis
+    latence par appel selon la taille du lot.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+
+    train_data, _, preprocessor = prepare_data(CSV_PATH, TARGET, SELECTED_FEATURES, COLUMN_ID, 'off')
+    x = train_data[preprocessor.feature_columns_].to_numpy(dtype=np.float32)
+    y = train_data[TARGET]
+
+    models = {'Random Forest': RandomForestClassifier(random_state=42).fit(x, y),
+              'XGBoost': joblib.load(model_path)}
+
+    rng = np.random.default_rng(0)
+    for name, model in models.items():
+        compiled = compile_model(model)
+        identical = (np.array_equal(model.predict(x), compiled.predict(x))
+                     and np.array_equal(model.predict_proba(x), compiled.predict_proba(x)))
+        print(f"\n{name} : {compiled.n_trees} arbres, profondeur {compiled.max_depth}, "
+              f"prédictions identiques : {identical}")
+
+        for batch_size in batch_sizes:
+            batch = x[rng.integers(0, len(x), batch_size)]
+            n_repeats = max(5, min(repeats, 100_000 // batch_size))
+            reference = call_latency(model.predict, batch, n_repeats)
+            engine = call_latency(compiled.predict, batch, n_repeats)
+            print(f"  lot de {batch_size:>9,}  predict {reference:10.3f} ms  compilé {engine:10.3f} ms"
+                  f"  x{reference / engine:.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark du moteur d'inférence compilé des ensembles d'arbres.")
+    parser.add_argument('--model-path', default='models/xgboost_best_model.joblib')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 64, 100_000])
+    parser.add_argument('--repeats', type=int, default=200)
+    args = parser.parse_args()
+    run(args.model_path, args.batch_sizes, args.repeats)
@@ -0,0 +1,58 @@
+import argparse
+import re
+import subprocess
+import sys
+
+# Modules qui ne doivent jamais être importés par le point d'entrée de scoring
+FORBIDDEN_MODULES = ['matplotlib', 'seaborn', 'missingno', 'IPython', 'skopt']
+
+
+def measure_import(module_name):
+    """
+    Importe module_name dans un interpréteur neuf avec -X importtime.
+
+    Retourne :
+        - La durée d'import cumulée (ms) et la liste des modules interdits chargés.
+    """
+    code = (f"import sys, {module_name}; "
+            f"print(','.join(m for m in {FORBIDDEN_MODULES!r} if m in sys.modules))")
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                               capture_output=True, text=True, check=True)
+
+    # Lignes « import time: self | cumulative | module » : on garde les modules de premier niveau
+    total_us = 0
+    for line in completed.stderr.splitlines():
+        match = re.match(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)', line)
+        if match and match.group(3) == ' ':
+            total_us += int(match.group(2))
+
+    loaded = [module for module in completed.stdout.strip().split(',') if module]
+    return total_us / 1000, loaded
+
+
+def run(max_ms):
+    """
+    Compare le temps d'import du point d'entrée de scoring (score) et d'entraînement (main).
+    Retourne 1 si score charge un module interdit ou dépasse max_ms, 0 sinon.
+    """
+    status = 0
+    for module_name in ['score', 'main']:
+        import_ms, loaded = measure_import(module_name)
+        print(f"{module_name:<6} {import_ms:8.0f} ms  modules lourds : {', '.join(loaded) or 'aucun'}")
+
+        if module_name == 'score':
+            if loaded:
+                print(f"ÉCHEC : score importe {', '.join(loaded)}")
+                status = 1
+            if max_ms is not None and import_ms > max_ms:
+                print(f"ÉCHEC : import de score en {import_ms:.0f} ms (> {max_ms} ms)")
+                status = 1
+    return status
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark du temps d'import des points d'entrée.")
+    parser.add_argument('--max-ms', type=float, default=None,
+                        help="Durée d'import maximale tolérée pour score, en ms.")
+    args = parser.parse_args()
+    sys.exit(run(args.max_ms))
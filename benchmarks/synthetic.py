@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+CSV_PATH = "data/loan-data.csv"
+
+
+def make_loan_data(n_rows, csv_path=CSV_PATH, seed=42):
+    """
+    Génère un jeu de données synthétique au schéma de loan-data.csv, de taille n_rows.
+
+    Les lignes sont tirées avec remise dans le fichier d'origine (ce qui conserve les
+    corrélations et la proportion de valeurs manquantes), les colonnes numériques sont
+    légèrement bruitées et chaque ligne reçoit un identifiant unique.
+    """
+    rng = np.random.default_rng(seed)
+    source = pd.read_csv(csv_path)
+
+    df_data = source.iloc[rng.integers(0, len(source), n_rows)].reset_index(drop=True)
+    for column in ['ApplicantIncome', 'CoapplicantIncome', 'LoanAmount']:
+        noise = rng.normal(1.0, 0.05, n_rows)
+        df_data[column] = (df_data[column] * noise).round()
+    df_data['Loan_ID'] = [f"LP{i:09d}" for i in range(n_rows)]
+    return df_data
@@ -0,0 +1 @@
+# Racine du dépôt : rend le paquet src importable par les tests (python -m pytest ou pytest)
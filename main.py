@@ -1,11 +1,15 @@
+import os
 
 from skopt import BayesSearchCV
 from src.evaluations import evaluate_models
 from src.explorations import explore_dataframe
-from src.main_pipeline import prepare_data, split_and_train_data, save_best_model, predict_and_save
+from src.incremental import ModelRegistry, OnlinePreprocessorStats
+from src.main_pipeline import prepare_features, predict_and_save, wait_for_background_reports
 from src.models import get_models
 from src.optimizations import get_best_models
 from src.param_grids import get_param_grids
+from src.profiling import stage, start_tracing, stop_tracing
+from src.thresholds import fit_decision_policy, print_threshold_summary
 
 def main():
     # Paramètres globaux
@@ -19,33 +23,69 @@ def main():
     ]
     model_dir = 'models'
     data_dir = 'data'
+    report_dir = 'reports'
+    exploration_mode = 'inline'  # 'inline', 'background' (rapport sur disque) ou 'off' (production)
+    # ou HalvingRandomSearchCV (successive halving, moins d'ajustements),
+    # ou CachedBayesSearchCV (réutilise les évaluations en cache des exécutions précédentes)
+    # ou FoldBayesSearchCV (plis et QuantileDMatrix préparés une fois pour tous les candidats)
+    search_method = BayesSearchCV
+    concurrent_search = False  # True : les quatre recherches tournent en parallèle sur un budget de cœurs partagé
+    feature_cache_dir = '.cache/features'  # None : prétraitement recalculé à chaque exécution
+    trace_path = None  # ex. 'reports/trace.json' : durée, CPU, RSS et lignes de chaque étape (chrome://tracing)
+    profile_mode = None  # avec trace_path : 'cprofile' ou 'sampling' pour les points chauds
+    calibration_method = 'isotonic'  # 'isotonic', 'sigmoid' (Platt) ou None
+    threshold_objective = 'cost'  # seuil de décision minimisant le coût ('cost'), ou maximisant 'f1' / 'accuracy'
+    cost_fp, cost_fn = 1.0, 1.0  # coût d'un refus à tort (classe positive : N) et d'un accord à tort
+    probability_mode = True  # ajoute aux prédictions la probabilité calibrée (colonne 'Probability')
 
-    # Préparation des données
-    train_data, predict_data, label_encoders  = prepare_data(csv_path, target, selected_features, column_id)
+    if trace_path is not None:
+        start_tracing(profile=profile_mode)
 
-    # Diviser les données d'entraînement et d'évaluation
-    x_train, x_test, y_train, y_test = split_and_train_data(train_data, target)
+    # Préparation des données et séparation entraînement / évaluation, reprises du cache si
+    # le fichier d'entrée et la configuration n'ont pas changé (matrices en mémoire mappée)
+    x_train, x_test, y_train, y_test, predict_data, preprocessor, drift_monitor = prepare_features(
+        csv_path, target, selected_features, column_id, exploration_mode, report_dir, feature_cache_dir)
 
     # Récupération des modèles et des grilles
     models = get_models()
     param_grids = get_param_grids()
 
     # Recherche des meilleurs modèles
-    best_models = get_best_models(models, param_grids, BayesSearchCV, x_train, y_train)
-
-    # Evaluation des modèles
-    evaluate_models(best_models, x_test, y_test)
+    best_models = get_best_models(models, param_grids, search_method, x_train, y_train,
+                                  concurrent=concurrent_search)
 
     # Sélection du meilleur modèle
     best_model = best_models['XGBoost']
 
-    # Sauvegarde du meilleur modèle
-    save_best_model(best_model, model_dir)
+    # Calibration et seuil de décision, ajustés hors échantillon sur les données d'entraînement
+    with stage('fit_decision_policy', rows=len(x_train)):
+        policy, sweep = fit_decision_policy(best_model, x_train, y_train, calibration_method, threshold_objective,
+                                            cost_fp, cost_fn)
+    print_threshold_summary(policy, sweep)
+
+    # Evaluation des modèles (le meilleur avec sa calibration et son seuil)
+    with stage('evaluate_models', rows=len(x_test)):
+        evaluate_models(best_models, x_test, y_test, policies={'XGBoost': policy})
+
+    # Sauvegarde du meilleur modèle, comme nouvelle version mise en production (artefacts joblib,
+    # booster natif, politique de décision et référence de la surveillance de dérive pour
+    # score.py --monitor) ; update.py la met ensuite à jour lot par lot sans nouvelle recherche
+    stats = OnlinePreprocessorStats.from_features(preprocessor, x_train)
+    ModelRegistry(model_dir).publish(best_model, preprocessor, stats, {'mode': 'full', 'new_rows': len(x_train)},
+                                     policy=policy, monitor=drift_monitor)
 
-    predict_features = train_data.columns.drop('Loan_Status')
+    predict_features = preprocessor.feature_columns_
 
     # Prédictions et sauvegarde des résultats
-    predict_and_save(best_model, predict_data, predict_features, data_dir)
+    predict_and_save(best_model, predict_data, predict_features, data_dir, policy, probability_mode)
+
+    # Les rapports d'exploration en arrière-plan doivent être terminés avant la sortie
+    wait_for_background_reports()
+
+    if trace_path is not None:
+        stop_tracing(trace_path,
+                     log_path=os.path.splitext(trace_path)[0] + '.jsonl',
+                     profile_path=os.path.splitext(trace_path)[0] + ('.prof' if profile_mode == 'cprofile' else '.folded'))
 
 
 if __name__ == '__main__':
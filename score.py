@@ -0,0 +1,73 @@
+import argparse
+
+# Point d'entrée léger pour le scoring : n'importe que numpy/pandas/joblib (et xgboost au
+# chargement du modèle). Les dépendances d'exploration et d'optimisation de main.py
+# (matplotlib, seaborn, missingno, IPython, skopt) ne sont jamais chargées.
+from src.main_pipeline import load_best_model, load_preprocessor
+from src.monitoring import DriftMonitor, print_drift_report
+from src.scoring import NativeBoosterModel, predict_and_save_in_chunks
+from src.thresholds import DecisionPolicy
+
+# Paramètres par défaut, identiques à ceux de main.py
+TARGET = "Loan_Status"
+COLUMN_ID = "Loan_ID"
+SELECTED_FEATURES = [
+    'Gender', 'Married', 'Dependents', 'Education',
+    'Self_Employed', 'ApplicantIncome', 'CoapplicantIncome',
+    'LoanAmount', 'Loan_Amount_Term', 'Credit_History', 'Property_Area'
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score un fichier de demandes de crédit avec le modèle sauvegardé.")
+    parser.add_argument('csv_path', help="Fichier CSV brut à scorer.")
+    parser.add_argument('--model-dir', default='models')
+    parser.add_argument('--data-dir', default='data', help="Répertoire de sortie.")
+    parser.add_argument('--output-name', default='loan_predictions.csv')
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--native', action='store_true',
+                        help="Utilise le booster XGBoost natif exporté plutôt que le modèle joblib.")
+    parser.add_argument('--probabilities', action='store_true',
+                        help="Ajoute la probabilité calibrée de la classe positive (colonne 'Probability').")
+    parser.add_argument('--no-dedup', action='store_true',
+                        help="Ne dédoublonne pas les identifiants (fichier réputé sans doublons).")
+    parser.add_argument('--monitor', action='store_true',
+                        help="Ajoute les lignes scorées à la surveillance de dérive et affiche son rapport.")
+    parser.add_argument('--reset-monitor', action='store_true',
+                        help="Avec --monitor, ouvre une nouvelle fenêtre de surveillance avant le scoring.")
+    args = parser.parse_args()
+
+    if args.native:
+        # Seul le prétraitement passe par joblib ; le modèle n'a besoin que de la bibliothèque xgboost
+        best_model = NativeBoosterModel.load(args.model_dir)
+        preprocessor = load_preprocessor(args.model_dir)
+    else:
+        best_model, preprocessor = load_best_model(args.model_dir)
+    # Calibration et seuil sauvegardés avec le modèle (seuil 0.5 sans calibration s'il n'y en a pas)
+    policy = DecisionPolicy.load(args.model_dir)
+    # Fenêtre de surveillance cumulée d'une exécution à l'autre, jusqu'à --reset-monitor
+    monitor = DriftMonitor.load(args.model_dir) if args.monitor else None
+    if args.monitor and monitor is None:
+        print(f"Pas de surveillance de dérive dans '{args.model_dir}' : relancer main.py ou train_large.py.")
+    elif monitor is not None and args.reset_monitor:
+        monitor.reset()
+    predict_and_save_in_chunks(best_model,
+                               preprocessor,
+                               args.csv_path,
+                               TARGET,
+                               SELECTED_FEATURES,
+                               COLUMN_ID,
+                               args.data_dir,
+                               chunksize=args.chunksize,
+                               output_name=args.output_name,
+                               policy=policy,
+                               probability_mode=args.probabilities,
+                               monitor=monitor,
+                               deduplicate=not args.no_dedup)
+    if monitor is not None:
+        print_drift_report(monitor)
+        monitor.save(args.model_dir)
+
+
+if __name__ == '__main__':
+    main()
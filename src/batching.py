@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.scoring import LatencyRecorder
+
+
+class MicroBatcher:
+    """
+    Regroupe les demandes de scoring unitaires en lots avant d'appeler le modèle.
+
+    Une demande attend au plus max_wait_ms ; un lot est envoyé dès qu'il atteint
+    max_batch_size lignes. predict_proba est appelé une seule fois par lot et chaque
+    appelant récupère sa propre probabilité.
+
+    Paramètres :
+        - predict_proba : Fonction (n, n_features) -> probabilités de la classe positive (n,).
+        - max_wait_ms : Attente maximale d'une demande avant l'envoi du lot.
+        - max_batch_size : Nombre maximal de lignes par lot.
+    """
+
+    def __init__(self, predict_proba, max_wait_ms=2.0, max_batch_size=64):
+        self.predict_proba = predict_proba
+        self.max_wait_ms = max_wait_ms
+        self.max_batch_size = max_batch_size
+
+        self.batch_sizes = Counter()
+        self.queue_delay = LatencyRecorder()
+        self.batch_latency = LatencyRecorder()
+
+        self._queue = None
+        self._worker = None
+        self._loop = None
+        self._thread = None
+        # Un seul thread pour le modèle : les lots sont traités l'un après l'autre,
+        # sans bloquer la boucle qui continue à accumuler le lot suivant.
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    async def start(self):
+        """Démarre la tâche de regroupement dans la boucle courante."""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Arrête la tâche de regroupement."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._executor.shutdown(wait=False)
+
+    async def score(self, row):
+        """
+        Met en file une ligne de caractéristiques (n_features,) et attend sa probabilité.
+        """
+        future = self._loop.create_future()
+        await self._queue.put((np.asarray(row, dtype=np.float32).ravel(), time.perf_counter(), future))
+        return await future
+
+    def start_in_thread(self):
+        """
+        Démarre une boucle asyncio dédiée dans un thread, pour les serveurs synchrones
+        (cf. score_threadsafe).
+        """
+        ready = threading.Event()
+
+        def run_loop():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            ready.set()
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=run_loop, daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def score_threadsafe(self, row):
+        """
+        Version bloquante de score, appelable depuis n'importe quel thread.
+        """
+        return asyncio.run_coroutine_threadsafe(self.score(row), self._loop).result()
+
+    def metrics(self):
+        """
+        Distribution des tailles de lots, délai d'attente en file et durée des appels au modèle.
+        """
+        sizes = dict(sorted(self.batch_sizes.items()))
+        n_batches = sum(sizes.values())
+        n_rows = sum(size * count for size, count in sizes.items())
+        return {'batches': n_batches,
+                'mean_batch_size': n_rows / n_batches if n_batches else None,
+                'batch_size_distribution': sizes,
+                'queue_delay': self.queue_delay.summary(),
+                'batch_latency': self.batch_latency.summary()}
+
+    async def _collect_batch(self):
+        """
+        Attend une première demande puis complète le lot jusqu'à max_batch_size
+        ou jusqu'à l'échéance de la première demande.
+        """
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait_ms / 1000
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect_batch()
+            rows, enqueued, futures = zip(*batch)
+
+            dispatched = time.perf_counter()
+            for enqueued_at in enqueued:
+                self.queue_delay.record((dispatched - enqueued_at) * 1000)
+            self.batch_sizes[len(batch)] += 1
+
+            try:
+                probabilities = await self._loop.run_in_executor(self._executor,
+                                                                 self.predict_proba,
+                                                                 np.vstack(rows))
+            except Exception as error:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            self.batch_latency.record((time.perf_counter() - dispatched) * 1000)
+
+            for future, probability in zip(futures, probabilities):
+                if not future.done():
+                    future.set_result(float(probability))
@@ -0,0 +1,117 @@
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+from sklearn.base import clone
+from skopt import Optimizer
+
+from src.profiling import add_search_iteration, get_tracer
+
+
+def to_builtin(value):
+    """Convertit les scalaires numpy en types Python (sérialisables en JSON)."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def take_rows(data, indices):
+    """Lignes d'un DataFrame, d'une Series ou d'un tableau numpy, par positions."""
+    return data.iloc[indices] if hasattr(data, 'iloc') else data[indices]
+
+
+class AskTellSearchCV:
+    """
+    Base des recherches bayésiennes construites sur skopt.Optimizer (CachedBayesSearchCV,
+    FoldBayesSearchCV) : boucle ask/tell, résultats au format de BayesSearchCV et réajustement.
+
+    À chaque itération, n_points candidats sont demandés à l'optimiseur et évalués ensemble
+    par le lot renvoyé par _prepare : c'est à lui de répartir les candidats (et leurs plis)
+    sur les cœurs.
+
+    Les sous-classes déclarent leurs paramètres dans __init__ (estimator, search_spaces,
+    n_iter, cv, scoring, n_jobs, n_points, n_initial_points, random_state, verbose, refit)
+    et implémentent _prepare.
+
+    Avec le traçage actif (cf. src.profiling), fit ajoute une étape pour la préparation (plis,
+    reprise du cache), une par itération (candidats, temps de calcul, surcoût estimé de
+    l'optimiseur) et une pour le réajustement, nommées d'après trace_name.
+    """
+
+    def fit(self, x, y, trace_name=None):
+        tracer = get_tracer()
+        trace_name = trace_name or type(self.estimator).__name__
+        cores = self.n_jobs if self.n_jobs and self.n_jobs > 0 else (os.cpu_count() or 1)
+
+        start = time.perf_counter()
+        names = sorted(self.search_spaces)
+        optimizer = Optimizer([self.search_spaces[name] for name in names],
+                              n_initial_points=self.n_initial_points,
+                              random_state=self.random_state)
+        evaluate_batch, results = self._prepare(x, y, names, optimizer)
+        if tracer is not None:
+            tracer.add_event(f"search_prepare[{trace_name}]", start, time.perf_counter(),
+                             reused_evaluations=len(results))
+
+        iteration = 0
+        while len(results) < self.n_iter:
+            start = time.perf_counter()
+            n_points = min(self.n_points, self.n_iter - len(results))
+            points = optimizer.ask(n_points=n_points) if n_points > 1 else [optimizer.ask()]
+            batch = evaluate_batch([dict(zip(names, map(to_builtin, point))) for point in points])
+            results.extend(batch)
+            optimizer.tell([list(point) for point in points], [-np.mean(record['scores']) for record in batch])
+            if tracer is not None:
+                add_search_iteration(tracer, f"search_iteration[{trace_name}]", iteration, start,
+                                     time.perf_counter(), [self._trace_candidate(record) for record in batch],
+                                     len(batch[0]['scores']), cores)
+            iteration += 1
+
+        self._set_results(results, names)
+        if self.refit:
+            start = time.perf_counter()
+            self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_).fit(x, y)
+            if tracer is not None:
+                tracer.add_event(f"refit[{trace_name}]", start, time.perf_counter())
+        return self
+
+    @staticmethod
+    def _trace_candidate(record):
+        cached = record.get('cached', False)
+        return {'params': dict(record['params']),
+                'fit_seconds': 0.0 if cached else float(np.sum(record['fit_time'])),
+                'score_seconds': 0.0 if cached else float(np.sum(record['score_time'])),
+                'mean_test_score': float(np.mean(record['scores'])),
+                'cached': cached}
+
+    def _prepare(self, x, y, names, optimizer):
+        """
+        Prépare la recherche et retourne (evaluate_batch, results) : evaluate_batch reçoit une
+        liste de paramètres et retourne un enregistrement par candidat ('params', 'scores',
+        'fit_time', 'score_time' par pli, et éventuellement 'cached') ; results contient les
+        enregistrements déjà connus, dont l'optimiseur a été informé.
+        """
+        raise NotImplementedError
+
+    def _set_results(self, results, names):
+        scores = np.array([record['scores'] for record in results])
+        cached = np.array([record.get('cached', False) for record in results])
+        self.n_splits_ = scores.shape[1]
+        self.cv_results_ = {
+            'params': [record['params'] for record in results],
+            'mean_test_score': scores.mean(axis=1),
+            'std_test_score': scores.std(axis=1),
+            # Temps nuls pour les points repris d'un cache : seul le travail effectif est compté
+            'mean_fit_time': np.array([0.0 if is_cached else np.mean(record['fit_time'])
+                                       for record, is_cached in zip(results, cached)]),
+            'mean_score_time': np.array([0.0 if is_cached else np.mean(record['score_time'])
+                                         for record, is_cached in zip(results, cached)]),
+        }
+        if any('cached' in record for record in results):
+            self.cv_results_['cached'] = cached
+        for split in range(self.n_splits_):
+            self.cv_results_[f'split{split}_test_score'] = scores[:, split]
+
+        best = int(np.argmax(self.cv_results_['mean_test_score']))
+        self.best_index_ = best
+        self.best_score_ = float(self.cv_results_['mean_test_score'][best])
+        self.best_params_ = OrderedDict((name, results[best]['params'][name]) for name in names)
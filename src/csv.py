@@ -1,12 +1,188 @@
+import os
+import tempfile
+
+import numpy as np
 import pandas as pd
 
+# Types fixés à la lecture : les modalités en 'category' (codes int8 au lieu d'une chaîne Python
+# par ligne), les mesures en float32, l'identifiant en chaîne le temps du dédoublonnage.
+CATEGORICAL_COLUMNS = ['Gender', 'Married', 'Dependents', 'Education', 'Self_Employed', 'Property_Area',
+                       'Loan_Status']
+NUMERIC_DTYPE = 'float32'
+# Empreintes d'identifiants gardées en mémoire (8 octets chacune) avant d'écrire les plus
+# grandes séries triées sur disque (cf. SeenIds)
+MAX_IN_MEMORY_IDS = 10_000_000
+
+# Formats colonnes lus sans passer par le texte (pyarrow requis)
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+FEATHER_EXTENSIONS = ('.feather', '.arrow', '.ipc')
+
+
+def column_dtypes(columns, column_id, categorical_columns=None):
+    """
+    Types à appliquer à chaque colonne lue : 'category' pour les modalités, 'object' pour
+    l'identifiant et NUMERIC_DTYPE pour le reste.
+    """
+    if categorical_columns is None:
+        categorical_columns = CATEGORICAL_COLUMNS
+    dtypes = {}
+    for col in columns:
+        if col == column_id:
+            dtypes[col] = 'object'
+        elif col in categorical_columns:
+            dtypes[col] = 'category'
+        else:
+            dtypes[col] = NUMERIC_DTYPE
+    return dtypes
+
+
+def read_columns(path, columns, dtypes):
+    """
+    Lit uniquement columns d'un fichier CSV, Parquet ou Feather/Arrow (selon l'extension),
+    avec les types dtypes.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in PARQUET_EXTENSIONS:
+        # Les chaînes catégorielles sont lues directement en dictionnaire (-> category)
+        categorical = [col for col in columns if dtypes.get(col) == 'category']
+        df_data = pd.read_parquet(path, columns=columns, read_dictionary=categorical)
+    elif extension in FEATHER_EXTENSIONS:
+        df_data = pd.read_feather(path, columns=columns)
+    else:
+        return pd.read_csv(path, usecols=columns, dtype=dtypes)[columns]
+    return df_data.astype(dtypes)
+
+
+def iter_columns(path, columns, dtypes, chunksize):
+    """
+    Équivalent de read_columns par blocs, sans jamais charger le fichier entier : blocs de
+    chunksize lignes pour CSV et Parquet, lots enregistrés dans le fichier pour Feather/Arrow.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in PARQUET_EXTENSIONS:
+        import pyarrow.parquet as pq
+
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns)
+    elif extension in FEATHER_EXTENSIONS:
+        import pyarrow as pa
+
+        reader = pa.ipc.open_file(path)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    else:
+        for chunk in pd.read_csv(path, usecols=columns, dtype=dtypes, chunksize=chunksize):
+            yield chunk[columns]
+        return
+
+    for batch in batches:
+        yield batch.to_pandas()[columns].astype(dtypes)
+
+
+def drop_duplicate_ids(df_data, column_id):
+    """
+    Conserve la première ligne de chaque identifiant : une seule table de hachage sur la
+    colonne identifiant, sans factoriser le DataFrame comme drop_duplicates.
+    """
+    return df_data[~df_data[column_id].duplicated().to_numpy()]
+
+
+class SeenIds:
+    """
+    Identifiants déjà rencontrés au fil d'une lecture par blocs, pour un dédoublonnage dont le
+    coût ne dépend pas du nombre de blocs déjà lus.
 
-def get_data_from_csv(csv_path, target, features, column_id):
+    Chaque identifiant est réduit à une empreinte 64 bits (pd.util.hash_pandas_object), et les
+    empreintes sont rangées en séries triées de tailles croissantes, fusionnées deux à deux
+    comme un compteur binaire : un bloc est testé par une recherche dichotomique vectorisée
+    dans chaque série (O(log n) séries), sans jamais parcourir l'ensemble des identifiants.
+    Au-delà de max_in_memory empreintes, les plus grandes séries sont écrites dans un
+    répertoire temporaire et relues en mémoire mappée : la mémoire reste bornée.
+
+    Deux identifiants distincts de même empreinte (probabilité de l'ordre de n² / 2⁶⁵) seraient
+    pris pour un doublon.
+
+    Paramètres :
+        - max_in_memory : Empreintes gardées en mémoire avant écriture sur disque.
+        - spill_dir : Répertoire parent des séries écrites sur disque (temporaire par défaut).
+    """
+
+    def __init__(self, max_in_memory=MAX_IN_MEMORY_IDS, spill_dir=None):
+        self.max_in_memory = max_in_memory
+        self.spill_dir = spill_dir
+        self._runs = []
+        self._directory = None
+        self._spilled = 0
+
+    def first_occurrences(self, ids):
+        """
+        Masque des lignes dont l'identifiant n'a été vu ni plus haut dans le bloc, ni dans un
+        bloc précédent ; ces identifiants sont ensuite retenus.
+        """
+        hashes = pd.util.hash_pandas_object(pd.Series(ids), index=False).to_numpy()
+        keep = ~pd.Series(hashes).duplicated().to_numpy()
+        for run in self._runs:
+            positions = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            keep &= run[positions] != hashes
+        self._push(np.sort(hashes[keep]))
+        return keep
+
+    def _push(self, run):
+        if not len(run):
+            return
+        self._runs.append(run)
+        # Compteur binaire : une série n'est fusionnée qu'avec une série au plus aussi grande
+        while len(self._runs) > 1 and len(self._runs[-2]) <= len(self._runs[-1]):
+            last = self._runs.pop()
+            previous = self._runs.pop()
+            # Tri stable (timsort) de deux séries déjà triées : linéaire
+            merged = np.sort(np.concatenate([previous, last]), kind='stable')
+            for run in (previous, last):
+                if isinstance(run, np.memmap):
+                    os.remove(run.filename)
+            self._runs.append(self._spill(merged) if len(merged) > self.max_in_memory else merged)
+
+    def _spill(self, run):
+        if self._directory is None:
+            self._directory = tempfile.TemporaryDirectory(prefix='seen_ids_', dir=self.spill_dir)
+        self._spilled += 1
+        path = os.path.join(self._directory.name, f"run_{self._spilled}.npy")
+        np.save(path, run)
+        return np.load(path, mmap_mode='r')
+
+    def close(self):
+        """Supprime les séries écrites sur disque."""
+        self._runs = []
+        if self._directory is not None:
+            self._directory.cleanup()
+            self._directory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def get_data_from_csv(csv_path, target, features, column_id, categorical_columns=None):
+    """
+    Charge les données brutes : seules la cible, les caractéristiques et l'identifiant sont lus,
+    avec des types fixés (cf. column_dtypes), puis les identifiants en double sont écartés.
+
+    Paramètres :
+        - csv_path : Fichier CSV, Parquet (.parquet) ou Feather/Arrow (.feather, .arrow).
+        - target : Nom de la colonne cible.
+        - features : Colonnes de caractéristiques à conserver.
+        - column_id : Colonne identifiant utilisée pour le dédoublonnage.
+        - categorical_columns : Colonnes lues en 'category' (CATEGORICAL_COLUMNS par défaut).
+
+    Retourne :
+        - Le DataFrame [target] + features, sans l'identifiant.
+    """
+    columns = [column_id, target] + features
     try:
-        # Read the CSV file into a DataFrame.
-        df_data = pd.read_csv(csv_path)
-        df_data = df_data.drop_duplicates(subset=[column_id])
-        df_data = df_data[[target] + features]
-        return df_data
+        df_data = read_columns(csv_path, columns, column_dtypes(columns, column_id, categorical_columns))
     except FileNotFoundError:
         print("The specified CSV file does not exist.")
+        return None
+
+    df_data = drop_duplicate_ids(df_data, column_id)
+    return df_data[[target] + features]
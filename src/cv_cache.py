@@ -0,0 +1,322 @@
+import hashlib
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone, is_classifier
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import check_cv
+from skopt.space import Categorical
+
+from src.bayes_search import AskTellSearchCV, take_rows
+
+# Emplacement et taille par défaut du cache des résultats de validation croisée
+CACHE_DIR = ".cache/cv_results"
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+# Paramètres sans effet sur les scores, exclus des clés
+IGNORED_PARAMS = ('n_jobs', 'verbose', 'verbosity')
+
+
+def _scoring_params(estimator):
+    params = estimator.get_params(deep=False)
+    return {name: value for name, value in params.items() if name not in IGNORED_PARAMS}
+
+
+def _hash(payload):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=repr).encode('utf-8')).hexdigest()
+
+
+def dataset_fingerprint(x, y):
+    """
+    Empreinte du jeu de données : contenu, noms et types des colonnes, cible.
+    """
+    x_frame = pd.DataFrame(x)
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(x_frame, index=False).to_numpy().tobytes())
+    digest.update(pd.util.hash_pandas_object(pd.Series(np.asarray(y)), index=False).to_numpy().tobytes())
+    digest.update(json.dumps([list(map(str, x_frame.columns)), list(map(str, x_frame.dtypes))]).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class CVResultCache:
+    """
+    Cache disque, adressé par contenu, des scores de validation croisée.
+
+    Un groupe regroupe les évaluations d'un même jeu de données (empreinte), d'une même
+    classe d'estimateur et des mêmes plis (indices) ; chaque point du groupe est identifié
+    par l'ensemble des paramètres de l'estimateur. Les estimateurs ajustés peuvent aussi
+    être conservés. Au-delà de max_bytes, les points les moins récemment utilisés sont
+    supprimés (scores et estimateurs ensemble), jusqu'à repasser sous EVICTION_TARGET de
+    max_bytes.
+
+    La taille totale est suivie en mémoire : le répertoire n'est parcouru qu'à la première
+    écriture et lors d'une éviction (pour tenir compte des autres processus), pas à chaque
+    écriture. La date d'utilisation d'un point est celle de son fichier .json, rafraîchie par
+    get ; records (amorçage de l'optimiseur) la laisse intacte.
+
+    Paramètres :
+        - cache_dir : Répertoire du cache.
+        - max_bytes : Taille maximale du cache sur disque.
+        - store_estimators : Conserver aussi les estimateurs ajustés sur chaque pli.
+    """
+
+    EXTENSIONS = ('.json', '.joblib')
+    # Part de max_bytes visée par une éviction : les écritures suivantes n'en redéclenchent pas
+    EVICTION_TARGET = 0.9
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, store_estimators=False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.store_estimators = store_estimators
+        # (groupe, point) -> [date d'utilisation, taille des fichiers du point], et leur total
+        self._entries = None
+        self._total_bytes = 0
+
+    @staticmethod
+    def group_key(fingerprint, estimator, folds, searched_params):
+        """
+        Clé du groupe : jeu de données, classe de l'estimateur, paramètres fixes (hors espace
+        de recherche) et indices des plis.
+        """
+        estimator_class = f"{type(estimator).__module__}.{type(estimator).__qualname__}"
+        fixed_params = {name: value for name, value in _scoring_params(estimator).items()
+                        if name not in searched_params}
+        fold_hashes = [hashlib.sha256(np.asarray(train, dtype=np.int64).tobytes()
+                                      + np.asarray(test, dtype=np.int64).tobytes()).hexdigest()
+                       for train, test in folds]
+        return _hash({'dataset': fingerprint, 'estimator': estimator_class,
+                      'fixed_params': fixed_params, 'folds': fold_hashes})
+
+    @staticmethod
+    def point_key(estimator):
+        """
+        Clé d'un point : l'ensemble des paramètres de l'estimateur candidat.
+        """
+        return _hash(_scoring_params(estimator))
+
+    def get(self, group, point):
+        """
+        Retourne l'enregistrement d'un point (scores par pli, paramètres), ou None.
+        """
+        record = self._read(group, point)
+        if record is not None:
+            # Mise à jour de la date d'utilisation pour l'éviction LRU
+            now = time.time()
+            try:
+                os.utime(self._path(group, point, '.json'), (now, now))
+            except FileNotFoundError:
+                return record
+            if self._entries is not None and (group, point) in self._entries:
+                self._entries[(group, point)][0] = now
+        return record
+
+    def put(self, group, point, record, estimators=None):
+        """
+        Enregistre un point (et éventuellement ses estimateurs ajustés), puis applique
+        l'éviction si la taille suivie dépasse max_bytes.
+        """
+        os.makedirs(os.path.join(self.cache_dir, group), exist_ok=True)
+        if self.store_estimators and estimators is not None:
+            joblib.dump(estimators, self._path(group, point, '.joblib'))
+
+        # Écriture atomique : un processus concurrent ne lit jamais un fichier partiel
+        path = self._path(group, point, '.json')
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            json.dump(record, file, default=repr)
+        os.replace(temporary_path, path)
+
+        if self._entries is None:
+            self._scan()
+        else:
+            self._track(group, point)
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+
+    def load_estimators(self, group, point):
+        path = self._path(group, point, '.joblib')
+        return joblib.load(path) if os.path.exists(path) else None
+
+    def records(self, group):
+        """
+        Tous les points déjà évalués d'un groupe (pour amorcer l'optimiseur), lus sans
+        modifier leur date d'utilisation.
+        """
+        group_dir = os.path.join(self.cache_dir, group)
+        if not os.path.isdir(group_dir):
+            return []
+        records = []
+        for file_name in sorted(os.listdir(group_dir)):
+            if file_name.endswith('.json'):
+                record = self._read(group, file_name[:-len('.json')])
+                if record is not None:
+                    records.append(record)
+        return records
+
+    def evict(self):
+        """
+        Supprime les points les moins récemment utilisés (tous leurs fichiers) jusqu'à
+        repasser sous EVICTION_TARGET * max_bytes. Le répertoire est relu au préalable : d'autres
+        processus ont pu écrire ou supprimer des points.
+        """
+        self._scan()
+        if self._total_bytes <= self.max_bytes:
+            return
+        target = self.EVICTION_TARGET * self.max_bytes
+        for key, (_, size) in sorted(self._entries.items(), key=lambda item: item[1][0]):
+            if self._total_bytes <= target:
+                break
+            for extension in self.EXTENSIONS:
+                try:
+                    os.remove(self._path(*key, extension))
+                except FileNotFoundError:
+                    pass
+            del self._entries[key]
+            self._total_bytes -= size
+
+    def _read(self, group, point):
+        try:
+            with open(self._path(group, point, '.json'), encoding='utf-8') as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _scan(self):
+        """Reconstruit l'index (date d'utilisation, taille) de tous les points du cache."""
+        self._entries = {}
+        self._total_bytes = 0
+        if not os.path.isdir(self.cache_dir):
+            return
+        for group in os.listdir(self.cache_dir):
+            group_dir = os.path.join(self.cache_dir, group)
+            if not os.path.isdir(group_dir):
+                continue
+            for point in {os.path.splitext(name)[0] for name in os.listdir(group_dir)
+                          if os.path.splitext(name)[1] in self.EXTENSIONS}:
+                self._track(group, point)
+
+    def _track(self, group, point):
+        # Un .joblib orphelin (sans .json) prend sa propre date : il part parmi les premiers
+        last_used, size = 0.0, 0
+        for extension in self.EXTENSIONS:
+            try:
+                stat = os.stat(self._path(group, point, extension))
+            except FileNotFoundError:
+                continue
+            size += stat.st_size
+            if extension == '.json' or not last_used:
+                last_used = stat.st_mtime
+        previous = self._entries.pop((group, point), None)
+        if previous is not None:
+            self._total_bytes -= previous[1]
+        if size:
+            self._entries[(group, point)] = [last_used, size]
+            self._total_bytes += size
+
+    def _path(self, group, point, extension):
+        return os.path.join(self.cache_dir, group, point + extension)
+
+
+def _fit_and_score(estimator, x, y, train, test, scorer, keep_estimator):
+    start = time.perf_counter()
+    estimator.fit(take_rows(x, train), take_rows(y, train))
+    fit_time = time.perf_counter() - start
+    start = time.perf_counter()
+    score = scorer(estimator, take_rows(x, test), take_rows(y, test))
+    # Ne renvoyer l'estimateur au processus principal que s'il doit être mis en cache
+    return estimator if keep_estimator else None, float(score), fit_time, time.perf_counter() - start
+
+
+class CachedBayesSearchCV(AskTellSearchCV):
+    """
+    Recherche bayésienne (skopt.Optimizer) dont chaque évaluation en validation croisée est
+    mise en cache sur disque (cf. CVResultCache).
+
+    Au démarrage, l'optimiseur est amorcé avec les points du cache compatibles (même jeu de
+    données, même estimateur, mêmes plis, dans l'espace de recherche) : ils comptent dans le
+    budget n_iter, de sorte qu'une recherche relancée sans changement ne réévalue rien et
+    qu'après un petit changement seules les nouvelles évaluations sont calculées. Les plis des
+    n_points candidats absents du cache sont évalués ensemble, sur n_jobs processus.
+
+    Même interface que BayesSearchCV pour le pipeline : fit, best_estimator_, best_score_,
+    best_params_, cv_results_ et n_splits_.
+    """
+
+    def __init__(self, estimator, search_spaces, n_iter=30, cv=5, scoring='accuracy', n_jobs=1,
+                 n_points=1, cache=None, n_initial_points=10, random_state=None, verbose=0, refit=True):
+        self.estimator = estimator
+        self.search_spaces = search_spaces
+        self.n_iter = n_iter
+        self.cv = cv
+        self.scoring = scoring
+        self.n_jobs = n_jobs
+        self.n_points = n_points
+        self.cache = cache
+        self.n_initial_points = n_initial_points
+        self.random_state = random_state
+        self.verbose = verbose
+        self.refit = refit
+
+    def _prepare(self, x, y, names, optimizer):
+        cache = self.cache if self.cache is not None else CVResultCache()
+        scorer = get_scorer(self.scoring)
+        folds = list(check_cv(self.cv, y, classifier=is_classifier(self.estimator)).split(x, y))
+        group = cache.group_key(dataset_fingerprint(x, y), self.estimator, folds, names)
+
+        results = []
+        # Amorçage avec les points déjà évalués qui appartiennent à l'espace courant
+        for record in cache.records(group):
+            point = [record['params'].get(name) for name in names]
+            if self._in_space(point, optimizer):
+                results.append(dict(record, cached=True))
+                optimizer.tell(point, -np.mean(record['scores']))
+        if self.verbose:
+            print(f"{len(results)} évaluations reprises du cache")
+
+        def evaluate_batch(batch_params):
+            return self._evaluate(batch_params, x, y, folds, scorer, cache, group)
+        return evaluate_batch, results
+
+    def _evaluate(self, batch_params, x, y, folds, scorer, cache, group):
+        records = [None] * len(batch_params)
+        missing = []
+        for index, params in enumerate(batch_params):
+            candidate = clone(self.estimator).set_params(**params)
+            point = cache.point_key(candidate)
+            record = cache.get(group, point)
+            if record is not None:
+                records[index] = dict(record, cached=True)
+            else:
+                missing.append((index, candidate, point))
+        if not missing:
+            return records
+
+        if self.verbose:
+            print(f"Évaluation de {len(missing)} candidat(s) sur {len(folds)} plis")
+        # Tous les plis de tous les candidats manquants dans un seul lot parallèle
+        outputs = Parallel(n_jobs=self.n_jobs)(
+            delayed(_fit_and_score)(clone(candidate), x, y, train, test, scorer, cache.store_estimators)
+            for _, candidate, _ in missing for train, test in folds
+        )
+        n_folds = len(folds)
+        for position, (index, _, point) in enumerate(missing):
+            estimators, scores, fit_times, score_times = zip(*outputs[position * n_folds:(position + 1) * n_folds])
+            record = {'params': batch_params[index], 'scores': list(scores),
+                      'fit_time': list(fit_times), 'score_time': list(score_times)}
+            cache.put(group, point, record, list(estimators))
+            records[index] = dict(record, cached=False)
+        return records
+
+    @staticmethod
+    def _in_space(point, optimizer):
+        for value, dimension in zip(point, optimizer.space.dimensions):
+            if isinstance(dimension, Categorical):
+                if value not in dimension.categories:
+                    return False
+            elif value is None or not dimension.low <= value <= dimension.high:
+                return False
+        return True
@@ -1,41 +1,186 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
-import seaborn as sns
-from IPython.core.display_functions import display
-from matplotlib import pyplot as plt
-from sklearn.metrics import (ConfusionMatrixDisplay,
-                             accuracy_score,
-                             recall_score,
-                             precision_score,
-                             f1_score,
-                             classification_report)
+from scipy.stats import rankdata
+
+# Matplotlib, seaborn et IPython ne servent qu'au rendu (render_evaluation) : ils sont importés
+# dans les fonctions qui les utilisent, le calcul des métriques n'en dépend pas.
+
+METRIC_COLUMNS = ["Accuracy", "Precision", "Recall", "F1-Score", "ROC-AUC", "Log-Loss"]
+
+
+def confusion_counts(y_true, y_pred):
+    """
+    Matrice de confusion binaire en une passe (np.bincount sur 2 * vrai + prédit).
+
+    Retourne :
+        - Un tableau 2 x 2 : lignes = classes réelles (0, 1), colonnes = classes prédites.
+    """
+    y_true = np.asarray(y_true, dtype=np.int64)
+    y_pred = np.asarray(y_pred, dtype=np.int64)
+    return np.bincount(2 * y_true + y_pred, minlength=4).reshape(2, 2)
+
+
+def _ratio(numerator, denominator):
+    # Comme sklearn (zero_division), un dénominateur nul donne 0
+    return numerator / denominator if denominator else 0.0
+
+
+def metrics_from_confusion(confusion):
+    """
+    Accuracy, précision, rappel et F1 de la classe positive (1), déduits de la matrice de confusion.
+    """
+    (tn, fp), (fn, tp) = confusion
+    precision = _ratio(tp, tp + fp)
+    recall = _ratio(tp, tp + fn)
+    return {
+        "Accuracy": _ratio(tp + tn, confusion.sum()),
+        "Precision": precision,
+        "Recall": recall,
+        "F1-Score": _ratio(2 * tp, 2 * tp + fp + fn),
+    }
+
+
+def roc_auc(y_true, scores):
+    """
+    Aire sous la courbe ROC par les rangs (statistique de Mann-Whitney), sans tri des seuils :
+    probabilité qu'un positif ait un score supérieur à un négatif, ex aequo comptés pour moitié.
+
+    Retourne :
+        - L'AUC, ou NaN si y_true ne contient qu'une classe.
+    """
+    y_true = np.asarray(y_true, dtype=bool)
+    n_positive = int(y_true.sum())
+    n_negative = y_true.size - n_positive
+    if n_positive == 0 or n_negative == 0:
+        return np.nan
+    ranks = rankdata(scores)
+    return (ranks[y_true].sum() - n_positive * (n_positive + 1) / 2) / (n_positive * n_negative)
+
+
+def binary_log_loss(y_true, probabilities):
+    """
+    Entropie croisée moyenne, probabilités de la classe positive bornées à [eps, 1 - eps]
+    (eps de leur type flottant, comme sklearn.metrics.log_loss).
+    """
+    y_true = np.asarray(y_true, dtype=bool)
+    probabilities = np.asarray(probabilities)
+    eps = np.finfo(probabilities.dtype).eps
+    probabilities = np.clip(probabilities, eps, 1 - eps).astype(np.float64)
+    return -np.mean(np.where(y_true, np.log(probabilities), np.log1p(-probabilities)))
+
+
+def evaluate_model(model_name, model, x_test, y_test, policy=None):
+    """
+    Évalue un modèle avec une seule prédiction : predict_proba quand le modèle l'expose (la classe
+    prédite est celle de plus forte probabilité, comme predict), predict sinon.
+
+    Avec une politique de décision (cf. src.thresholds.DecisionPolicy), les probabilités sont
+    recalibrées et la classe prédite est donnée par son seuil.
+
+    Retourne :
+        - Un dict : "Model", les métriques (METRIC_COLUMNS, ROC-AUC et Log-Loss à NaN sans
+          predict_proba) et "Confusion" (matrice 2 x 2).
+    """
+    y_test = np.asarray(y_test)
+    if hasattr(model, 'predict_proba'):
+        probabilities = model.predict_proba(x_test)
+        if policy is None:
+            y_pred = np.asarray(model.classes_).take(probabilities.argmax(axis=1))
+            positive = probabilities[:, 1]
+        else:
+            positive = policy.calibrate(probabilities[:, 1])
+            y_pred = policy.decide(positive)
+        ranking = {"ROC-AUC": roc_auc(y_test, positive), "Log-Loss": binary_log_loss(y_test, positive)}
+    else:
+        y_pred = model.predict(x_test)
+        ranking = {"ROC-AUC": np.nan, "Log-Loss": np.nan}
 
+    confusion = confusion_counts(y_test, y_pred)
+    return {"Model": model_name, **metrics_from_confusion(confusion), **ranking, "Confusion": confusion}
 
-def calculate_metrics(y_test, y_pred):
+
+def compute_metrics(best_models, x_test, y_test, n_jobs=None, policies=None):
     """
-    Calcule les différentes métriques de performance pour un modèle.
+    Évalue tous les modèles en parallèle (threads : les prédictions de sklearn et XGBoost
+    libèrent le GIL et x_test est partagé sans copie).
+
+    Paramètres :
+        - best_models : Dictionnaire {nom: modèle entraîné}.
+        - x_test : Données de test (caractéristiques).
+        - y_test : Cibles de test.
+        - n_jobs : Nombre de threads (None : un par modèle).
+        - policies : Dictionnaire {nom: DecisionPolicy} des modèles à évaluer avec leur
+          calibration et leur seuil (les autres : seuil 0.5).
+
+    Retourne :
+        - Un dict {nom: résultat de evaluate_model}, dans l'ordre de best_models.
     """
-    accuracy = accuracy_score(y_test, y_pred)
-    precision = precision_score(y_test, y_pred)
-    recall = recall_score(y_test, y_pred)
-    f1 = f1_score(y_test, y_pred)
+    policies = policies or {}
+    max_workers = n_jobs or max(1, len(best_models))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {model_name: executor.submit(evaluate_model, model_name, model, x_test, y_test,
+                                               policies.get(model_name))
+                   for model_name, model in best_models.items()}
+        return {model_name: future.result() for model_name, future in futures.items()}
+
 
-    return accuracy, precision, recall, f1
+def results_table(results):
+    """
+    DataFrame des métriques (une ligne par modèle), trié par F1-Score décroissant.
+    """
+    results_df = pd.DataFrame([{key: value for key, value in result.items() if key != "Confusion"}
+                               for result in results.values()])
+    return results_df.sort_values(by="F1-Score", ascending=False)
 
 
-def display_classification_report(y_test, y_pred, model_name):
+def format_classification_report(confusion, digits=2):
+    """
+    Rapport de classification (précision, rappel, F1 et support par classe, moyennes macro et
+    pondérée) déduit de la matrice de confusion, au format de sklearn.metrics.classification_report.
+    """
+    confusion = np.asarray(confusion, dtype=np.float64)
+    true_positive = np.diag(confusion)
+    support = confusion.sum(axis=1)
+    predicted = confusion.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.nan_to_num(true_positive / predicted)
+        recall = np.nan_to_num(true_positive / support)
+        f1 = np.nan_to_num(2 * true_positive / (support + predicted))
+    total = support.sum()
+
+    width = max(len("weighted avg"), digits)
+    header = f"{'':>{width}} {'precision':>9} {'recall':>9} {'f1-score':>9} {'support':>9}"
+    lines = [header, ""]
+    for label in range(2):
+        lines.append(f"{label:>{width}} {precision[label]:>9.{digits}f} {recall[label]:>9.{digits}f} "
+                     f"{f1[label]:>9.{digits}f} {int(support[label]):>9}")
+    lines.append("")
+    lines.append(f"{'accuracy':>{width}} {'':>9} {'':>9} {true_positive.sum() / total:>9.{digits}f} {int(total):>9}")
+    for name, weights in [("macro avg", np.full(2, 0.5)), ("weighted avg", support / total)]:
+        lines.append(f"{name:>{width}} {precision @ weights:>9.{digits}f} {recall @ weights:>9.{digits}f} "
+                     f"{f1 @ weights:>9.{digits}f} {int(total):>9}")
+    return "\n".join(lines)
+
+
+def display_classification_report(confusion, model_name):
     """
     Affiche le rapport de classification pour un modèle.
     """
     print(f"Rapport de classification pour {model_name}:")
-    print(classification_report(y_test, y_pred))
+    print(format_classification_report(confusion))
 
 
-def display_confusion_matrix(model, x_test, y_test, model_name):
+def display_confusion_matrix(confusion, model_name):
     """
-    Affiche la matrice de confusion et ajoute un colorbar si nécessaire.
+    Affiche la matrice de confusion (déjà calculée) et ajoute un colorbar si nécessaire.
     """
-    # Créer la matrice de confusion
-    cm_display = ConfusionMatrixDisplay.from_estimator(model, x_test, y_test)
+    from matplotlib import pyplot as plt
+    from sklearn.metrics import ConfusionMatrixDisplay
+
+    # Créer la matrice de confusion à partir des comptes, sans nouvelle prédiction
+    cm_display = ConfusionMatrixDisplay(confusion_matrix=confusion, display_labels=[0, 1])
 
     # Afficher la matrice de confusion
     cm_display.plot(cmap='Blues', values_format='d')
@@ -51,13 +196,14 @@ def display_confusion_matrix(model, x_test, y_test, model_name):
     # Afficher le graphique
     plt.show()
 
-    
-
 
 def plot_comparison(results_df):
     """
     Crée et affiche un graphique comparatif des performances des modèles.
     """
+    import seaborn as sns
+    from matplotlib import pyplot as plt
+
     # Transformation du DataFrame pour faciliter l'affichage avec seaborn
     melted_results = results_df.melt(id_vars="Model",
                                      var_name="Metric",
@@ -83,55 +229,57 @@ def plot_comparison(results_df):
     plt.show()
 
 
-def evaluate_models(best_models, x_test, y_test):
+def render_evaluation(results, plots=True):
     """
-    Évalue la performance des meilleurs modèles trouvés par GridSearchCV/RandomizedSearchCV
-    sur le jeu de test.
-
-    Args:
-    - best_models: Dictionnaire contenant les meilleurs modèles après l'optimisation.
-    - x_test: Données de test (caractéristiques).
-    - y_test: Cibles de test.
+    Affiche les résultats de compute_metrics : métriques et rapport de classification de chaque
+    modèle, tableau comparatif, puis (plots=True) matrices de confusion et graphique comparatif.
     """
-    # Liste pour stocker les résultats de chaque modèle
-    results = []
-
-    for model_name, model in best_models.items():
-        # Prédictions du modèle sur les données de test
-        y_pred = model.predict(x_test)
-
-        # Calcul des différentes métriques
-        accuracy, precision, recall, f1 = calculate_metrics(y_test, y_pred)
+    from IPython.core.display_functions import display
 
+    for model_name, result in results.items():
         # Affichage des résultats
         print(f"Performance du modèle {model_name}:")
-        print(f"Accuracy: {accuracy:.4f}")
-        print(f"Précision: {precision:.4f}")
-        print(f"Rappel: {recall:.4f}")
-        print(f"F1-Score: {f1:.4f}")
+        print(f"Accuracy: {result['Accuracy']:.4f}")
+        print(f"Précision: {result['Precision']:.4f}")
+        print(f"Rappel: {result['Recall']:.4f}")
+        print(f"F1-Score: {result['F1-Score']:.4f}")
+        print(f"ROC-AUC: {result['ROC-AUC']:.4f}")
+        print(f"Log-Loss: {result['Log-Loss']:.4f}")
 
         # Affichage du rapport de classification
-        display_classification_report(y_test, y_pred, model_name)
-
-        # Stockage des résultats pour chaque modèle
-        results.append({
-            "Model": model_name,
-            "Accuracy": accuracy,
-            "Precision": precision,
-            "Recall": recall,
-            "F1-Score": f1
-        })
+        display_classification_report(result["Confusion"], model_name)
 
-        # Affichage de la matrice de confusion
-        display_confusion_matrix(model, x_test, y_test, model_name)
-
-    # Création d'un DataFrame pour afficher les résultats
-    results_df = pd.DataFrame(results)
-    results_df = results_df.sort_values(by="F1-Score", ascending=False)
+    results_df = results_table(results)
 
     # Affichage des résultats sous forme de tableau
     print("Comparaison des modèles :")
     display(results_df)
 
-    # Affichage du graphique comparatif des performances
-    plot_comparison(results_df)
+    if plots:
+        for model_name, result in results.items():
+            display_confusion_matrix(result["Confusion"], model_name)
+        # Le log-loss n'est pas borné à [0, 1] : il est exclu du graphique comparatif
+        plot_comparison(results_df.drop(columns="Log-Loss"))
+
+
+def evaluate_models(best_models, x_test, y_test, render=True, plots=True, n_jobs=None, policies=None):
+    """
+    Évalue la performance des meilleurs modèles trouvés par GridSearchCV/RandomizedSearchCV
+    sur le jeu de test.
+
+    Paramètres :
+        - best_models : Dictionnaire contenant les meilleurs modèles après l'optimisation.
+        - x_test : Données de test (caractéristiques).
+        - y_test : Cibles de test.
+        - render : Affiche les résultats (cf. render_evaluation) ; False pour un calcul seul.
+        - plots : Avec render, affiche aussi les matrices de confusion et le graphique comparatif.
+        - n_jobs : Nombre de modèles évalués en parallèle (None : tous).
+        - policies : Politiques de décision par modèle (calibration et seuil, cf. compute_metrics).
+
+    Retourne :
+        - Le DataFrame des métriques, trié par F1-Score décroissant.
+    """
+    results = compute_metrics(best_models, x_test, y_test, n_jobs, policies)
+    if render:
+        render_evaluation(results, plots)
+    return results_table(results)
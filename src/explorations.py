@@ -1,110 +1,317 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
 import seaborn as sns
 import missingno as msno
 import matplotlib.pyplot as plt
 
+# Les visualisations sont construites à partir d'agrégats (histogrammes, quantiles, tableaux
+# croisés, sommes pour les corrélations) : leur coût dépend du nombre de classes, pas de lignes.
+DEFAULT_BINS = 50
+# Nombre maximal de points tracés individuellement (outliers, nuages de points, valeurs manquantes)
+MAX_POINTS = 1_000
+SAMPLE_SIZE = 10_000
+CHUNK_SIZE = 100_000
+
+# Processus dédié aux rapports d'exploration en arrière-plan (cf. explore_dataframe_in_background)
+_background_executor = None
+
+
+def show_or_save(output_dir, name):
+    """
+    Affiche la figure courante, ou l'enregistre en PNG dans output_dir si celui-ci est fourni.
+    """
+    if output_dir is None:
+        plt.show()
+        return
+
+    os.makedirs(output_dir, exist_ok=True)
+    file_name = re.sub(r'[^\w.-]+', '_', name) + '.png'
+    plt.savefig(os.path.join(output_dir, file_name), bbox_inches='tight')
+    # Fermer toutes les figures pour ne pas accumuler de mémoire sur un rapport complet
+    plt.close('all')
+
+
+def numeric_columns_of(df_data):
+    """
+    Retourne les colonnes numériques (hors booléens) d'un DataFrame.
+    """
+    return df_data.select_dtypes(include='number').columns
+
+
+def summarize_numeric(values, bins=DEFAULT_BINS, max_fliers=MAX_POINTS, seed=0):
+    """
+    Résume une colonne numérique en une passe vectorisée : histogramme, quantiles et
+    statistiques de boxplot (au format de matplotlib Axes.bxp).
+
+    Paramètres:
+        values (pd.Series ou np.ndarray): Les valeurs à résumer (NaN ignorés).
+        bins (int): Nombre de classes de l'histogramme.
+        max_fliers (int): Nombre maximal d'outliers conservés (échantillonnés au-delà).
+
+    Retourne:
+        dict: 'counts', 'edges', 'count', 'missing' et 'box' (statistiques du boxplot).
+    """
+    values = np.asarray(values, dtype=float)
+    missing = np.isnan(values)
+    values = values[~missing]
+
+    summary = {'count': len(values), 'missing': int(missing.sum())}
+    if len(values) == 0:
+        summary.update(counts=np.zeros(0), edges=np.zeros(0), box=None)
+        return summary
+
+    counts, edges = np.histogram(values, bins=bins)
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    inliers = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    fliers = values[(values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)]
+    if len(fliers) > max_fliers:
+        fliers = np.random.default_rng(seed).choice(fliers, max_fliers, replace=False)
+
+    summary.update(counts=counts, edges=edges, box={
+        'med': median, 'q1': q1, 'q3': q3,
+        'whislo': inliers.min(), 'whishi': inliers.max(),
+        'fliers': fliers, 'label': ''
+    })
+    return summary
+
+
+def smoothed_density(counts, edges, bandwidth_bins=1.5):
+    """
+    Approximation de la KDE à partir de l'histogramme : lissage gaussien des comptes,
+    remis à l'échelle des fréquences. Coût proportionnel au nombre de classes.
+    """
+    radius = int(np.ceil(3 * bandwidth_bins))
+    kernel = np.exp(-0.5 * (np.arange(-radius, radius + 1) / bandwidth_bins) ** 2)
+    kernel /= kernel.sum()
+    centers = (edges[:-1] + edges[1:]) / 2
+    return centers, np.convolve(counts, kernel, mode='same')
+
+
+def streamed_correlation(df_data, chunk_size=CHUNK_SIZE):
+    """
+    Calcule la matrice de corrélation de Pearson (observations complètes par paire, comme
+    DataFrame.corr) en accumulant des sommes par blocs, sans copie complète des données.
+    """
+    columns = numeric_columns_of(df_data)
+    n_cols = len(columns)
+    pair_counts = np.zeros((n_cols, n_cols))
+    sums = np.zeros((n_cols, n_cols))
+    sums_sq = np.zeros((n_cols, n_cols))
+    cross = np.zeros((n_cols, n_cols))
+
+    # Positions des colonnes : chaque bloc est découpé directement, sans sélection préalable
+    positions = df_data.columns.get_indexer(columns)
+    for start in range(0, len(df_data), chunk_size):
+        block = df_data.iloc[start:start + chunk_size, positions].to_numpy(dtype=float)
+        present = ~np.isnan(block)
+        block = np.where(present, block, 0.0)
+        present = present.astype(float)
+        # Pour la paire (i, j), seules les lignes où i et j sont renseignés comptent
+        pair_counts += present.T @ present
+        sums += block.T @ present
+        sums_sq += (block ** 2).T @ present
+        cross += block.T @ block
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        covariance = pair_counts * cross - sums * sums.T
+        variance = (pair_counts * sums_sq - sums ** 2) * (pair_counts * sums_sq - sums ** 2).T
+        correlation = covariance / np.sqrt(variance)
+    return pd.DataFrame(correlation, index=columns, columns=columns)
+
+
+def reservoir_sample(chunks, sample_size=SAMPLE_SIZE, seed=0):
+    """
+    Échantillonnage uniforme de taille fixe sur un flux de DataFrames (algorithme du réservoir),
+    en une seule passe et avec une mémoire bornée par sample_size.
+
+    Paramètres:
+        chunks (pd.DataFrame ou itérable de pd.DataFrame): Les données, éventuellement par blocs.
+        sample_size (int): Taille de l'échantillon.
 
-def visualize_distribution(df_data):
+    Retourne:
+        pd.DataFrame: L'échantillon (toutes les lignes si le flux est plus court).
+    """
+    if isinstance(chunks, pd.DataFrame):
+        df_data = chunks
+        chunks = (df_data.iloc[start:start + CHUNK_SIZE] for start in range(0, len(df_data), CHUNK_SIZE))
+
+    rng = np.random.default_rng(seed)
+    reservoir = None
+    filling = []
+    seen = 0
+    for chunk in chunks:
+        if reservoir is None:
+            # Remplissage : les sample_size premières lignes du flux, sur autant de blocs qu'il faut
+            head = chunk.iloc[:sample_size - seen]
+            filling.append(head)
+            seen += len(head)
+            chunk = chunk.iloc[len(head):]
+            if seen < sample_size:
+                continue
+            reservoir = pd.concat(filling).copy()
+            reservoir_index = reservoir.index.to_numpy().copy()
+            filling = None
+        if chunk.empty:
+            continue
+        # La ligne d'indice global i remplace une case tirée dans [0, i] si celle-ci est < sample_size
+        positions = rng.integers(0, np.arange(seen, seen + len(chunk)) + 1)
+        accepted = positions < sample_size
+        if accepted.any():
+            # En cas de doublons, la dernière affectation l'emporte, comme en séquentiel.
+            # Affectation colonne par colonne pour conserver les types.
+            targets = positions[accepted]
+            for k in range(chunk.shape[1]):
+                reservoir.iloc[targets, k] = chunk.iloc[accepted, k].to_numpy()
+            reservoir_index[targets] = chunk.index[accepted]
+        seen += len(chunk)
+
+    if reservoir is None:
+        # Flux plus court que sample_size : toutes ses lignes
+        return pd.concat(filling) if filling else None
+    reservoir.index = reservoir_index
+    return reservoir
+
+
+def _draw_histogram(ax, summary, column):
+    counts, edges = summary['counts'], summary['edges']
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', alpha=0.6, edgecolor='white')
+    centers, density = smoothed_density(counts, edges)
+    ax.plot(centers, density)
+    ax.set_xlabel(column)
+    ax.set_ylabel("Fréquence")
+
+
+def _draw_boxplot(ax, box_stats, labels=None, vert=False, flierprops=None):
+    if labels is not None:
+        for stats, label in zip(box_stats, labels):
+            stats['label'] = label
+    ax.bxp(box_stats, vert=vert, showfliers=True, flierprops=flierprops)
+
+
+def visualize_distribution(df_data, output_dir=None, bins=DEFAULT_BINS):
     """
     Visualise la distribution des colonnes numériques d'un DataFrame.
-    Affiche un histogramme et un boxplot pour chaque colonne, une figure par colonne.
+    Affiche un histogramme et un boxplot pour chaque colonne, une figure par colonne,
+    construits à partir d'un résumé de la colonne (cf. summarize_numeric).
 
     Paramètres:
         df_data (pd.DataFrame): Le DataFrame contenant les colonnes à visualiser.
+        output_dir (str, optionnel): Répertoire où enregistrer les figures au lieu de les afficher.
+        bins (int): Nombre de classes des histogrammes.
     """
-    numeric_columns = df_data.select_dtypes(include=['float64', 'int64']).columns
+    numeric_columns = numeric_columns_of(df_data)
 
     if len(numeric_columns) == 0:
         print("Aucune colonne numérique trouvée à visualiser.")
         return
 
     for column in numeric_columns:
+        summary = summarize_numeric(df_data[column], bins)
+        if summary['box'] is None:
+            continue
         fig, axes = plt.subplots(1, 2, figsize=(12, 5))
 
-        # Histogram with KDE
-        sns.histplot(df_data[column], ax=axes[0], kde=True)
+        # Histogramme avec densité lissée
+        _draw_histogram(axes[0], summary, column)
         axes[0].set_title(f"Histogramme avec KDE : {column}", fontsize=14)
-        axes[0].set_xlabel(column)
-        axes[0].set_ylabel("Fréquence")
 
         # Boxplot
-        sns.boxplot(x=df_data[column], ax=axes[1], orient='h')
+        _draw_boxplot(axes[1], [summary['box']])
         axes[1].set_title(f"Boxplot : {column}", fontsize=14)
         axes[1].set_xlabel(column)
 
         plt.tight_layout()
-        plt.show()
+        show_or_save(output_dir, f"distribution_{column}")
 
 
-def visualize_categorical_distribution(df_data):
+def visualize_categorical_distribution(df_data, output_dir=None):
     """
-    Visualise la distribution des colonnes catégorielles du DataFrame.
+    Visualise la distribution des colonnes catégorielles du DataFrame, à partir des comptes par modalité.
     """
     categorical_columns = df_data.select_dtypes(include=['object', 'category']).columns
     for column in categorical_columns:
+        counts = df_data[column].value_counts(sort=False)
         plt.figure(figsize=(10, 6))
-        ax = sns.countplot(x=column, data=df_data, hue=column, legend=False, palette="Set2")
+        ax = sns.barplot(x=counts.index.astype(str), y=counts.values,
+                         hue=counts.index.astype(str), legend=False, palette="Set2")
         plt.title(f"Distribution de {column}")
+        plt.xlabel(column)
+        plt.ylabel("count")
         plt.xticks(rotation=45, ha='right')
-        
+
         # Add value labels on top of each bar
         for p in ax.patches:
-            ax.annotate(f'{int(p.get_height())}', 
+            ax.annotate(f'{int(p.get_height())}',
                         (p.get_x() + p.get_width() / 2., p.get_height()),
-                        ha = 'center', va = 'center', 
-                        xytext = (0, 5), textcoords = 'offset points')
-        
+                        ha='center', va='center',
+                        xytext=(0, 5), textcoords='offset points')
+
         plt.tight_layout()
-        plt.show()
+        show_or_save(output_dir, f"categorical_{column}")
+
 
-def visualize_correlations(df_data, target_column=None):
+def visualize_correlations(df_data, target_column=None, output_dir=None):
     """
     Affiche la heatmap des corrélations entre toutes les colonnes numériques.
     Optionnellement, affiche la corrélation avec la colonne cible.
+    La matrice est calculée par blocs (cf. streamed_correlation).
     """
-    numeric_df = df_data.select_dtypes(include=['float64', 'int64'])
+    correlations = streamed_correlation(df_data)
 
     # Corrélations entre toutes les colonnes
     plt.figure(figsize=(12, 8))
-    sns.heatmap(numeric_df.corr(), annot=True, cmap='coolwarm', fmt=".2f", cbar=True)
+    sns.heatmap(correlations, annot=True, cmap='coolwarm', fmt=".2f", cbar=True)
     plt.title('Heatmap des corrélations entre toutes les colonnes numériques')
-    plt.show()
+    show_or_save(output_dir, "correlations")
 
     # Si une colonne cible est spécifiée, afficher les corrélations avec la cible
-    if target_column and target_column in numeric_df.columns:
-        correlation_with_target = numeric_df.corr()[target_column].sort_values(ascending=False)
+    if target_column and target_column in correlations.columns:
+        correlation_with_target = correlations[target_column].sort_values(ascending=False)
         plt.figure(figsize=(6, len(correlation_with_target) * 0.5))
         sns.heatmap(correlation_with_target.to_frame(), annot=True, cmap='coolwarm', fmt=".2f", cbar=True)
         plt.title(f'Heatmap des corrélations avec la cible : {target_column}')
-        plt.show()
-
+        show_or_save(output_dir, f"correlations_{target_column}")
 
 
-def visualize_missing_data(df_data):
+def visualize_missing_data(df_data, output_dir=None, sample_size=MAX_POINTS):
     """
-    Affiche la visualisation des valeurs manquantes pour chaque colonne avec personnalisation.
+    Affiche le taux de valeurs manquantes par colonne, et la matrice de valeurs manquantes
+    sur un échantillon de lignes (dans l'ordre d'origine).
     """
-    # Créer la matrice de valeurs manquantes
-    plt.figure(figsize=(10, 6))
-    msno.matrix(df_data, figsize=(10, 6), sparkline=True, color=(0.8, 0.0, 0.0))  # Personnalisation de la couleur
+    missing_rates = df_data.isna().mean()
 
-    # Ajouter un titre
-    plt.title("Visualisation des valeurs manquantes", fontsize=16)
+    fig, axes = plt.subplots(1, 2, figsize=(16, 6))
+    axes[0].barh(missing_rates.index.astype(str), missing_rates.values, color=(0.8, 0.0, 0.0))
+    axes[0].set_xlabel("Taux de valeurs manquantes")
+    axes[0].set_title("Valeurs manquantes par colonne", fontsize=14)
 
-    # Ajouter une légende
-    plt.legend(title="Présence des données", loc="best", fontsize=12)
+    # Matrice de valeurs manquantes sur un échantillon : le rendu ne dépend pas du nombre de lignes
+    sample = df_data
+    if len(df_data) > sample_size:
+        sample = reservoir_sample(df_data, sample_size).sort_index()
+    msno.matrix(sample, ax=axes[1], sparkline=False, color=(0.8, 0.0, 0.0))  # Personnalisation de la couleur
+    axes[1].set_title("Visualisation des valeurs manquantes", fontsize=16)
 
-    # Afficher le graphique
-    plt.show()
+    show_or_save(output_dir, "missing_data")
 
 
-def visualize_target_correlation(df_data, target_column):
+def visualize_target_correlation(df_data, target_column, output_dir=None, sample_size=SAMPLE_SIZE):
     """
     Visualise les relations entre une variable cible et les autres colonnes
     du DataFrame, en affichant des graphiques adaptés au type de données.
+    Boxplots, comptes et moyennes sont calculés par groupe ; les nuages de points
+    utilisent un échantillon (cf. reservoir_sample).
 
     Paramètres:
         df_data (pd.DataFrame): Le DataFrame contenant les données.
         target_column (str): Le nom de la colonne cible.
+        output_dir (str, optionnel): Répertoire où enregistrer les figures au lieu de les afficher.
+        sample_size (int): Nombre de points des nuages de points.
     """
     if target_column not in df_data.columns:
         print(f"La colonne cible '{target_column}' n'existe pas dans le DataFrame.")
@@ -113,80 +320,120 @@ def visualize_target_correlation(df_data, target_column):
     # Vérifie si la cible est catégorique ou numérique
     is_target_categorical = df_data[target_column].dtype == 'object' or \
                             df_data[target_column].nunique() < 10
+    numeric_columns = numeric_columns_of(df_data)
+    sample = None
 
     for column in df_data.columns:
         if column == target_column:
             continue
 
         plt.figure(figsize=(10, 5))
+        ax = plt.gca()
 
-        if df_data[column].dtype in ['float64', 'int64']:
+        if column in numeric_columns:
             # Si la colonne est numérique
             if is_target_categorical:
-                # Boxplot pour une cible catégorique
-                sns.boxplot(data=df_data, x=target_column, y=column)
+                # Boxplot pour une cible catégorique, une boîte par modalité
+                groups = df_data.groupby(target_column, sort=True, observed=True)[column]
+                box_stats = [summarize_numeric(values)['box'] for _, values in groups]
+                labels = [str(label) for label, _ in groups]
+                valid = [(stats, label) for stats, label in zip(box_stats, labels) if stats is not None]
+                if valid:
+                    _draw_boxplot(ax, [stats for stats, _ in valid], [label for _, label in valid], vert=True)
+                plt.xlabel(target_column)
+                plt.ylabel(column)
                 plt.title(f"Boxplot de {column} par {target_column}")
             else:
-                # Scatterplot pour une cible numérique
-                sns.scatterplot(data=df_data, x=column, y=target_column)
+                # Scatterplot pour une cible numérique, sur un échantillon
+                if sample is None:
+                    sample = reservoir_sample(df_data, sample_size)
+                sns.scatterplot(data=sample, x=column, y=target_column)
                 plt.title(f"Scatterplot entre {column} et {target_column}")
         else:
             # Si la colonne est catégorique
             if is_target_categorical:
-                # Countplot pour une cible catégorique
-                sns.countplot(data=df_data, x=column, hue=target_column)
+                # Countplot pour une cible catégorique, à partir du tableau croisé
+                counts = df_data.groupby([column, target_column], observed=True).size()
+                counts.unstack(fill_value=0).plot.bar(ax=ax)
                 plt.title(f"Répartition de {column} par {target_column}")
             else:
-                # Barplot pour une cible numérique
-                sns.barplot(data=df_data, x=column, y=target_column, ci=None)
+                # Barplot pour une cible numérique, à partir des moyennes par modalité
+                df_data.groupby(column)[target_column].mean().plot.bar(ax=ax)
                 plt.title(f"Moyenne de {target_column} par {column}")
 
         plt.xticks(rotation=45)
         plt.tight_layout()
-        plt.show()
+        show_or_save(output_dir, f"target_{column}")
 
 
-def visualize_outliers(df_data):
+def visualize_outliers(df_data, output_dir=None):
     """
     Visualise les outliers dans les colonnes numériques du DataFrame
-    à l'aide de boxplots.
+    à l'aide de boxplots construits à partir des quantiles.
 
     Paramètres:
         df_data (pd.DataFrame): Le DataFrame contenant les données.
+        output_dir (str, optionnel): Répertoire où enregistrer les figures au lieu de les afficher.
     """
-    numeric_columns = df_data.select_dtypes(include=['float64', 'int64']).columns
+    numeric_columns = numeric_columns_of(df_data)
 
     if len(numeric_columns) == 0:
         print("Aucune colonne numérique trouvée pour l'analyse des outliers.")
         return
 
     for column in numeric_columns:
+        summary = summarize_numeric(df_data[column])
+        if summary['box'] is None:
+            continue
         plt.figure(figsize=(10, 5))
-        sns.boxplot(x=df_data[column], orient='h',
-                    flierprops={"marker": "o", "markerfacecolor": "red", "markersize": 5})
+        _draw_boxplot(plt.gca(), [summary['box']],
+                      flierprops={"marker": "o", "markerfacecolor": "red", "markersize": 5})
         plt.title(f"Détection des outliers pour {column}")
         plt.xlabel(column)
         plt.tight_layout()
-        plt.show()
-
-
+        show_or_save(output_dir, f"outliers_{column}")
 
 
-def explore_dataframe(df_data, target_column):
+def explore_dataframe(df_data, target_column, output_dir=None):
+    """
+    Enchaîne toutes les visualisations d'exploration.
+    Si output_dir est fourni, les figures sont enregistrées sur disque au lieu d'être affichées.
+    """
     # Distribution des variables numériques
-    visualize_distribution(df_data)
+    visualize_distribution(df_data, output_dir)
 
     # Visualisation des variables catégorielles
-    visualize_categorical_distribution(df_data)
+    visualize_categorical_distribution(df_data, output_dir)
 
     # Corrélation entre toutes les variables
-    visualize_correlations(df_data, target_column)
+    visualize_correlations(df_data, target_column, output_dir)
 
     # Visualisation des relations avec la variable cible
-    visualize_target_correlation(df_data, target_column)
+    visualize_target_correlation(df_data, target_column, output_dir)
 
     # Visualisation des valeurs manquantes
-    visualize_missing_data(df_data)
+    visualize_missing_data(df_data, output_dir)
 
     # Identification des outliers
-    visualize_outliers(df_data)
+    visualize_outliers(df_data, output_dir)
+
+
+def _explore_to_disk(df_data, target_column, output_dir):
+    # Backend non interactif : le processus d'arrière-plan n'a pas d'écran
+    plt.switch_backend('Agg')
+    explore_dataframe(df_data, target_column, output_dir)
+    return output_dir
+
+
+def explore_dataframe_in_background(df_data, target_column, output_dir):
+    """
+    Lance explore_dataframe dans un processus d'arrière-plan qui enregistre le rapport
+    dans output_dir, sans bloquer l'entraînement ni le scoring.
+
+    Retourne :
+        - Un Future résolu avec output_dir lorsque le rapport est écrit.
+    """
+    global _background_executor
+    if _background_executor is None:
+        _background_executor = ProcessPoolExecutor(max_workers=1)
+    return _background_executor.submit(_explore_to_disk, df_data, target_column, output_dir)
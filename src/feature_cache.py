@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import shutil
+
+import joblib
+import numpy as np
+
+from src.monitoring import DRIFT_MONITOR_NAME
+
+# Emplacement par défaut du cache des matrices de caractéristiques prétraitées
+FEATURE_CACHE_DIR = ".cache/features"
+# À incrémenter à chaque changement du prétraitement qui modifie les matrices produites, ou
+# du contenu des entrées
+FEATURE_CACHE_VERSION = 2
+
+PREPROCESSOR_NAME = "preprocessor.joblib"
+METADATA_NAME = "metadata.json"
+
+
+def file_digest(path, block_size=1 << 20):
+    """
+    Empreinte SHA-256 du contenu d'un fichier, lu par blocs.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def feature_cache_key(data_path, config):
+    """
+    Clé du cache : contenu du fichier d'entrée, configuration du prétraitement et version.
+    """
+    payload = {'data': file_digest(data_path), 'config': config, 'version': FEATURE_CACHE_VERSION}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class FeatureMatrixCache:
+    """
+    Cache disque des matrices prétraitées : un fichier .npy contigu par tableau, rouvert en
+    lecture seule par np.load(mmap_mode='r').
+
+    Les tableaux ne sont donc lus qu'à la demande et partagés par le cache de pages du système :
+    les processus de joblib (n_jobs) reçoivent une référence au fichier au lieu d'une copie
+    (cf. share pour les autres pools de processus).
+
+    Paramètres :
+        - cache_dir : Répertoire du cache.
+    """
+
+    def __init__(self, cache_dir=FEATURE_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def load(self, key):
+        """
+        Retourne (tableaux mappés, métadonnées, prétraitement, référence de dérive ou None)
+        pour key, ou None.
+        """
+        entry_dir = os.path.join(self.cache_dir, key)
+        try:
+            with open(os.path.join(entry_dir, METADATA_NAME), encoding='utf-8') as file:
+                metadata = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        arrays = {name: np.load(os.path.join(entry_dir, f"{name}.npy"), mmap_mode='r')
+                  for name in metadata['arrays']}
+        preprocessor = joblib.load(os.path.join(entry_dir, PREPROCESSOR_NAME))
+        drift_monitor_path = os.path.join(entry_dir, DRIFT_MONITOR_NAME)
+        drift_monitor = joblib.load(drift_monitor_path) if os.path.exists(drift_monitor_path) else None
+        return arrays, metadata, preprocessor, drift_monitor
+
+    def save(self, key, arrays, metadata, preprocessor, drift_monitor=None):
+        """
+        Écrit les tableaux (contigus), les métadonnées, le prétraitement et la référence de dérive
+        des lignes d'entraînement (cf. src.monitoring.DriftMonitor) sous key.
+        L'entrée est écrite dans un répertoire temporaire puis renommée : une entrée
+        visible est toujours complète.
+        """
+        entry_dir = os.path.join(self.cache_dir, key)
+        temporary_dir = f"{entry_dir}.{os.getpid()}.tmp"
+        os.makedirs(temporary_dir, exist_ok=True)
+
+        for name, array in arrays.items():
+            np.save(os.path.join(temporary_dir, f"{name}.npy"), np.ascontiguousarray(array))
+        joblib.dump(preprocessor, os.path.join(temporary_dir, PREPROCESSOR_NAME))
+        if drift_monitor is not None:
+            joblib.dump(drift_monitor, os.path.join(temporary_dir, DRIFT_MONITOR_NAME))
+        with open(os.path.join(temporary_dir, METADATA_NAME), 'w', encoding='utf-8') as file:
+            json.dump(dict(metadata, arrays=list(arrays)), file, indent=2)
+
+        try:
+            os.replace(temporary_dir, entry_dir)
+        except OSError:
+            # Entrée déjà écrite par un autre processus avec la même clé
+            shutil.rmtree(temporary_dir, ignore_errors=True)
+
+
+class SharedArray:
+    """
+    Référence sérialisable vers un tableau .npy du cache : le processus qui la reçoit le rouvre
+    en mémoire mappée au lieu de recevoir une copie des données.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def open(self):
+        return np.load(self.path, mmap_mode='r')
+
+
+def share(array):
+    """
+    Remplace un tableau ouvert depuis le cache (fichier .npy entier) par une SharedArray,
+    à transmettre à un pool de processus ; tout autre objet est retourné tel quel.
+    """
+    if isinstance(array, np.memmap) and array.filename is not None:
+        reopened = np.load(array.filename, mmap_mode='r')
+        if reopened.shape == array.shape and reopened.offset == array.offset:
+            return SharedArray(array.filename)
+    return array
+
+
+def unshare(value):
+    """Inverse de share, côté processus de travail."""
+    return value.open() if isinstance(value, SharedArray) else value
@@ -0,0 +1,167 @@
+import os
+import time
+
+import numpy as np
+import xgboost as xgb
+from joblib import Parallel, delayed
+from sklearn.base import clone, is_classifier
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import check_cv
+from xgboost import XGBClassifier
+
+from src.bayes_search import AskTellSearchCV, take_rows
+from src.evaluations import binary_log_loss, roc_auc
+
+# Scores calculables directement depuis les probabilités du booster (chemin XGBoost)
+PROBABILITY_SCORERS = {
+    'accuracy': lambda y, proba: float(np.mean((proba > 0.5) == y)),
+    'roc_auc': lambda y, proba: float(roc_auc(y, proba)),
+    'neg_log_loss': lambda y, proba: -float(binary_log_loss(y, proba)),
+}
+
+
+def preferred_dtype(estimator):
+    """
+    Type flottant dans lequel l'estimateur travaille : float32 pour les ensembles d'arbres
+    (scikit-learn et XGBoost convertissent leurs entrées en float32), float64 sinon
+    (liblinear, lbfgs, arbres de voisins).
+    """
+    return np.float32 if isinstance(estimator, (RandomForestClassifier, ExtraTreesClassifier, xgb.XGBModel)) else np.float64
+
+
+class FoldData:
+    """
+    Un pli de validation croisée, découpé une seule fois : tableaux contigus dans le type de
+    l'estimateur (ce qu'il convertirait lui-même à chaque ajustement) et, pour XGBoost,
+    matrice d'entraînement quantifiée (QuantileDMatrix) construite au premier besoin.
+    """
+
+    def __init__(self, x, y, train, test, dtype=np.float32):
+        self.x_train = np.ascontiguousarray(take_rows(x, train), dtype=dtype)
+        self.y_train = np.ascontiguousarray(take_rows(y, train))
+        self.x_test = np.ascontiguousarray(take_rows(x, test), dtype=dtype)
+        self.y_test = np.ascontiguousarray(take_rows(y, test))
+        self._quantile_matrices = {}
+
+    def quantile_matrix(self, max_bin, labels):
+        """QuantileDMatrix de l'entraînement (étiquettes encodées 0..n-1), une par max_bin."""
+        matrix = self._quantile_matrices.get(max_bin)
+        if matrix is None:
+            matrix = xgb.QuantileDMatrix(self.x_train, labels, max_bin=max_bin)
+            self._quantile_matrices[max_bin] = matrix
+        return matrix
+
+
+def _fit_and_score_fold(estimator, fold, scorer):
+    start = time.perf_counter()
+    estimator.fit(fold.x_train, fold.y_train)
+    fit_time = time.perf_counter() - start
+    start = time.perf_counter()
+    score = scorer(estimator, fold.x_test, fold.y_test)
+    return float(score), fit_time, time.perf_counter() - start
+
+
+class FoldBayesSearchCV(AskTellSearchCV):
+    """
+    Recherche bayésienne (skopt.Optimizer) dont les plis sont préparés une seule fois pour
+    tous les candidats (cf. FoldData) : chaque candidat ne paie plus que son ajustement.
+
+    Pour XGBoost (classification binaire), la QuantileDMatrix de chaque pli est construite
+    une fois (une par max_bin) et chaque candidat est entraîné par xgb.train sur cette matrice,
+    puis scoré par inplace_predict : mêmes arbres que XGBClassifier.fit, sans recalculer les
+    quantiles ni copier les données. Les autres estimateurs (dont la forêt aléatoire, qui n'a
+    pas de représentation binée dans scikit-learn) reçoivent les tableaux contigus du pli.
+
+    Les n_points candidats d'une itération sont évalués ensemble : tous leurs plis dans un même
+    lot de n_jobs processus, ou, pour XGBoost, un thread par candidat qui se partagent les cœurs.
+
+    Même interface que BayesSearchCV pour le pipeline : fit, best_estimator_, best_score_,
+    best_params_, cv_results_ et n_splits_.
+    """
+
+    def __init__(self, estimator, search_spaces, n_iter=30, cv=5, scoring='accuracy', n_jobs=1,
+                 n_points=1, n_initial_points=10, random_state=None, verbose=0, refit=True):
+        self.estimator = estimator
+        self.search_spaces = search_spaces
+        self.n_iter = n_iter
+        self.cv = cv
+        self.scoring = scoring
+        self.n_jobs = n_jobs
+        self.n_points = n_points
+        self.n_initial_points = n_initial_points
+        self.random_state = random_state
+        self.verbose = verbose
+        self.refit = refit
+
+    def _prepare(self, x, y, names, optimizer):
+        splitter = check_cv(self.cv, y, classifier=is_classifier(self.estimator))
+        dtype = preferred_dtype(self.estimator)
+        folds = [FoldData(x, y, train, test, dtype) for train, test in splitter.split(x, y)]
+        self.classes_ = np.unique(np.asarray(y))
+        booster_path = (isinstance(self.estimator, XGBClassifier) and len(self.classes_) == 2
+                        and self.scoring in PROBABILITY_SCORERS)
+        if self.verbose:
+            path = "QuantileDMatrix par pli" if booster_path else "tableaux contigus par pli"
+            print(f"{len(folds)} plis préparés ({path})")
+
+        def evaluate_batch(batch_params):
+            candidates = [clone(self.estimator).set_params(**params) for params in batch_params]
+            if booster_path:
+                records = self._evaluate_boosters(candidates, folds)
+            else:
+                records = self._evaluate(candidates, folds)
+            return [dict(record, params=params) for record, params in zip(records, batch_params)]
+        return evaluate_batch, []
+
+    def _evaluate(self, candidates, folds):
+        scorer = get_scorer(self.scoring)
+        # Tous les plis de tous les candidats dans un seul lot parallèle
+        outputs = Parallel(n_jobs=self.n_jobs)(
+            delayed(_fit_and_score_fold)(clone(candidate), fold, scorer)
+            for candidate in candidates for fold in folds
+        )
+        n_folds = len(folds)
+        records = []
+        for position in range(len(candidates)):
+            scores, fit_times, score_times = zip(*outputs[position * n_folds:(position + 1) * n_folds])
+            records.append({'scores': list(scores), 'fit_time': list(fit_times), 'score_time': list(score_times)})
+        return records
+
+    def _evaluate_boosters(self, candidates, folds):
+        cores = self.n_jobs if self.n_jobs and self.n_jobs > 0 else os.cpu_count()
+        threads = max(1, cores // len(candidates))
+        params = [candidate.get_xgb_params() for candidate in candidates]
+        for candidate_params in params:
+            # Les cœurs sont partagés entre les candidats du lot, chacun sur ses threads XGBoost
+            if candidate_params.get('n_jobs') is None:
+                candidate_params['n_jobs'] = threads
+        # Matrices quantifiées construites avant le lot : les threads ne font que les lire
+        for fold in folds:
+            labels = np.searchsorted(self.classes_, fold.y_train)
+            for candidate_params in params:
+                fold.quantile_matrix(candidate_params.get('max_bin') or 256, labels)
+
+        if len(candidates) == 1:
+            return [self._evaluate_booster(params[0], candidates[0].get_num_boosting_rounds(), folds)]
+        # xgb.train libère le GIL : des threads suffisent, sans copier les plis
+        return Parallel(n_jobs=len(candidates), prefer='threads')(
+            delayed(self._evaluate_booster)(candidate_params, candidate.get_num_boosting_rounds(), folds)
+            for candidate_params, candidate in zip(params, candidates)
+        )
+
+    def _evaluate_booster(self, params, num_boost_round, folds):
+        max_bin = params.get('max_bin') or 256
+        score = PROBABILITY_SCORERS[self.scoring]
+
+        scores, fit_times, score_times = [], [], []
+        for fold in folds:
+            labels = np.searchsorted(self.classes_, fold.y_train)
+            start = time.perf_counter()
+            booster = xgb.train(params, fold.quantile_matrix(max_bin, labels), num_boost_round=num_boost_round)
+            fit_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            probabilities = booster.inplace_predict(fold.x_test)
+            scores.append(score(np.searchsorted(self.classes_, fold.y_test), probabilities))
+            score_times.append(time.perf_counter() - start)
+        return {'scores': scores, 'fit_time': fit_times, 'score_time': score_times}
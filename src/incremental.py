@@ -0,0 +1,372 @@
+import copy
+import json
+import os
+import shutil
+from collections import Counter
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+from sklearn.base import clone
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from xgboost import XGBClassifier
+
+from src.evaluations import evaluate_model
+from src.main_pipeline import export_native_model, save_best_model
+from src.monitoring import DRIFT_MONITOR_NAME, DriftMonitor
+from src.scoring import FEATURE_SCHEMA_NAME, NATIVE_MODEL_NAME
+from src.preprocessing import _with_object_categories
+from src.thresholds import DECISION_POLICY_NAME
+
+# Répertoire des versions du modèle, sous le répertoire des modèles
+VERSIONS_DIR = "versions"
+# Fichier contenant le nom de la version en production
+CURRENT_NAME = "CURRENT"
+
+MODEL_NAME = "model.joblib"
+PREPROCESSOR_NAME = "preprocessor.joblib"
+STATS_NAME = "stats.joblib"
+METADATA_NAME = "metadata.json"
+# Artefacts facultatifs d'une version, recopiés à côté des artefacts de scoring à la promotion
+VERSION_ARTEFACTS = (DECISION_POLICY_NAME, DRIFT_MONITOR_NAME)
+# Export natif (score.py --native, serveur), propre aux versions XGBoost
+NATIVE_ARTEFACTS = (NATIVE_MODEL_NAME, FEATURE_SCHEMA_NAME)
+
+
+class OnlinePreprocessorStats:
+    """
+    Statistiques d'imputation d'un LoanPreprocessor mises à jour lot par lot : somme et effectif
+    des valeurs présentes de chaque colonne numérique (moyenne), effectif de chaque modalité des
+    colonnes catégorielles (mode).
+
+    Les vocabulaires, correspondances binaires et colonnes one-hot restent figés : le modèle
+    reçoit toujours les mêmes caractéristiques, seules les valeurs d'imputation évoluent.
+
+    Paramètres :
+        - preprocessor : LoanPreprocessor ajusté.
+    """
+
+    def __init__(self, preprocessor):
+        self.categorical_columns = list(preprocessor.binary_mappings_) + list(preprocessor.label_vocabularies_)
+        self.numeric_columns = [col for col in preprocessor.feature_columns_ if col not in self.categorical_columns]
+        self.sums = dict.fromkeys(self.numeric_columns, 0.0)
+        self.counts = dict.fromkeys(self.numeric_columns, 0)
+        self.category_counts = {col: Counter() for col in self.categorical_columns}
+        self.rows_seen = 0
+
+    @classmethod
+    def from_features(cls, preprocessor, x):
+        """
+        Initialise les statistiques depuis une matrice déjà encodée (ex. x_train de
+        prepare_features), les codes catégoriels étant ramenés aux modalités d'origine.
+        Les valeurs imputées comptent comme des observations : les moyennes n'en sont pas
+        modifiées.
+        """
+        stats = cls(preprocessor)
+        x = np.asarray(x, dtype=np.float64)
+        for j, col in enumerate(preprocessor.feature_columns_):
+            values = x[:, j]
+            present = values[~np.isnan(values)]
+            if col in stats.sums:
+                stats.sums[col] += float(present.sum())
+                stats.counts[col] += int(present.size)
+                continue
+            mapping = preprocessor.binary_mappings_.get(col) or preprocessor.label_vocabularies_[col]
+            decode = {code: str(value) for value, code in mapping.items()}
+            codes, counts = np.unique(present.astype(np.int64), return_counts=True)
+            stats.category_counts[col].update({decode[code]: int(count) for code, count in zip(codes, counts)})
+        stats.rows_seen += len(x)
+        return stats
+
+    def update(self, preprocessor, df):
+        """
+        Ajoute un lot de lignes brutes (colonnes sélectionnées, cible facultative) aux statistiques.
+        """
+        df = _with_object_categories(df)
+        # Mêmes étapes que LoanPreprocessor.transform avant l'imputation, sans remplir 'Dependents'
+        df['Dependents'] = df['Dependents'].replace('3+', 3)
+        df = preprocessor._one_hot(df).reindex(columns=preprocessor.feature_columns_)
+
+        for col in self.numeric_columns:
+            values = df[col].astype(float)
+            self.sums[col] += float(values.sum())
+            self.counts[col] += int(values.count())
+        for col in self.categorical_columns:
+            self.category_counts[col].update(df[col].dropna().astype(str).value_counts().to_dict())
+        self.rows_seen += len(df)
+        return self
+
+    def apply(self, preprocessor):
+        """
+        Retourne une copie de preprocessor dont les valeurs d'imputation (moyennes, modes et mode
+        de 'Dependents') sont celles des statistiques courantes.
+        """
+        updated = copy.deepcopy(preprocessor)
+        for col in self.numeric_columns:
+            if self.counts[col]:
+                updated.fill_values_[col] = self.sums[col] / self.counts[col]
+        for col, counts in self.category_counts.items():
+            if counts:
+                # Ex aequo départagés par ordre de tri, comme pandas.Series.mode
+                updated.fill_values_[col] = min(counts, key=lambda value: (-counts[value], value))
+        if self.category_counts.get('Dependents'):
+            updated.dependents_mode_ = updated.fill_values_['Dependents']
+        updated._build_plans()
+        return updated
+
+
+def continue_boosting(model, x, y, n_rounds=20):
+    """
+    Ajoute n_rounds arbres au booster de model, ajustés sur le nouveau lot (x, y) à partir des
+    marges du modèle existant (xgb_model). model n'est pas modifié.
+
+    Retourne :
+        - Un nouveau XGBClassifier (arbres existants + n_rounds).
+    """
+    params = dict(model.get_params(), n_estimators=n_rounds)
+    return XGBClassifier(**params).fit(x, y, xgb_model=model.get_booster())
+
+
+def warm_start_logistic(model, x, y, max_iter=100):
+    """
+    Réajuste une régression logistique sur (x, y) en partant de ses coefficients actuels
+    (warm_start) : quelques itérations suffisent quand les données n'ont que peu changé.
+    liblinear ne sait pas repartir d'une solution : il est remplacé par saga (pénalité l1)
+    ou lbfgs (l2), qui optimisent le même objectif.
+
+    Retourne :
+        - Une nouvelle LogisticRegression ; model n'est pas modifié.
+    """
+    updated = clone(model).set_params(warm_start=True, max_iter=max_iter)
+    if model.solver == 'liblinear':
+        updated.set_params(solver='saga' if model.penalty == 'l1' else 'lbfgs')
+    updated.coef_ = model.coef_.copy()
+    updated.intercept_ = model.intercept_.copy()
+    return updated.fit(x, y)
+
+
+def update_model(model, x_new, y_new, x_all=None, y_all=None, n_rounds=20):
+    """
+    Met à jour un modèle avec un nouveau lot étiqueté, sans recherche d'hyperparamètres :
+        - XGBoost : boosting continué sur le nouveau lot (continue_boosting) ;
+        - modèles à partial_fit (ex. SGDClassifier(loss='log_loss')) : partial_fit sur le
+          nouveau lot, sur une copie du modèle ;
+        - Pipeline dont le dernier étage a partial_fit (ex. train_large.py --model sgd) : le lot
+          passe par les étages précédents, figés, puis partial_fit du dernier ;
+        - régression logistique : warm start sur toutes les données accumulées
+          (x_all, y_all, nouveau lot compris).
+
+    Retourne :
+        - Le modèle mis à jour (nouvel objet).
+    """
+    if isinstance(model, XGBClassifier):
+        return continue_boosting(model, x_new, y_new, n_rounds)
+    if isinstance(model, Pipeline) and hasattr(model[-1], 'partial_fit'):
+        updated = copy.deepcopy(model)
+        updated[-1].partial_fit(updated[:-1].transform(x_new), y_new)
+        return updated
+    if hasattr(model, 'partial_fit'):
+        updated = copy.deepcopy(model)
+        updated.partial_fit(x_new, y_new)
+        return updated
+    if isinstance(model, LogisticRegression):
+        if x_all is None or y_all is None:
+            raise ValueError("La régression logistique se met à jour sur toutes les données accumulées "
+                             "(x_all, y_all).")
+        return warm_start_logistic(model, x_all, y_all)
+    raise TypeError(f"Pas de mise à jour incrémentale pour {type(model).__name__} : "
+                    "relancer l'entraînement complet (main.py).")
+
+
+class ModelRegistry:
+    """
+    Versions successives du modèle de production : chaque version est un répertoire
+    versions/v0001, versions/v0002… (modèle, prétraitement, statistiques en ligne,
+    métadonnées et, s'il y en a, politique de décision et référence de dérive du modèle), le
+    fichier CURRENT désigne la version en production.
+
+    Promouvoir une version réécrit aussi les artefacts lus par score.py et le serveur
+    (save_best_model, export_native_model, politique de décision et surveillance de dérive,
+    supprimées si la version n'en a pas ; la fenêtre de surveillance repart de zéro) : revenir en
+    arrière revient à promouvoir une version antérieure.
+
+    Paramètres :
+        - model_dir : Répertoire des modèles.
+    """
+
+    def __init__(self, model_dir='models'):
+        self.model_dir = model_dir
+        self.versions_dir = os.path.join(model_dir, VERSIONS_DIR)
+
+    def list_versions(self):
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(name for name in os.listdir(self.versions_dir) if name.startswith('v') and name[1:].isdigit())
+
+    def current_version(self):
+        """Nom de la version en production, ou None."""
+        try:
+            with open(os.path.join(self.model_dir, CURRENT_NAME), encoding='utf-8') as file:
+                return file.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def load(self, version=None):
+        """
+        Retourne (modèle, prétraitement, statistiques, métadonnées) de version (par défaut, la
+        version en production).
+        """
+        version = version or self.current_version()
+        if version is None:
+            raise FileNotFoundError(f"Aucune version de modèle dans '{self.model_dir}' : lancer main.py.")
+        version_dir = os.path.join(self.versions_dir, version)
+        return (joblib.load(os.path.join(version_dir, MODEL_NAME)),
+                joblib.load(os.path.join(version_dir, PREPROCESSOR_NAME)),
+                joblib.load(os.path.join(version_dir, STATS_NAME)),
+                self.read_metadata(version))
+
+    def read_metadata(self, version):
+        """Métadonnées de version, sans charger le modèle."""
+        with open(os.path.join(self.versions_dir, version, METADATA_NAME), encoding='utf-8') as file:
+            return json.load(file)
+
+    def load_monitor(self, version=None):
+        """DriftMonitor de version (par défaut, la version en production), ou None."""
+        version = version or self.current_version()
+        return DriftMonitor.load(os.path.join(self.versions_dir, version)) if version else None
+
+    def publish(self, model, preprocessor, stats, metadata, policy=None, monitor=None, promote=True):
+        """
+        Enregistre une nouvelle version (écrite dans un répertoire temporaire puis renommée)
+        et, si promote, la met en production.
+
+        Paramètres :
+            - policy : DecisionPolicy ajustée pour ce modèle (cf. src.thresholds), ou None :
+              le scoring revient alors au seuil 0.5 sans calibration.
+            - monitor : DriftMonitor dont la référence est l'entraînement de ce modèle, ou None.
+
+        Retourne :
+            - Le nom de la version.
+        """
+        versions = self.list_versions()
+        version = f"v{int(versions[-1][1:]) + 1 if versions else 1:04d}"
+        metadata = dict(metadata, version=version, parent=self.current_version(),
+                        created=datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                        rows_seen=stats.rows_seen, decision_policy=policy is not None)
+
+        version_dir = os.path.join(self.versions_dir, version)
+        temporary_dir = f"{version_dir}.{os.getpid()}.tmp"
+        os.makedirs(temporary_dir, exist_ok=True)
+        joblib.dump(model, os.path.join(temporary_dir, MODEL_NAME))
+        joblib.dump(preprocessor, os.path.join(temporary_dir, PREPROCESSOR_NAME))
+        joblib.dump(stats, os.path.join(temporary_dir, STATS_NAME))
+        with open(os.path.join(temporary_dir, METADATA_NAME), 'w', encoding='utf-8') as file:
+            json.dump(metadata, file, indent=2, default=float)
+        if policy is not None:
+            with open(os.path.join(temporary_dir, DECISION_POLICY_NAME), 'w', encoding='utf-8') as file:
+                json.dump(policy.to_dict(), file, indent=2, default=float)
+        if monitor is not None:
+            monitor.save(temporary_dir)
+        try:
+            os.rename(temporary_dir, version_dir)
+        except OSError:
+            shutil.rmtree(temporary_dir, ignore_errors=True)
+            raise
+        print(f"Version '{version}' enregistrée dans '{version_dir}'.")
+
+        if promote:
+            self.promote(version)
+        return version
+
+    def promote(self, version):
+        """
+        Met version en production : artefacts de scoring réécrits (ceux que la version n'a pas
+        sont supprimés, pour ne jamais appliquer ceux d'une autre version), puis CURRENT mis à jour.
+        Une version autre que XGBoost n'a pas d'export natif : --native échoue alors au chargement
+        au lieu de scorer avec le booster d'une version précédente.
+        """
+        model, preprocessor, _, _ = self.load(version)
+        save_best_model(model, self.model_dir, preprocessor=preprocessor)
+        if isinstance(model, XGBClassifier):
+            export_native_model(model, preprocessor, self.model_dir)
+        else:
+            for name in NATIVE_ARTEFACTS:
+                self._remove_stale(name, version)
+        for name in VERSION_ARTEFACTS:
+            source = os.path.join(self.versions_dir, version, name)
+            path = os.path.join(self.model_dir, name)
+            if os.path.exists(source):
+                shutil.copyfile(source, f"{path}.tmp")
+                os.replace(f"{path}.tmp", path)
+            else:
+                self._remove_stale(name, version)
+
+        current_path = os.path.join(self.model_dir, CURRENT_NAME)
+        with open(f"{current_path}.tmp", 'w', encoding='utf-8') as file:
+            file.write(version)
+        os.replace(f"{current_path}.tmp", current_path)
+        print(f"Version '{version}' en production.")
+
+    def _remove_stale(self, name, version):
+        path = os.path.join(self.model_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+            print(f"'{path}' supprimé : la version '{version}' n'en a pas.")
+
+
+def incremental_update(registry, new_data, target, n_rounds=20):
+    """
+    Met à jour le modèle de production avec un lot de lignes brutes étiquetées : statistiques
+    d'imputation, évaluation du modèle courant sur le lot (avant mise à jour), boosting continué,
+    puis publication d'une nouvelle version.
+
+    La politique de décision de la version courante n'est pas reconduite : calibrée sur les
+    probabilités de l'ancien modèle, elle ne vaut plus pour le modèle mis à jour. La nouvelle
+    version est scorée au seuil 0.5 jusqu'au prochain entraînement complet. La référence de
+    dérive, elle, est reconduite et complétée par le lot, sur lequel le modèle vient d'apprendre.
+
+    Paramètres :
+        - registry : ModelRegistry du répertoire des modèles.
+        - new_data : DataFrame brut (cible + caractéristiques sélectionnées) ; les lignes sans
+          cible sont ignorées.
+        - target : Nom de la colonne cible.
+        - n_rounds : Arbres ajoutés au booster XGBoost.
+
+    Retourne :
+        - Le nom de la nouvelle version.
+    """
+    model, preprocessor, stats, metadata = registry.load()
+
+    labelled = new_data[new_data[target].notna()]
+    y_new = preprocessor.transform_target(labelled[target])
+    known = y_new.notna().to_numpy()
+    if not known.all():
+        print(f"{int((~known).sum())} ligne(s) ignorée(s) : cible inconnue du prétraitement.")
+    labelled, y_new = labelled[known], y_new[known].astype(int).to_numpy()
+    if len(np.unique(y_new)) < 2:
+        raise ValueError("Le lot doit contenir les deux classes de la cible : accumuler plus de lignes.")
+
+    monitor = registry.load_monitor(metadata['version'])
+    if monitor is not None:
+        monitor.update_reference(labelled)
+    stats.update(preprocessor, labelled)
+    preprocessor = stats.apply(preprocessor)
+    x_new = preprocessor.transform_array(labelled)
+
+    # Évaluation « prequential » : le modèle courant sur des lignes qu'il n'a jamais vues
+    before = evaluate_model(metadata['version'], model, x_new, y_new)
+    print(f"Modèle {metadata['version']} sur le nouveau lot ({len(y_new)} lignes) : "
+          f"accuracy {before['Accuracy']:.4f}, F1 {before['F1-Score']:.4f}, ROC-AUC {before['ROC-AUC']:.4f}")
+
+    model = update_model(model, x_new, y_new, n_rounds=n_rounds)
+    if metadata.get('decision_policy'):
+        print("Politique de décision non reconduite (calibrée pour le modèle précédent) : "
+              "seuil 0.5 jusqu'au prochain entraînement complet.")
+    return registry.publish(model, preprocessor, stats,
+                            {'mode': 'incremental',
+                             'new_rows': len(y_new),
+                             'n_rounds': n_rounds,
+                             'previous_model_on_batch': {key: before[key] for key in
+                                                         ['Accuracy', 'F1-Score', 'ROC-AUC', 'Log-Loss']}},
+                            monitor=monitor)
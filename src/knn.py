@@ -0,0 +1,207 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.neighbors import BallTree, KDTree
+from sklearn.utils.validation import check_is_fitted
+
+# Index et résultats de requêtes gardés en mémoire (par processus), les moins récemment
+# utilisés étant évincés : pendant une recherche, les mêmes plis reviennent à chaque candidat.
+MAX_CACHED_INDEXES = 8
+MAX_CACHED_QUERIES = 16
+# Au-delà, les résultats d'une requête ne sont pas gardés (scoring de gros portefeuilles)
+MAX_CACHED_QUERY_ROWS = 50_000
+
+TREES = {'kd_tree': KDTree, 'ball_tree': BallTree}
+
+
+class _LRUCache:
+    """Dictionnaire borné, partagé entre threads, qui évince l'entrée la moins récemment utilisée."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_index_cache = _LRUCache(MAX_CACHED_INDEXES)
+_query_cache = _LRUCache(MAX_CACHED_QUERIES)
+
+
+def array_digest(*arrays):
+    """
+    Empreinte du contenu, de la forme et du type de tableaux numpy.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.shape}{array.dtype}".encode('ascii'))
+        digest.update(array.view(np.uint8).reshape(-1))
+    return digest.hexdigest()
+
+
+def clear_caches():
+    """Vide les caches d'index et de requêtes du processus."""
+    _index_cache.clear()
+    _query_cache.clear()
+
+
+class _NeighborIndex:
+    """
+    Arbre (KDTree ou BallTree) construit sur les caractéristiques centrées-réduites d'un jeu
+    d'entraînement, avec la moyenne et l'écart type qui servent à réduire les requêtes.
+    """
+
+    def __init__(self, x, scale, algorithm, leaf_size):
+        x = np.asarray(x, dtype=np.float64)
+        if scale:
+            self.mean = x.mean(axis=0)
+            std = x.std(axis=0)
+            # Colonne constante : laissée telle quelle
+            self.scale = np.where(std > 0, std, 1.0)
+        else:
+            self.mean = np.zeros(x.shape[1])
+            self.scale = np.ones(x.shape[1])
+        self.tree = TREES[algorithm]((x - self.mean) / self.scale, leaf_size=leaf_size)
+        self.n_samples = len(x)
+
+    def query(self, x, k):
+        return self.tree.query((np.asarray(x, dtype=np.float64) - self.mean) / self.scale, k=k)
+
+
+class IndexedKNeighborsClassifier(ClassifierMixin, BaseEstimator):
+    """
+    Équivalent de KNeighborsClassifier (mêmes n_neighbors et weights) dont l'index de voisins est
+    construit une fois par jeu d'entraînement et partagé entre les candidats d'une recherche.
+
+    L'index est un KDTree (ou un BallTree) sur les caractéristiques centrées-réduites (revenus
+    et montants n'écrasent plus les autres colonnes). Avec une douzaine de colonnes, le KDTree
+    répond environ 4 fois plus vite que le BallTree : c'est aussi le choix de
+    KNeighborsClassifier(algorithm='auto'). Il est mis en cache par empreinte des données : les
+    candidats d'une recherche, qui ne diffèrent que par n_neighbors / weights, réutilisent
+    l'index de chaque pli. Les requêtes demandent max_neighbors voisins et sont elles aussi
+    mises en cache : un candidat ne fait que tronquer au n_neighbors voulu.
+
+    Au scoring, les requêtes sont traitées par lots de batch_size lignes, ce qui borne la
+    mémoire des tableaux distances / indices.
+
+    Paramètres :
+        - n_neighbors : Nombre de voisins votants.
+        - weights : 'uniform' ou 'distance' (inverse de la distance).
+        - max_neighbors : Voisins demandés à chaque requête (borne haute de l'espace de recherche).
+        - scale : Centrer-réduire les caractéristiques avant l'indexation.
+        - algorithm : 'kd_tree' ou 'ball_tree'.
+        - leaf_size : Taille des feuilles de l'arbre.
+        - batch_size : Lignes par requête au scoring.
+    """
+
+    def __init__(self, n_neighbors=5, weights='uniform', max_neighbors=30, scale=True, algorithm='kd_tree',
+                 leaf_size=40, batch_size=4096):
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+        self.max_neighbors = max_neighbors
+        self.scale = scale
+        self.algorithm = algorithm
+        self.leaf_size = leaf_size
+        self.batch_size = batch_size
+
+    def fit(self, x, y):
+        """
+        Indexe (x, y), ou reprend l'index du cache si ces données ont déjà été indexées.
+        """
+        if self.weights not in ('uniform', 'distance'):
+            raise ValueError(f"weights inconnu : {self.weights} (attendu : 'uniform' ou 'distance')")
+        if self.algorithm not in TREES:
+            raise ValueError(f"algorithm inconnu : {self.algorithm} (attendu : {list(TREES)})")
+        x = np.asarray(x, dtype=np.float64)
+        self.classes_, y_encoded = np.unique(np.asarray(y), return_inverse=True)
+        self.n_features_in_ = x.shape[1]
+
+        self.index_key_ = f"{array_digest(x)}:{self.scale}:{self.algorithm}:{self.leaf_size}"
+        index = _index_cache.get(self.index_key_)
+        if index is None:
+            index = _NeighborIndex(x, self.scale, self.algorithm, self.leaf_size)
+            _index_cache.put(self.index_key_, index)
+        self.index_ = index
+        self._y = y_encoded
+        return self
+
+    def kneighbors(self, x, cache=True):
+        """
+        Distances et indices des plus proches voisins, triés par distance croissante.
+
+        Avec cache (recherche d'hyperparamètres), k = max(n_neighbors, max_neighbors) et le
+        résultat est gardé pour les candidats suivants ; sinon (scoring), k = n_neighbors.
+        k est borné par la taille du jeu d'entraînement.
+        """
+        check_is_fitted(self, 'index_')
+        k = max(self.n_neighbors, self.max_neighbors) if cache else self.n_neighbors
+        k = min(k, self.index_.n_samples)
+        x = np.asarray(x, dtype=np.float64)
+        if not cache:
+            return self.index_.query(x, k)
+
+        query_key = f"{self.index_key_}:{array_digest(x)}:{k}"
+        result = _query_cache.get(query_key)
+        if result is None:
+            result = self.index_.query(x, k)
+            _query_cache.put(query_key, result)
+        return result
+
+    def predict_proba(self, x):
+        """
+        Probabilité de chaque classe : vote (pondéré si weights='distance') des n_neighbors
+        plus proches voisins, calculé par lots de batch_size lignes. Les requêtes ne sont
+        mises en cache que jusqu'à MAX_CACHED_QUERY_ROWS lignes.
+        """
+        check_is_fitted(self, 'index_')
+        x = np.asarray(x, dtype=np.float64)
+        cache = len(x) <= MAX_CACHED_QUERY_ROWS
+        probabilities = np.empty((len(x), len(self.classes_)))
+        for start in range(0, len(x), self.batch_size):
+            distances, indices = self.kneighbors(x[start:start + self.batch_size], cache)
+            probabilities[start:start + self.batch_size] = self._vote(distances, indices)
+        return probabilities
+
+    def predict(self, x):
+        return self.classes_.take(self.predict_proba(x).argmax(axis=1))
+
+    def _vote(self, distances, indices):
+        distances = distances[:, :self.n_neighbors]
+        labels = self._y[indices[:, :self.n_neighbors]]
+        if self.weights == 'uniform':
+            weights = np.ones_like(distances)
+        else:
+            # Comme sklearn : un voisin à distance nulle emporte tout le poids de sa ligne
+            with np.errstate(divide='ignore'):
+                weights = 1.0 / distances
+            exact = np.isinf(weights)
+            exact_rows = exact.any(axis=1)
+            weights[exact_rows] = exact[exact_rows]
+
+        # Somme des poids par (ligne, classe) en un seul bincount
+        n_classes = len(self.classes_)
+        cells = (np.arange(len(labels))[:, None] * n_classes + labels).ravel()
+        votes = np.bincount(cells, weights=weights.ravel(), minlength=len(labels) * n_classes)
+        votes = votes.reshape(len(labels), n_classes)
+        return votes / votes.sum(axis=1, keepdims=True)
@@ -1,63 +1,289 @@
+import json
 import os
 import joblib
-from IPython.core.display_functions import display
-from sklearn.model_selection import train_test_split
+import numpy as np
+import pandas as pd
 from src.csv import get_data_from_csv
-from src.explorations import explore_dataframe
-from src.preprocessing import split_train_predict, clean_loan_data, split_target_features, \
-    transform_categorical_to_numeric
+from src.feature_cache import FEATURE_CACHE_DIR, FeatureMatrixCache, feature_cache_key
+from src.monitoring import DriftMonitor
+# Les dépendances lourdes (IPython, scikit-learn, matplotlib/seaborn via src.explorations) sont
+# importées dans les fonctions qui les utilisent : charger un modèle (load_best_model) pour
+# scorer ne doit pas payer leur temps d'import.
+from src.preprocessing import split_train_predict, split_target_features, LoanPreprocessor
+from src.profiling import count_rows, stage, traced
+from src.scoring import FEATURE_SCHEMA_NAME, NATIVE_MODEL_NAME
 
 
-def prepare_data(csv_path, target, selected_features, column_id):
+# Modes d'exploration de prepare_data :
+# - 'inline' : figures affichées pendant la préparation (comportement historique)
+# - 'background' : rapport enregistré sur disque par un processus d'arrière-plan
+# - 'off' : aucune exploration (mode production)
+EXPLORATION_MODES = ('inline', 'background', 'off')
+
+# Rapports d'exploration lancés en arrière-plan et pas encore attendus (cf. wait_for_background_reports)
+_background_reports = []
+
+
+@traced()
+def explore(df_data, target, exploration_mode, output_dir):
+    """
+    Lance l'exploration d'un DataFrame selon le mode choisi.
+
+    Retourne :
+        - En mode 'background', le Future du rapport (son échec est signalé dès qu'il se
+          produit) ; None sinon.
+    """
+    if exploration_mode not in EXPLORATION_MODES:
+        raise ValueError(f"Mode d'exploration inconnu : {exploration_mode} (attendu : {EXPLORATION_MODES})")
+    if exploration_mode == 'off':
+        return
+
+    from src.explorations import explore_dataframe, explore_dataframe_in_background
+    if exploration_mode == 'inline':
+        explore_dataframe(df_data, target)
+    elif exploration_mode == 'background':
+        future = explore_dataframe_in_background(df_data, target, output_dir)
+        future.add_done_callback(_report_background_exploration)
+        _background_reports.append(future)
+        print(f"Rapport d'exploration en cours d'écriture dans '{output_dir}'.")
+        return future
+
+
+def _report_background_exploration(future):
+    error = future.exception()
+    if error is not None:
+        print(f"Échec du rapport d'exploration en arrière-plan : {error!r}")
+    else:
+        print(f"Rapport d'exploration écrit dans '{future.result()}'.")
+
+
+def wait_for_background_reports():
+    """
+    Attend la fin des rapports d'exploration lancés en arrière-plan.
+
+    Retourne :
+        - Le nombre de rapports en échec (déjà signalés par _report_background_exploration).
+    """
+    failures = 0
+    while _background_reports:
+        future = _background_reports.pop()
+        failures += future.exception() is not None
+    return failures
+
+
+@traced()
+def prepare_data(csv_path, target, selected_features, column_id, exploration_mode='inline', report_dir='reports',
+                 return_raw=False):
     """
     Charge et prépare les données pour l'entraînement et la prédiction.
+
+    exploration_mode ('inline', 'background' ou 'off') contrôle l'exploration des données ;
+    en mode 'background', les rapports sont écrits dans report_dir. Avec return_raw, les lignes
+    d'entraînement brutes (même index que train_data) sont retournées en quatrième position.
     """
-    df_data = get_data_from_csv(csv_path, target, selected_features, column_id)
-    explore_dataframe(df_data, target)
+    with stage('get_data_from_csv') as stage_args:
+        df_data = get_data_from_csv(csv_path, target, selected_features, column_id)
+        stage_args['rows'] = count_rows(df_data)
+    explore(df_data, target, exploration_mode, os.path.join(report_dir, 'raw_data'))
     train_data, predict_data = split_train_predict(df_data, target)
+    raw_train_data = train_data
+
+    # Prétraitement ajusté une seule fois, sur les données d'entraînement uniquement
+    with stage('LoanPreprocessor.fit', rows=len(train_data)):
+        preprocessor = LoanPreprocessor(target).fit(train_data)
+
+    # Appliquer le même prétraitement figé aux deux ensembles de données (entraînement et prédiction)
+    with stage('LoanPreprocessor.transform', rows=len(train_data) + len(predict_data)):
+        train_target = preprocessor.transform_target(train_data[target])
+        predict_target = predict_data[target]
+        train_data = preprocessor.transform(train_data)
+        predict_data = preprocessor.transform(predict_data)
+    train_data.insert(0, target, train_target)
+    predict_data.insert(0, target, predict_target)
+
+    explore(train_data, target, exploration_mode, os.path.join(report_dir, 'train_data'))
+
+    if return_raw:
+        return train_data, predict_data, preprocessor, raw_train_data
+    return train_data, predict_data, preprocessor
+
+
+@traced()
+def prepare_features(csv_path, target, selected_features, column_id, exploration_mode='inline',
+                     report_dir='reports', cache_dir=FEATURE_CACHE_DIR, test_size=0.3, random_state=42):
+    """
+    prepare_data puis split_and_train_data, avec les matrices obtenues mises en cache sur disque
+    (cf. src.feature_cache) : tant que le fichier d'entrée et la configuration ne changent pas,
+    le prétraitement n'est pas recalculé et les matrices sont ouvertes en mémoire mappée.
 
-    # Nettoyage des données
-    train_data = clean_loan_data(train_data)
-    predict_data = clean_loan_data(predict_data)
+    La référence de la surveillance de dérive (DriftMonitor) est construite sur les lignes brutes
+    de x_train seulement (ni l'ensemble de test, ni les lignes à prédire) et mise en cache avec
+    les matrices.
 
-    # Appliquer la transformation catégorique sur les deux ensembles de données (entraînement et prédiction)
-    train_data, label_encoders = transform_categorical_to_numeric(train_data)
-    predict_data, _ = transform_categorical_to_numeric(predict_data, label_encoders)
+    Paramètres :
+        - cache_dir : Répertoire du cache (None : pas de cache). Sur une entrée reprise du cache,
+          l'exploration (exploration_mode) est tout de même faite, cf. explore_cached_features.
+        - test_size, random_state : Paramètres de la séparation entraînement / test.
 
-    explore_dataframe(train_data, target)
+    Retourne :
+        - x_train, x_test, y_train, y_test : Tableaux numpy (float32 contigus pour les caractéristiques).
+        - predict_data : DataFrame des lignes à prédire (cible vide + caractéristiques).
+        - preprocessor : LoanPreprocessor ajusté.
+        - drift_monitor : DriftMonitor dont la référence est x_train, avant prétraitement.
+    """
+    config = {'target': target, 'selected_features': selected_features, 'column_id': column_id,
+              'test_size': test_size, 'random_state': random_state}
+    cache = FeatureMatrixCache(cache_dir) if cache_dir is not None else None
+    key = feature_cache_key(csv_path, config) if cache is not None else None
 
+    cached = cache.load(key) if cache is not None else None
+    if cached is not None:
+        print(f"Matrices prétraitées reprises du cache '{os.path.join(cache_dir, key)}'.")
+        arrays, _, preprocessor, drift_monitor = cached
+        # L'exploration ne dépend pas du cache : mêmes rapports qu'à froid
+        explore_cached_features(csv_path, target, selected_features, column_id, arrays, preprocessor,
+                                exploration_mode, report_dir)
+    else:
+        train_data, predict_data, preprocessor, raw_train_data = prepare_data(
+            csv_path, target, selected_features, column_id, exploration_mode, report_dir, return_raw=True)
+        x_train, x_test, y_train, y_test = split_and_train_data(train_data, target, test_size, random_state)
+        # Profils des demandes brutes d'entraînement, valeurs manquantes comprises
+        with stage('DriftMonitor.from_reference', rows=len(x_train)):
+            drift_monitor = DriftMonitor.from_reference(raw_train_data.loc[x_train.index, selected_features])
+        del raw_train_data
+        arrays = {'x_train': x_train.to_numpy(dtype=np.float32),
+                  'x_test': x_test.to_numpy(dtype=np.float32),
+                  'y_train': y_train.to_numpy(),
+                  'y_test': y_test.to_numpy(),
+                  'x_predict': predict_data[preprocessor.feature_columns_].to_numpy(dtype=np.float32)}
+        if cache is not None:
+            cache.save(key, arrays, {'config': config, 'feature_columns': preprocessor.feature_columns_},
+                       preprocessor, drift_monitor)
+            # Rouvrir depuis le disque : l'entraînement travaille sur les fichiers mappés
+            arrays = cache.load(key)[0]
 
+    # DataFrame construit sur la matrice mappée, sans copie
+    predict_data = pd.DataFrame(arrays['x_predict'], columns=preprocessor.feature_columns_, copy=False)
+    predict_data.insert(0, target, np.nan)
+    return (arrays['x_train'], arrays['x_test'], arrays['y_train'], arrays['y_test'], predict_data, preprocessor,
+            drift_monitor)
 
-    return train_data, predict_data, label_encoders
 
+def explore_cached_features(csv_path, target, selected_features, column_id, arrays, preprocessor,
+                            exploration_mode, report_dir):
+    """
+    Exploration d'une exécution dont les matrices viennent du cache : mêmes rapports que
+    prepare_data, les données brutes étant relues (seulement si exploration_mode n'est pas
+    'off') et les données d'entraînement prétraitées reconstruites depuis les matrices.
+    """
+    if exploration_mode == 'off':
+        return
+    df_data = get_data_from_csv(csv_path, target, selected_features, column_id)
+    if df_data is not None:
+        explore(df_data, target, exploration_mode, os.path.join(report_dir, 'raw_data'))
+    # Mêmes lignes que dans prepare_data, dans l'ordre de la séparation entraînement / test
+    train_data = pd.DataFrame(np.concatenate([arrays['x_train'], arrays['x_test']]),
+                              columns=preprocessor.feature_columns_).astype(float)
+    train_data.insert(0, target, np.concatenate([arrays['y_train'], arrays['y_test']]))
+    explore(train_data, target, exploration_mode, os.path.join(report_dir, 'train_data'))
 
 
-def split_and_train_data(train_data, target):
+@traced()
+def split_and_train_data(train_data, target, test_size=0.3, random_state=42):
     """
     Sépare les données d'entraînement en X (features) et y (target) et les divise en ensembles d'entraînement et de test.
     """
+    from sklearn.model_selection import train_test_split
+
     x, y = split_target_features(train_data, target)
-    x_train, x_test, y_train, y_test = train_test_split(x, y, test_size=0.3, random_state=42)
+    x_train, x_test, y_train, y_test = train_test_split(x, y, test_size=test_size, random_state=random_state)
     return x_train, x_test, y_train, y_test
 
 
-def save_best_model(best_model, model_dir, model_name="xgboost_best_model.joblib"):
+@traced()
+def save_best_model(best_model, model_dir, model_name="xgboost_best_model.joblib",
+                    preprocessor=None, preprocessor_name="preprocessor.joblib"):
     """
-    Sauvegarde le modèle entraîné dans un fichier joblib.
+    Sauvegarde le modèle entraîné dans un fichier joblib, et le prétraitement ajusté à côté.
     """
     os.makedirs(model_dir, exist_ok=True)
     model_path = os.path.join(model_dir, model_name)
     joblib.dump(best_model, model_path)
     print(f"Le meilleur modèle a été sauvegardé sous '{model_path}'.")
+
+    if preprocessor is not None:
+        preprocessor_path = os.path.join(model_dir, preprocessor_name)
+        joblib.dump(preprocessor, preprocessor_path)
+        print(f"Le prétraitement a été sauvegardé sous '{preprocessor_path}'.")
     return model_path
 
 
-def predict_and_save(best_model, predict_data, selected_features, data_dir):
+@traced()
+def load_best_model(model_dir, model_name="xgboost_best_model.joblib", preprocessor_name="preprocessor.joblib"):
+    """
+    Recharge le modèle et le prétraitement sauvegardés par save_best_model.
+    """
+    best_model = joblib.load(os.path.join(model_dir, model_name))
+    return best_model, load_preprocessor(model_dir, preprocessor_name)
+
+
+@traced()
+def load_preprocessor(model_dir, preprocessor_name="preprocessor.joblib"):
+    """
+    Recharge uniquement le prétraitement (ex. avec le booster natif de export_native_model).
+    """
+    return joblib.load(os.path.join(model_dir, preprocessor_name))
+
+
+@traced()
+def export_native_model(best_model, preprocessor, model_dir,
+                        model_name=NATIVE_MODEL_NAME, schema_name=FEATURE_SCHEMA_NAME):
+    """
+    Exporte le booster XGBoost au format natif (UBJSON, ou JSON selon l'extension) et le schéma
+    figé des caractéristiques, pour un chargement sans sklearn ni désérialisation pickle
+    (cf. src.scoring.NativeBoosterModel).
+    """
+    os.makedirs(model_dir, exist_ok=True)
+    booster = best_model.get_booster()
+    model_path = os.path.join(model_dir, model_name)
+    booster.save_model(model_path)
+
+    schema = {
+        'feature_names': list(preprocessor.feature_columns_),
+        'feature_dtype': 'float32',
+        'target': preprocessor.target,
+        'target_mapping': {str(value): code for value, code in preprocessor.target_mapping_.items()},
+        'objective': json.loads(booster.save_config())['learner']['objective']['name'],
+    }
+    schema_path = os.path.join(model_dir, schema_name)
+    with open(schema_path, 'w', encoding='utf-8') as file:
+        json.dump(schema, file, indent=2)
+
+    print(f"Le booster natif a été exporté sous '{model_path}' (schéma : '{schema_path}').")
+    return model_path
+
+
+@traced()
+def predict_and_save(best_model, predict_data, selected_features, data_dir, policy=None, probability_mode=False):
     """
     Effectue des prédictions avec le modèle et sauvegarde les résultats.
+
+    Avec une politique de décision (cf. src.thresholds.DecisionPolicy), les décisions suivent
+    son seuil sur les probabilités calibrées ; probability_mode ajoute ces probabilités
+    (colonne 'Probability').
     """
-    x_predict = predict_data[selected_features]
-    predictions = best_model.predict(x_predict)
+    from IPython.core.display_functions import display
+
+    # Même nature d'entrée qu'à l'entraînement (matrices float32 de prepare_features)
+    x_predict = predict_data[selected_features].to_numpy(dtype=np.float32)
+    if policy is None and not probability_mode:
+        predictions = best_model.predict(x_predict)
+    else:
+        probabilities = (policy.probabilities(best_model, x_predict) if policy is not None
+                         else best_model.predict_proba(x_predict)[:, 1])
+        predictions = policy.decide(probabilities) if policy is not None else (probabilities > 0.5).astype(int)
+        if probability_mode:
+            predict_data['Probability'] = probabilities
     predict_data['Predictions'] = predictions
     os.makedirs(data_dir, exist_ok=True)
     csv_path = os.path.join(data_dir, 'loan_predictions.csv')
@@ -1,14 +1,15 @@
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.linear_model import LogisticRegression
-from sklearn.neighbors import KNeighborsClassifier
 from xgboost import XGBClassifier
 
+from src.knn import IndexedKNeighborsClassifier
+
 
 def get_models():
     """Retourne un dictionnaire des modèles à tester."""
     return {
         "Logistic Regression": LogisticRegression(),
-        "K-Nearest Neighbors": KNeighborsClassifier(),
+        "K-Nearest Neighbors": IndexedKNeighborsClassifier(),  # index partagé entre candidats (src.knn)
         "Random Forest": RandomForestClassifier(),
         "XGBoost": XGBClassifier()  # Importation de la bibliothèque SVM pour SVM
     }
@@ -0,0 +1,371 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Surveillance des distributions d'entrée au scoring : ne dépend que de numpy / pandas / joblib,
+# comme le reste du chemin de scoring (cf. score.py).
+
+DRIFT_MONITOR_NAME = "drift_monitor.joblib"
+# Classes des histogrammes de référence (quantiles de l'entraînement)
+DEFAULT_BINS = 10
+# Nombre de centroïdes du sketch de quantiles : environ compression / 2 au plus
+DEFAULT_COMPRESSION = 200
+# Proportion plancher d'une classe vide dans le PSI (évite log(0))
+PSI_EPSILON = 1e-4
+# Seuils usuels : PSI < 0.1 stable, 0.1 à 0.25 dérive modérée, > 0.25 dérive forte
+PSI_WARNING = 0.1
+PSI_ALERT = 0.25
+KS_ALERT = 0.1
+# Hausse absolue du taux de valeurs manquantes déclenchant une alerte
+MISSING_TOLERANCE = 0.05
+
+
+class QuantileSketch:
+    """
+    Résumé fusionnable d'une distribution numérique, dans l'esprit d'un t-digest : centroïdes
+    (moyenne, poids) triés, plus fins aux extrémités qu'au centre (fonction d'échelle
+    k(q) = compression / (2π) · asin(2q - 1)), ce qui garde les queues précises.
+
+    Un centroïde qui ne contient qu'une valeur distincte est une masse ponctuelle exacte : la
+    fonction de répartition y fait un saut au lieu d'interpoler entre centroïdes, ce qui garde
+    exactes les colonnes à quelques valeurs (durée du prêt, historique de crédit).
+
+    Ajouter un lot ou fusionner un autre sketch revient à trier les centroïdes existants avec
+    les nouvelles valeurs puis à les regrouper en une passe vectorisée : le coût dépend de la
+    taille du lot et de compression, jamais des lots précédents.
+
+    Paramètres :
+        - compression : Finesse du résumé (nombre de centroïdes d'environ compression / 2).
+    """
+
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.exact = np.empty(0, dtype=bool)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def update(self, values):
+        """Ajoute des valeurs (les NaN sont ignorés)."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size:
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+            self._compress(np.r_[self.means, values], np.r_[self.weights, np.ones(values.size)],
+                           np.r_[self.exact, np.ones(values.size, dtype=bool)])
+        return self
+
+    def merge(self, other):
+        """Ajoute les centroïdes d'un autre sketch (ex. d'un autre lot ou d'un autre processus)."""
+        if other.weights.size:
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._compress(np.r_[self.means, other.means], np.r_[self.weights, other.weights],
+                           np.r_[self.exact, other.exact])
+        return self
+
+    def _compress(self, means, weights, exact):
+        order = np.argsort(means, kind='mergesort')
+        means, weights, exact = means[order], weights[order], exact[order]
+        # Valeurs égales d'abord réunies : une masse ponctuelle (ex. 0 ou 360) n'est jamais
+        # mélangée à ses voisines, et les moyennes des centroïdes sont strictement croissantes
+        starts = np.r_[0, np.flatnonzero(np.diff(means)) + 1]
+        means, weights, exact = means[starts], np.add.reduceat(weights, starts), np.logical_and.reduceat(exact, starts)
+
+        cumulative = np.cumsum(weights)
+        # Rang relatif du centre de chaque valeur, puis numéro de l'unité de k(q) qui le contient
+        q = (cumulative - weights / 2) / cumulative[-1]
+        clusters = np.floor(self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)).astype(np.int64)
+        labels = np.cumsum(np.r_[True, np.diff(clusters) != 0]) - 1
+        self.weights = np.bincount(labels, weights=weights)
+        self.means = np.bincount(labels, weights=weights * means) / self.weights
+        # Exact : centroïde formé d'une seule valeur distincte, elle-même exacte
+        self.exact = (np.bincount(labels) == 1) & (np.bincount(labels, weights=~exact) == 0)
+
+    def _anchors(self):
+        """
+        Points (valeur, poids cumulé) de la fonction de répartition, interpolée linéairement
+        entre eux : le centre de chaque centroïde approché, un saut (de juste avant la valeur à
+        la valeur) pour chaque masse ponctuelle, et le minimum et le maximum observés.
+        """
+        before = np.cumsum(self.weights) - self.weights
+        values = np.where(self.exact, np.nextafter(self.means, -np.inf), self.means)
+        after = np.where(self.exact, self.means, np.nan)
+        positions = np.where(self.exact, before, before + self.weights / 2)
+        values = np.c_[values, after].ravel()
+        positions = np.c_[positions, before + self.weights].ravel()
+        keep = ~np.isnan(values)
+        values, positions = values[keep], positions[keep]
+        if not self.exact[0]:
+            values, positions = np.r_[self.min, values], np.r_[0.0, positions]
+        if not self.exact[-1]:
+            values, positions = np.r_[values, self.max], np.r_[positions, self.count]
+        return values, positions
+
+    def quantile(self, q):
+        """Quantile(s) approché(s) d'ordre q (entre 0 et 1), NaN si le sketch est vide."""
+        if not self.weights.size:
+            return np.full(np.shape(q), np.nan)
+        values, positions = self._anchors()
+        return np.interp(np.asarray(q) * self.count, positions, values)
+
+    def cdf(self, x):
+        """Fonction de répartition approchée en x (continue à droite aux masses ponctuelles)."""
+        if not self.weights.size:
+            return np.full(np.shape(x), np.nan)
+        values, positions = self._anchors()
+        return np.interp(x, values, positions) / self.count
+
+
+class FeatureProfile:
+    """
+    Statistiques fusionnables d'une colonne sur un ensemble de lignes : effectif, valeurs
+    manquantes et, selon le type, histogramme sur des bornes fixées + sketch de quantiles
+    (numérique) ou effectif de chaque modalité (catégorielle).
+    """
+
+    def __init__(self, kind, edges=None, compression=DEFAULT_COMPRESSION):
+        self.kind = kind
+        self.rows = 0
+        self.missing = 0
+        if kind == 'numeric':
+            self.edges = np.asarray(edges, dtype=np.float64)
+            self.histogram = np.zeros(len(self.edges) + 1, dtype=np.int64)
+            self.sketch = QuantileSketch(compression)
+        else:
+            self.categories = pd.Series(dtype=np.int64)
+
+    @property
+    def missing_rate(self):
+        return self.missing / self.rows if self.rows else np.nan
+
+    def update(self, values):
+        """Ajoute une colonne d'un lot (Series) : un passage vectorisé par statistique."""
+        self.rows += len(values)
+        if self.kind == 'numeric':
+            values = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            present = values[~np.isnan(values)]
+            self.missing += values.size - present.size
+            # Classe i : edges[i-1] <= x < edges[i] (classes ouvertes aux deux extrémités)
+            self.histogram += np.bincount(np.searchsorted(self.edges, present, side='right'),
+                                          minlength=self.histogram.size)
+            self.sketch.update(present)
+        else:
+            present = values.dropna()
+            self.missing += len(values) - len(present)
+            counts = present.astype(str).value_counts()
+            self.categories = self.categories.add(counts, fill_value=0).astype(np.int64)
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.missing += other.missing
+        if self.kind == 'numeric':
+            self.histogram += other.histogram
+            self.sketch.merge(other.sketch)
+        else:
+            self.categories = self.categories.add(other.categories, fill_value=0).astype(np.int64)
+        return self
+
+    def empty_like(self):
+        """Profil vide sur les mêmes bornes (fenêtre courante à comparer à la référence)."""
+        if self.kind == 'numeric':
+            return FeatureProfile('numeric', self.edges, self.sketch.compression)
+        return FeatureProfile('categorical')
+
+
+def population_stability_index(reference_counts, current_counts, epsilon=PSI_EPSILON):
+    """
+    PSI entre deux répartitions sur les mêmes classes : Σ (p_cur - p_ref) · ln(p_cur / p_ref),
+    les proportions nulles étant ramenées à epsilon.
+    """
+    reference = np.asarray(reference_counts, dtype=np.float64)
+    current = np.asarray(current_counts, dtype=np.float64)
+    if reference.sum() == 0 or current.sum() == 0:
+        return np.nan
+    reference = np.maximum(reference / reference.sum(), epsilon)
+    current = np.maximum(current / current.sum(), epsilon)
+    return float(np.sum((current - reference) * np.log(current / reference)))
+
+
+def sketch_ks_statistic(reference, current):
+    """
+    Statistique de Kolmogorov-Smirnov approchée : plus grand écart entre les fonctions de
+    répartition des deux sketches, évaluées en tous leurs points d'interpolation (dont les deux
+    côtés de chaque masse ponctuelle).
+    """
+    if not reference.weights.size or not current.weights.size:
+        return np.nan
+    points = np.union1d(reference._anchors()[0], current._anchors()[0])
+    return float(np.max(np.abs(reference.cdf(points) - current.cdf(points))))
+
+
+class DriftMonitor:
+    """
+    Surveillance de la dérive et de la qualité des données d'entrée, mise à jour lot par lot.
+
+    La référence (profils de chaque colonne sur les lignes d'entraînement du modèle) est
+    construite par from_reference, ou par from_sample puis update_reference bloc par bloc, et
+    publiée avec chaque version du modèle (src.incremental.ModelRegistry). Chaque lot scoré est
+    ajouté à la fenêtre courante en O(taille du lot),
+    sans jamais relire l'historique. drift_report compare la fenêtre à la référence : PSI sur
+    les classes de référence (déciles de l'entraînement pour les colonnes numériques, modalités
+    pour les catégorielles), KS sur les sketches de quantiles et taux de valeurs manquantes.
+
+    Les profils sont fusionnables : les fenêtres de plusieurs processus ou de plusieurs
+    exécutions se combinent par merge.
+
+    Paramètres :
+        - reference : Dict colonne -> FeatureProfile de référence.
+    """
+
+    def __init__(self, reference):
+        self.reference = reference
+        self.reset()
+
+    @classmethod
+    def from_reference(cls, df, columns=None, categorical_columns=None, n_bins=DEFAULT_BINS,
+                       compression=DEFAULT_COMPRESSION):
+        """
+        Construit la référence sur les lignes brutes d'entraînement.
+
+        Paramètres :
+            - df : DataFrame brut (colonnes sélectionnées).
+            - columns : Colonnes surveillées (toutes par défaut).
+            - categorical_columns : Colonnes catégorielles (par défaut : types object / category).
+            - n_bins : Classes des histogrammes numériques (quantiles de la référence ; les
+              bornes confondues, ex. colonne binaire, sont fusionnées).
+            - compression : Finesse des sketches de quantiles.
+        """
+        return cls.from_sample(df, columns, categorical_columns, n_bins, compression).update_reference(df)
+
+    @classmethod
+    def from_sample(cls, df, columns=None, categorical_columns=None, n_bins=DEFAULT_BINS,
+                    compression=DEFAULT_COMPRESSION):
+        """
+        Référence vide dont les colonnes, leur type et les classes numériques sont tirés d'un
+        échantillon des lignes d'entraînement ; les lignes elles-mêmes sont ensuite ajoutées par
+        update_reference (ex. bloc par bloc, pour un historique plus grand que la mémoire).
+
+        Paramètres :
+            - Comme from_reference.
+        """
+        columns = list(df.columns) if columns is None else columns
+        if categorical_columns is None:
+            categorical_columns = [col for col in columns
+                                   if df[col].dtype == object or isinstance(df[col].dtype, pd.CategoricalDtype)]
+        reference = {}
+        for col in columns:
+            if col in categorical_columns:
+                reference[col] = FeatureProfile('categorical')
+            else:
+                values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+                present = values[~np.isnan(values)]
+                edges = np.unique(np.quantile(present, np.linspace(0, 1, n_bins + 1)[1:-1])) if present.size else []
+                reference[col] = FeatureProfile('numeric', edges, compression)
+        return cls(reference)
+
+    def update_reference(self, df):
+        """Ajoute un lot de lignes d'entraînement brutes à la référence (colonnes absentes : ignorées)."""
+        for col, profile in self.reference.items():
+            if col in df.columns:
+                profile.update(df[col])
+        return self
+
+    def reset(self):
+        """Ouvre une nouvelle fenêtre courante, vide."""
+        self.current = {col: profile.empty_like() for col, profile in self.reference.items()}
+        return self
+
+    def update(self, df):
+        """Ajoute un lot de lignes brutes à la fenêtre courante (colonnes absentes : ignorées)."""
+        for col, profile in self.current.items():
+            if col in df.columns:
+                profile.update(df[col])
+        return self
+
+    def merge(self, other):
+        """Ajoute la fenêtre courante d'un autre moniteur de même référence."""
+        for col, profile in self.current.items():
+            profile.merge(other.current[col])
+        return self
+
+    def drift_report(self):
+        """
+        Une ligne par colonne : type, lignes de la fenêtre, PSI, KS (numériques), taux de valeurs
+        manquantes (référence et fenêtre) et modalités absentes de la référence.
+        """
+        rows = []
+        for col, reference in self.reference.items():
+            current = self.current[col]
+            if reference.kind == 'numeric':
+                psi = population_stability_index(reference.histogram, current.histogram)
+                ks = sketch_ks_statistic(reference.sketch, current.sketch)
+                new_categories = []
+            else:
+                categories = reference.categories.index.union(current.categories.index)
+                psi = population_stability_index(reference.categories.reindex(categories, fill_value=0),
+                                                 current.categories.reindex(categories, fill_value=0))
+                ks = np.nan
+                new_categories = sorted(current.categories.index.difference(reference.categories.index))
+            rows.append({'feature': col, 'kind': reference.kind, 'rows': current.rows, 'psi': psi, 'ks': ks,
+                         'missing_reference': reference.missing_rate, 'missing_current': current.missing_rate,
+                         'new_categories': new_categories})
+        return pd.DataFrame(rows).set_index('feature')
+
+    def alerts(self, report=None, psi_threshold=PSI_ALERT, ks_threshold=KS_ALERT,
+               missing_tolerance=MISSING_TOLERANCE):
+        """
+        Messages d'alerte de la fenêtre courante : PSI ou KS au-dessus des seuils, hausse du taux
+        de valeurs manquantes au-delà de missing_tolerance, modalités inconnues.
+        """
+        report = self.drift_report() if report is None else report
+        messages = []
+        for col, row in report[report['rows'] > 0].iterrows():
+            if row['psi'] > psi_threshold:
+                messages.append(f"{col} : dérive forte (PSI {row['psi']:.3f} > {psi_threshold}).")
+            if row['ks'] > ks_threshold:
+                messages.append(f"{col} : distribution modifiée (KS {row['ks']:.3f} > {ks_threshold}).")
+            if row['missing_current'] > row['missing_reference'] + missing_tolerance:
+                messages.append(f"{col} : {row['missing_current']:.1%} de valeurs manquantes "
+                                f"(référence : {row['missing_reference']:.1%}).")
+            if row['new_categories']:
+                messages.append(f"{col} : modalités absentes de l'entraînement {row['new_categories']}.")
+        return messages
+
+    def save(self, model_dir, name=DRIFT_MONITOR_NAME):
+        os.makedirs(model_dir, exist_ok=True)
+        path = os.path.join(model_dir, name)
+        joblib.dump(self, path)
+        return path
+
+    @classmethod
+    def load(cls, model_dir, name=DRIFT_MONITOR_NAME):
+        """Moniteur sauvegardé dans model_dir, ou None s'il n'y en a pas."""
+        path = os.path.join(model_dir, name)
+        return joblib.load(path) if os.path.exists(path) else None
+
+
+def print_drift_report(monitor, report=None):
+    """Affiche le rapport de dérive de la fenêtre courante et ses alertes."""
+    report = monitor.drift_report() if report is None else report
+    print(f"Dérive des données d'entrée ({int(report['rows'].max())} lignes depuis la dernière remise à zéro) :")
+    print("Colonne              PSI        KS         Manquants (réf. -> courant)")
+    for col, row in report.iterrows():
+        level = ' !' if row['psi'] > PSI_ALERT else (' ~' if row['psi'] > PSI_WARNING else '')
+        ks = '-' if np.isnan(row['ks']) else f"{row['ks']:.4f}"
+        print(f"{col:<20} {row['psi']:<10.4f} {ks:<10} {row['missing_reference']:.1%} -> {row['missing_current']:.1%}{level}")
+    alerts = monitor.alerts(report)
+    for message in alerts:
+        print(f"ALERTE {message}")
+    if not alerts:
+        print("Aucune alerte.")
+    return alerts
@@ -1,5 +1,149 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sklearn.base import clone
 from skopt import BayesSearchCV
-from sklearn.model_selection import train_test_split
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (active HalvingRandomSearchCV)
+from sklearn.model_selection import train_test_split, HalvingRandomSearchCV
+
+from src.cv_cache import CachedBayesSearchCV
+from src.feature_cache import share, unshare
+from src.fold_search import FoldBayesSearchCV
+from src.param_grids import to_scipy_distributions
+from src.bayes_search import AskTellSearchCV
+from src.profiling import add_search_iteration, get_tracer, stage
+
+# Poids relatifs du coût d'une recherche, utilisés pour répartir les cœurs entre modèles
+# lorsque les recherches tournent en parallèle (cf. allocate_cores)
+MODEL_COST_WEIGHTS = {
+    "Logistic Regression": 1,
+    "K-Nearest Neighbors": 1,
+    "Random Forest": 3,
+    "XGBoost": 3
+}
+
+
+def run_search(model_name,
+               model,
+               search_method,
+               param_grid,
+               x_train_scaled,
+               y_train,
+               n_jobs=-1):
+    """
+    Construit et ajuste l'objet de recherche d'hyperparamètres, et le retourne.
+
+    Avec un nombre de cœurs explicite (n_jobs > 0), BayesSearchCV évalue plusieurs candidats
+    par itération (n_points) pour occuper tous les cœurs alloués, et non seulement les 5 plis.
+
+    Avec HalvingRandomSearchCV (successive halving), les candidats sont tirés dans les mêmes
+    espaces que get_param_grids et évalués d'abord avec peu de ressources, seuls les meilleurs
+    passant à l'étape suivante. La ressource est n_estimators pour les ensembles d'arbres
+    (bornes de l'espace), le nombre de lignes sinon.
+
+    CachedBayesSearchCV se comporte comme BayesSearchCV mais réutilise les évaluations déjà
+    mises en cache sur disque par les exécutions précédentes.
+
+    FoldBayesSearchCV se comporte comme BayesSearchCV mais prépare les plis une seule fois
+    (tableaux contigus, QuantileDMatrix pour XGBoost) pour tous les candidats.
+    """
+    print(f"{search_method.__name__} Optimization du modèle {model_name}...")
+    search = None
+    cv = 5
+
+    # Handling Bayesian Optimization
+    if search_method in (BayesSearchCV, CachedBayesSearchCV, FoldBayesSearchCV):
+        # 'n_iter' est un réglage de la recherche, pas une dimension de l'espace
+        search_spaces = {name: space for name, space in param_grid.items() if name != 'n_iter'}
+        search = search_method(estimator=model,
+                               search_spaces=search_spaces,
+                               n_iter=param_grid.get('n_iter', 30),  # Default n_iter if not present
+                               cv=cv,
+                               scoring='accuracy',
+                               verbose=1,
+                               n_jobs=n_jobs,
+                               n_points=max(1, n_jobs // cv) if n_jobs > 0 else 1)
+
+    # Handling successive halving
+    elif search_method == HalvingRandomSearchCV:
+        search_spaces = {name: space for name, space in param_grid.items() if name != 'n_iter'}
+        resource_options = {}
+        if 'n_estimators' in search_spaces:
+            n_estimators = search_spaces.pop('n_estimators')
+            resource_options = {'resource': 'n_estimators',
+                                'min_resources': n_estimators.low,
+                                'max_resources': n_estimators.high}
+        search = search_method(estimator=model,
+                               param_distributions=to_scipy_distributions(search_spaces),
+                               factor=3,
+                               cv=cv,
+                               scoring='accuracy',
+                               verbose=1,
+                               n_jobs=n_jobs,
+                               **resource_options)
+
+    # Avec le traçage actif, BayesSearchCV signale la fin de chaque itération (ask, évaluation
+    # des candidats, tell) : cf. trace_search_iterations. Les recherches construites sur
+    # AskTellSearchCV émettent elles-mêmes leurs itérations, sous le nom du modèle.
+    tracer = get_tracer()
+    fit_params = {}
+    iteration_ends = []
+    if isinstance(search, AskTellSearchCV):
+        fit_params['trace_name'] = model_name
+    elif tracer is not None and search_method is BayesSearchCV:
+        fit_params['callback'] = lambda result: iteration_ends.append(time.perf_counter())
+
+    # Fit the search object to the data
+    with stage(f"hyperparameter_search[{model_name}]", rows=len(x_train_scaled), search=search_method.__name__):
+        search_start = time.perf_counter()
+        search.fit(x_train_scaled, y_train, **fit_params)
+        search_end = time.perf_counter()
+    if tracer is not None and not isinstance(search, AskTellSearchCV):
+        trace_search_iterations(tracer, model_name, search, search_start, search_end, iteration_ends, n_jobs)
+
+    n_fits = len(search.cv_results_['params']) * search.n_splits_
+    print(f"{search_method.__name__} Nombre d'ajustements pour {model_name} : {n_fits}")
+
+    print(f"{search_method.__name__} Meilleur score pour {model_name} : {search.best_score_}")
+    print(f"{search_method.__name__} Meilleurs hyperparamètres pour {model_name} : {search.best_params_}")
+
+    return search
+
+
+def trace_search_iterations(tracer, model_name, search, search_start, search_end, iteration_ends, n_jobs):
+    """
+    Ajoute au traceur une étape par itération de la recherche, avec le temps d'ajustement et de
+    score de chaque candidat (d'après cv_results_) et une estimation du surcoût de l'optimiseur
+    (durée de l'itération moins le calcul des candidats réparti sur les cœurs), puis le réajustement
+    final. Sans fin d'itération connue (HalvingRandomSearchCV), tous les candidats sont rattachés
+    à une seule étape, chacun avec son tour de successive halving et ses ressources. Les
+    recherches AskTellSearchCV tracent leurs itérations elles-mêmes (cf. src.bayes_search).
+    """
+    results = search.cv_results_
+    n_splits = search.n_splits_
+    candidates = [{'params': dict(params),
+                   'fit_seconds': float(results['mean_fit_time'][i] * n_splits),
+                   'score_seconds': float(results['mean_score_time'][i] * n_splits),
+                   'mean_test_score': float(results['mean_test_score'][i])}
+                  for i, params in enumerate(results['params'])]
+    if 'iter' in results:
+        for i, candidate in enumerate(candidates):
+            candidate.update(iteration=int(results['iter'][i]), n_resources=int(results['n_resources'][i]))
+
+    if not iteration_ends:
+        tracer.add_event(f"search_candidates[{model_name}]", search_start, search_end, candidates=candidates)
+        return
+
+    n_points = getattr(search, 'n_points', 1)
+    cores = n_jobs if n_jobs > 0 else (os.cpu_count() or 1)
+    previous = search_start
+    for iteration, end in enumerate(iteration_ends):
+        batch = candidates[iteration * n_points:(iteration + 1) * n_points]
+        add_search_iteration(tracer, f"search_iteration[{model_name}]", iteration, previous, end, batch, n_splits,
+                             cores)
+        previous = end
+    tracer.add_event(f"refit[{model_name}]", previous, search_end)
 
 
 def hyperparameter_search(model_name,
@@ -7,7 +151,8 @@ def hyperparameter_search(model_name,
                           search_method,
                           param_grid,
                           x_train_scaled,
-                          y_train):
+                          y_train,
+                          n_jobs=-1):
     """
     Effectue une recherche d'hyperparamètres pour un modèle donné en utilisant la méthode spécifiée.
 
@@ -18,28 +163,12 @@ def hyperparameter_search(model_name,
         - param_grid : Grille des hyperparamètres.
         - x_train_scaled : Données d'entraînement (features).
         - y_train : Données d'entraînement (cibles).
+        - n_jobs : Nombre de cœurs alloués à la recherche (-1 : tous).
 
     Retourne :
         - Le modèle optimisé avec les meilleurs hyperparamètres.
     """
-    print(f"{search_method.__name__} Optimization du modèle {model_name}...")
-    search = None
-
-    # Handling Bayesian Optimization
-    if search_method == BayesSearchCV:
-        search = search_method(estimator=model,
-                               search_spaces=param_grid,
-                               n_iter=param_grid.get('n_iter', 30),  # Default n_iter if not present
-                               cv=5,
-                               scoring='accuracy',
-                               verbose=1,
-                               n_jobs=-1)
-
-    # Fit the search object to the data
-    search.fit(x_train_scaled, y_train)
-
-    print(f"{search_method.__name__} Meilleur score pour {model_name} : {search.best_score_}")
-    print(f"{search_method.__name__} Meilleurs hyperparamètres pour {model_name} : {search.best_params_}")
+    search = run_search(model_name, model, search_method, param_grid, x_train_scaled, y_train, n_jobs)
 
     # Access the best estimator
     best_estimator = search.best_estimator_
@@ -47,7 +176,72 @@ def hyperparameter_search(model_name,
     return best_estimator
 
 
-def get_best_models(models, param_grid, search_method, x_train_scaled, y_train):
+def allocate_cores(model_names, n_cores, weights=None):
+    """
+    Répartit un budget de cœurs entre modèles, proportionnellement à leur coût estimé
+    (au moins un cœur chacun, méthode du plus fort reste).
+
+    Retourne :
+        - Un dictionnaire nom du modèle -> nombre de cœurs.
+    """
+    weights = weights or MODEL_COST_WEIGHTS
+    model_weights = {name: weights.get(name, 1) for name in model_names}
+    total_weight = sum(model_weights.values())
+
+    shares = {name: n_cores * weight / total_weight for name, weight in model_weights.items()}
+    allocation = {name: max(1, int(share)) for name, share in shares.items()}
+
+    # Cœurs restants aux plus forts restes ; si le minimum d'un cœur a dépassé le budget,
+    # on retire d'abord aux modèles les mieux dotés
+    remaining = n_cores - sum(allocation.values())
+    by_remainder = sorted(shares, key=lambda name: shares[name] - int(shares[name]), reverse=True)
+    for name in by_remainder[:max(0, remaining)]:
+        allocation[name] += 1
+    while remaining < 0 and max(allocation.values()) > 1:
+        allocation[max(allocation, key=allocation.get)] -= 1
+        remaining += 1
+    return allocation
+
+
+def _timed_search(model_name, model, search_method, param_grid, x_train_scaled, y_train, n_jobs):
+    """
+    Exécute une recherche dans un processus dédié et mesure sa durée.
+
+    L'occupation des cœurs n'est pas mesurée : elle est estimée d'après les temps d'ajustement
+    et d'évaluation de cv_results_ (hors réajustement final, sérialisation et surcoût de
+    l'optimiseur), rapportés à la durée de la recherche multipliée par n_jobs.
+    """
+    # Le budget de cœurs est géré par la recherche : un seul thread par ajustement
+    if 'n_jobs' in model.get_params():
+        model = clone(model).set_params(n_jobs=1)
+    x_train_scaled, y_train = unshare(x_train_scaled), unshare(y_train)
+
+    start = time.perf_counter()
+    search = run_search(model_name, model, search_method, param_grid, x_train_scaled, y_train, n_jobs)
+    wall_time = time.perf_counter() - start
+
+    results = search.cv_results_
+    n_splits = search.n_splits_
+    fit_seconds = float((results['mean_fit_time'] + results['mean_score_time']).sum() * n_splits)
+    return search.best_estimator_, {'n_jobs': n_jobs,
+                                    'wall_time': wall_time,
+                                    'estimated_fit_seconds': fit_seconds,
+                                    'estimated_fit_occupancy': fit_seconds / (wall_time * n_jobs)}
+
+
+def print_search_report(timings, total_wall_time):
+    """
+    Affiche la durée et l'occupation estimée des cœurs de chaque recherche.
+    """
+    print("Rapport des recherches d'hyperparamètres :")
+    for model_name, timing in timings.items():
+        print(f"  {model_name:<22} {timing['n_jobs']:>3} cœurs  "
+              f"{timing['wall_time']:8.1f} s  occupation estimée {timing['estimated_fit_occupancy']:6.1%}")
+    print(f"  Durée totale : {total_wall_time:.1f} s")
+
+
+def get_best_models(models, param_grid, search_method, x_train_scaled, y_train,
+                    concurrent=False, n_cores=None, timings=None):
     """
     Optimise une liste de modèles avec une méthode de recherche spécifiée.
 
@@ -57,6 +251,11 @@ def get_best_models(models, param_grid, search_method, x_train_scaled, y_train):
         - search_method : Méthode de recherche (BayesSearchCV ou autre).
         - x_train_scaled : Données d'entraînement (features).
         - y_train : Données d'entraînement (cibles).
+        - concurrent : Si True, les recherches tournent en parallèle (un processus par modèle)
+                       en se partageant n_cores cœurs, répartis selon MODEL_COST_WEIGHTS.
+        - n_cores : Budget de cœurs en mode concurrent (os.cpu_count() par défaut).
+        - timings : Dictionnaire optionnel, rempli en mode concurrent avec la durée et
+                    l'occupation estimée des cœurs de chaque recherche.
 
     Retourne :
         - Un dictionnaire contenant les meilleurs modèles.
@@ -64,6 +263,30 @@ def get_best_models(models, param_grid, search_method, x_train_scaled, y_train):
     # Dictionnaire pour stocker les meilleurs modèles
     best_models = {}
 
+    if concurrent:
+        timings = {} if timings is None else timings
+        allocation = allocate_cores(list(models), n_cores or os.cpu_count() or 1)
+
+        # Matrices du cache (src.feature_cache) : chaque processus les rouvre en mémoire mappée
+        x_shared, y_shared = share(x_train_scaled), share(y_train)
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=len(models)) as executor:
+            futures = {model_name: executor.submit(_timed_search,
+                                                   model_name,
+                                                   model,
+                                                   search_method,
+                                                   param_grid[model_name],
+                                                   x_shared,
+                                                   y_shared,
+                                                   allocation[model_name])
+                       for model_name, model in models.items()}
+            for model_name, future in futures.items():
+                best_models[model_name], timings[model_name] = future.result()
+
+        print_search_report(timings, time.perf_counter() - start)
+        return best_models
+
     # Entraîner et optimiser chaque modèle
     for model_name, model in models.items():
         # Recherche du meilleur modèle
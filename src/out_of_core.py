@@ -0,0 +1,311 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, StandardScaler
+from xgboost import XGBClassifier
+
+from src.csv import SeenIds, column_dtypes, iter_columns
+from src.evaluations import binary_log_loss, confusion_counts, metrics_from_confusion, roc_auc
+from src.incremental import OnlinePreprocessorStats
+from src.monitoring import DriftMonitor
+from src.preprocessing import LoanPreprocessor
+from src.thresholds import decision_policy_from_probabilities, print_threshold_summary
+
+# Lignes lues par bloc : quelques dizaines de Mo de DataFrame brut par bloc
+CHUNK_ROWS = 250_000
+# Lignes étiquetées sur lesquelles les vocabulaires du prétraitement sont appris
+FIT_ROWS = 200_000
+# Part des identifiants réservée à la validation, et plafond des lignes de validation en mémoire
+VALIDATION_FRACTION = 0.1
+MAX_VALIDATION_ROWS = 1_000_000
+STORAGE_MODES = ('quantile', 'external')
+
+
+class ChunkedLoanDataset:
+    """
+    Historique de demandes lu par blocs, jamais chargé en entier : chaque passe relit le fichier
+    (CSV, Parquet ou Feather) et ne garde en mémoire qu'un bloc à la fois.
+
+    Les lignes sans cible sont écartées et les identifiants en double sont ignorés d'un bloc à
+    l'autre. Le dédoublonnage n'est calculé qu'une fois, à la première passe complète (SeenIds,
+    déversé sur disque au-delà de MAX_IN_MEMORY_IDS identifiants) : il en reste un bit par ligne
+    et par bloc, appliqué tel quel aux passes suivantes. La séparation entraînement / validation
+    est déterministe, par empreinte de l'identifiant : une demande est toujours du même côté, à
+    chaque passe.
+
+    Paramètres :
+        - path : Fichier de l'historique.
+        - target, features, column_id : Comme get_data_from_csv.
+        - chunksize : Lignes par bloc.
+        - validation_fraction : Part des identifiants réservée à la validation.
+        - deduplicate : Écarter les identifiants en double (False : fichier réputé sans doublons).
+    """
+
+    def __init__(self, path, target, features, column_id, chunksize=CHUNK_ROWS,
+                 validation_fraction=VALIDATION_FRACTION, deduplicate=True):
+        self.path = path
+        self.target = target
+        self.features = features
+        self.column_id = column_id
+        self.chunksize = chunksize
+        self.validation_fraction = validation_fraction
+        self.deduplicate = deduplicate
+        # Lignes conservées de chaque bloc (bits compactés), connues après une passe complète
+        self._keep_masks = None
+
+    def raw_chunks(self):
+        """
+        Blocs bruts étiquetés ([target] + features) avec, pour chaque ligne, son côté
+        (True : validation).
+
+        Retourne :
+            - Un générateur de (DataFrame, tableau booléen).
+        """
+        columns = [self.column_id, self.target] + self.features
+        dtypes = column_dtypes(columns, self.column_id)
+        keep_masks = self._keep_masks
+        seen_ids = SeenIds() if self.deduplicate and keep_masks is None else None
+        new_masks = []
+        try:
+            for index, chunk in enumerate(iter_columns(self.path, columns, dtypes, self.chunksize)):
+                chunk = chunk[chunk[self.target].notna().to_numpy()]
+                if seen_ids is not None:
+                    keep = seen_ids.first_occurrences(chunk[self.column_id])
+                    new_masks.append(np.packbits(keep))
+                    chunk = chunk[keep]
+                elif keep_masks is not None:
+                    chunk = chunk[np.unpackbits(keep_masks[index], count=len(chunk)).astype(bool)]
+                if len(chunk):
+                    id_hashes = pd.util.hash_pandas_object(chunk[self.column_id], index=False).to_numpy()
+                    validation = id_hashes % 10_000 < self.validation_fraction * 10_000
+                    yield chunk[[self.target] + self.features], validation
+            if seen_ids is not None:
+                self._keep_masks = new_masks
+        finally:
+            if seen_ids is not None:
+                seen_ids.close()
+
+    def fit_preprocessor(self, fit_rows=FIT_ROWS):
+        """
+        Ajuste le prétraitement figé en deux temps : vocabulaires, correspondances et colonnes
+        one-hot appris sur les fit_rows premières lignes d'entraînement, puis valeurs
+        d'imputation (moyennes, modes) calculées sur tout l'historique d'entraînement en une
+        passe (OnlinePreprocessorStats). Une modalité absente de l'échantillon est encodée NaN.
+
+        La même passe construit la référence de la surveillance de dérive sur les lignes brutes
+        d'entraînement (classes numériques tirées de l'échantillon, cf. DriftMonitor.from_sample).
+
+        Retourne :
+            - Le LoanPreprocessor, ses statistiques en ligne et le DriftMonitor.
+        """
+        sample, n_sample = [], 0
+        for chunk, validation in self.raw_chunks():
+            sample.append(chunk[~validation])
+            n_sample += int((~validation).sum())
+            if n_sample >= fit_rows:
+                break
+        if not sample:
+            raise ValueError(f"Aucune ligne étiquetée dans '{self.path}'.")
+        sample = pd.concat(sample).iloc[:fit_rows]
+        preprocessor = LoanPreprocessor(self.target).fit(sample)
+        monitor = DriftMonitor.from_sample(sample[self.features])
+        del sample
+
+        stats = OnlinePreprocessorStats(preprocessor)
+        for chunk, validation in self.raw_chunks():
+            monitor.update_reference(chunk[~validation])
+            stats.update(preprocessor, chunk[~validation])
+        return stats.apply(preprocessor), stats, monitor
+
+    def batches(self, preprocessor, validation=False):
+        """
+        Blocs encodés (x float32, y 0/1) d'un côté de la séparation, par le prétraitement figé.
+        """
+        for chunk, is_validation in self.raw_chunks():
+            side = chunk[is_validation == validation]
+            if len(side):
+                y = preprocessor.transform_target(side[self.target]).to_numpy(dtype=np.float32)
+                known = ~np.isnan(y)
+                yield preprocessor.transform_array(side[known]), y[known]
+
+    def validation_set(self, preprocessor, max_rows=MAX_VALIDATION_ROWS):
+        """Lignes de validation encodées, tenues en mémoire (au plus max_rows)."""
+        xs, ys, n_rows = [], [], 0
+        for x, y in self.batches(preprocessor, validation=True):
+            xs.append(x[:max_rows - n_rows])
+            ys.append(y[:max_rows - n_rows])
+            n_rows += len(xs[-1])
+            if n_rows >= max_rows:
+                break
+        if not xs:
+            return None, None
+        return np.concatenate(xs), np.concatenate(ys)
+
+
+class ChunkIterator(xgb.DataIter):
+    """
+    Interface DataIter de XGBoost au-dessus de ChunkedLoanDataset.batches : XGBoost rappelle
+    reset puis next autant de fois que nécessaire, chaque passe relisant le fichier.
+    """
+
+    def __init__(self, dataset, preprocessor, cache_prefix=None):
+        self.dataset = dataset
+        self.preprocessor = preprocessor
+        self._batches = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._batches is None:
+            self._batches = self.dataset.batches(self.preprocessor)
+        batch = next(self._batches, None)
+        if batch is None:
+            return 0
+        x, y = batch
+        input_data(data=x, label=y)
+        return 1
+
+    def reset(self):
+        self._batches = None
+
+
+def train_xgboost_out_of_core(dataset, preprocessor, params=None, num_boost_round=200, storage='quantile',
+                              max_bin=256, cache_dir=None, validation=None, early_stopping_rounds=None):
+    """
+    Entraîne XGBoost sans jamais charger l'historique : les blocs passent par ChunkIterator.
+
+    Paramètres :
+        - dataset : ChunkedLoanDataset.
+        - preprocessor : Prétraitement figé (cf. ChunkedLoanDataset.fit_preprocessor).
+        - params : Paramètres du booster (objectif binaire et méthode 'hist' imposés).
+        - num_boost_round : Nombre d'arbres.
+        - storage : 'quantile' : QuantileDMatrix construite bloc par bloc, seules les valeurs
+          binées (un octet par cellule pour max_bin <= 256) restent en mémoire ;
+          'external' : mémoire externe, pages écrites dans cache_dir et relues à chaque arbre.
+        - max_bin : Nombre de classes des histogrammes.
+        - cache_dir : Répertoire des pages (storage='external'), temporaire par défaut.
+        - validation : (x, y) de validation, suivi à chaque arbre.
+        - early_stopping_rounds : Arrêt si la validation ne progresse plus.
+
+    Retourne :
+        - Un XGBClassifier (booster entraîné) utilisable comme les modèles de main.py.
+    """
+    if storage not in STORAGE_MODES:
+        raise ValueError(f"Mode de stockage inconnu : {storage} (attendu : {STORAGE_MODES})")
+    params = dict(params or {}, objective='binary:logistic', tree_method='hist', max_bin=max_bin)
+
+    with tempfile.TemporaryDirectory(dir=cache_dir) as pages_dir:
+        if storage == 'quantile':
+            dtrain = xgb.QuantileDMatrix(ChunkIterator(dataset, preprocessor), max_bin=max_bin)
+        else:
+            dtrain = xgb.DMatrix(ChunkIterator(dataset, preprocessor, os.path.join(pages_dir, 'pages')))
+
+        evals = []
+        if validation is not None and validation[0] is not None:
+            evals = [(xgb.DMatrix(validation[0], label=validation[1]), 'validation')]
+        booster = xgb.train(params, dtrain, num_boost_round=num_boost_round, evals=evals,
+                            early_stopping_rounds=early_stopping_rounds if evals else None,
+                            verbose_eval=50 if evals else False)
+        del dtrain
+
+    model = XGBClassifier()
+    model.load_model(booster.save_raw('ubj'))
+    return model
+
+
+def train_sgd_out_of_core(dataset, preprocessor, n_epochs=3, alpha=1e-4, random_state=0):
+    """
+    Régression logistique par descente de gradient stochastique (SGDClassifier, perte
+    logistique) : une passe pour les moyennes et variances (StandardScaler.partial_fit), puis
+    n_epochs passes de partial_fit, un bloc à la fois. Les modalités inconnues du prétraitement
+    (NaN) sont encodées 0, le modèle linéaire n'acceptant pas NaN.
+
+    Retourne :
+        - Un Pipeline (NaN -> 0, StandardScaler, SGDClassifier) avec predict / predict_proba.
+    """
+    unknown = FunctionTransformer(np.nan_to_num)
+    scaler = StandardScaler()
+    for x, _ in dataset.batches(preprocessor):
+        scaler.partial_fit(unknown.fit_transform(x))
+
+    classifier = SGDClassifier(loss='log_loss', alpha=alpha, random_state=random_state)
+    classes = np.array([0, 1])
+    for _ in range(n_epochs):
+        for x, y in dataset.batches(preprocessor):
+            classifier.partial_fit(scaler.transform(unknown.transform(x)), y.astype(int), classes=classes)
+    return Pipeline([('unknown', unknown), ('scaler', scaler), ('classifier', classifier)])
+
+
+def validation_probabilities(model, x_valid, batch_size=CHUNK_ROWS):
+    """Probabilités de la classe positive sur la validation, prédite par blocs."""
+    return np.concatenate([model.predict_proba(x_valid[start:start + batch_size])[:, 1]
+                           for start in range(0, len(x_valid), batch_size)])
+
+
+def validation_metrics(model, x_valid, y_valid, batch_size=CHUNK_ROWS, probabilities=None):
+    """
+    Accuracy, précision, rappel, F1, ROC-AUC et log-loss sur la validation, prédite par blocs
+    (ou d'après probabilities, si elles sont déjà calculées).
+    """
+    if probabilities is None:
+        probabilities = validation_probabilities(model, x_valid, batch_size)
+    y_valid = y_valid.astype(int)
+    metrics = metrics_from_confusion(confusion_counts(y_valid, (probabilities > 0.5).astype(int)))
+    metrics.update({'ROC-AUC': roc_auc(y_valid, probabilities), 'Log-Loss': binary_log_loss(y_valid, probabilities)})
+    return metrics
+
+
+def train_out_of_core(path, target, features, column_id, model='xgboost', chunksize=CHUNK_ROWS,
+                      fit_rows=FIT_ROWS, validation_fraction=VALIDATION_FRACTION, policy_options=None,
+                      **train_options):
+    """
+    Entraînement complet sur un historique plus grand que la mémoire : prétraitement figé
+    (ChunkedLoanDataset.fit_preprocessor), validation mise de côté, puis XGBoost
+    (train_xgboost_out_of_core) ou SGD (train_sgd_out_of_core) par blocs. La politique de
+    décision (calibration et seuil) est ajustée sur les probabilités de la validation, que le
+    modèle n'a pas vue.
+
+    Paramètres :
+        - model : 'xgboost' ou 'sgd'.
+        - policy_options : Arguments de decision_policy_from_probabilities (method, objective,
+          cost_fp, cost_fn).
+        - train_options : Transmis à la fonction d'entraînement.
+
+    Retourne :
+        - Le modèle, le prétraitement, ses statistiques en ligne, les métriques de validation et
+          la DecisionPolicy (None sans lignes de validation), puis le DriftMonitor.
+    """
+    dataset = ChunkedLoanDataset(path, target, features, column_id, chunksize, validation_fraction)
+
+    start = time.perf_counter()
+    preprocessor, stats, monitor = dataset.fit_preprocessor(fit_rows)
+    x_valid, y_valid = dataset.validation_set(preprocessor)
+    print(f"Prétraitement figé sur {stats.rows_seen:,} lignes d'entraînement "
+          f"({time.perf_counter() - start:.1f} s), {0 if x_valid is None else len(x_valid):,} lignes de validation.")
+
+    start = time.perf_counter()
+    if model == 'xgboost':
+        trained = train_xgboost_out_of_core(dataset, preprocessor, validation=(x_valid, y_valid), **train_options)
+    elif model == 'sgd':
+        trained = train_sgd_out_of_core(dataset, preprocessor, **train_options)
+    else:
+        raise ValueError(f"Modèle inconnu : {model} (attendu : 'xgboost' ou 'sgd')")
+    print(f"Entraînement {model} par blocs : {time.perf_counter() - start:.1f} s.")
+
+    if x_valid is None:
+        print("Pas de lignes de validation : ni métriques ni politique de décision.")
+        return trained, preprocessor, stats, {}, None, monitor
+
+    probabilities = validation_probabilities(trained, x_valid)
+    metrics = validation_metrics(trained, x_valid, y_valid, probabilities=probabilities)
+    for name, value in metrics.items():
+        print(f"{name}: {value:.4f}")
+    policy, sweep = decision_policy_from_probabilities(probabilities, y_valid.astype(int),
+                                                       details={'source': 'validation'}, **(policy_options or {}))
+    print_threshold_summary(policy, sweep)
+    return trained, preprocessor, stats, metrics, policy, monitor
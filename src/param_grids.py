@@ -1,3 +1,4 @@
+from scipy.stats import loguniform, randint, uniform
 from skopt.space import Real, Integer, Categorical
 
 def get_param_grids():
@@ -24,3 +25,24 @@ def get_param_grids():
             'max_depth': Integer(3, 10)  # Profondeur maximale des arbres
         }
     }
+
+
+def to_scipy_distributions(param_grid):
+    """
+    Convertit un espace skopt (Real, Integer, Categorical) en distributions scipy,
+    utilisables par les recherches aléatoires de scikit-learn (RandomizedSearchCV,
+    HalvingRandomSearchCV).
+    """
+    distributions = {}
+    for name, space in param_grid.items():
+        if isinstance(space, Categorical):
+            distributions[name] = list(space.categories)
+        elif isinstance(space, Integer):
+            distributions[name] = randint(space.low, space.high + 1)
+        elif isinstance(space, Real) and space.prior == 'log-uniform':
+            distributions[name] = loguniform(space.low, space.high)
+        elif isinstance(space, Real):
+            distributions[name] = uniform(space.low, space.high - space.low)
+        else:
+            distributions[name] = space
+    return distributions
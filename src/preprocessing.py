@@ -1,8 +1,8 @@
+import numpy as np
 import pandas as pd
 
-from sklearn.impute import SimpleImputer
-
-from sklearn.preprocessing import LabelEncoder
+# scikit-learn n'est importé que par les fonctions historiques qui l'utilisent : LoanPreprocessor
+# (chemin de scoring) n'en dépend pas.
 
 
 def transform_categorical_to_numeric(df, label_encoders=None):
@@ -23,6 +23,8 @@ def transform_categorical_to_numeric(df, label_encoders=None):
         - dict: Dictionary of LabelEncoders for each non-binary column (if not provided initially).
 
     """
+    from sklearn.preprocessing import LabelEncoder
+
     # Si aucun label_encoder n'est passé, on le crée
     if label_encoders is None:
         label_encoders = {}
@@ -53,6 +55,8 @@ def transform_categorical_to_numeric(df, label_encoders=None):
 
 
 def handle_missing_values(df):
+    from sklearn.impute import SimpleImputer
+
     # Identifier les colonnes catégorielles et numériques
     categorical_cols = df.select_dtypes(include=['object']).columns
     numerical_cols = df.select_dtypes(exclude=['object']).columns
@@ -97,3 +101,263 @@ def split_target_features(df, target):
     x = df.drop(columns=[target])
     y = df[target]
     return x, y
+
+
+class LoanPreprocessor:
+    """
+    Fitted, reusable equivalent of clean_loan_data + transform_categorical_to_numeric.
+
+    The state (Dependents mode, imputation values, binary mappings, label vocabularies,
+    one-hot categories, target mapping and output column order) is learned once on the
+    training rows, so that transforming a batch or a single application never refits anything.
+    save_best_model persists it next to the model.
+
+    Parameters:
+    target (str): Name of the target column, excluded from the output features.
+    one_hot_cols (list, optional): Columns one-hot encoded with drop_first, as in clean_loan_data.
+                                   Defaults to ['Property_Area'].
+    """
+
+    def __init__(self, target, one_hot_cols=None):
+        self.target = target
+        self.one_hot_cols = ['Property_Area'] if one_hot_cols is None else one_hot_cols
+
+    def fit(self, df):
+        """
+        Learn the preprocessing state from raw training rows (as returned by split_train_predict).
+
+        Parameters:
+        df (pd.DataFrame): Raw training data, target included.
+
+        Returns:
+        LoanPreprocessor: The fitted preprocessor.
+        """
+        df = _with_object_categories(df)
+
+        # Cible binaire encodée 0/1 selon l'ordre d'apparition, comme les autres colonnes binaires
+        target_values = df[self.target].dropna().unique()
+        self.target_mapping_ = {value: code for code, value in enumerate(target_values)}
+
+        # 'Dependents' : mode calculé avant le remplacement de "3+", comme dans clean_loan_data
+        self.dependents_mode_ = df['Dependents'].mode()[0]
+        df['Dependents'] = self._clean_dependents(df['Dependents'])
+
+        # Modalités conservées par get_dummies(drop_first=True)
+        self.one_hot_categories_ = {
+            col: sorted(df[col].dropna().unique())[1:] for col in self.one_hot_cols
+        }
+        df = self._one_hot(df)
+
+        feature_cols = [col for col in df.columns if col != self.target]
+        categorical_cols = [col for col in feature_cols if df[col].dtype == object]
+        numerical_cols = [col for col in feature_cols if col not in categorical_cols]
+
+        # Valeurs d'imputation (most_frequent / mean, comme handle_missing_values)
+        self.fill_values_ = {col: df[col].mode()[0] for col in categorical_cols if df[col].notna().any()}
+        self.fill_values_.update({col: df[col].mean() for col in numerical_cols})
+        df = df.fillna(self.fill_values_)
+
+        # Colonnes binaires : 0/1 selon l'ordre d'apparition ; autres : vocabulaire trié (LabelEncoder)
+        self.binary_mappings_ = {}
+        self.label_vocabularies_ = {}
+        for col in categorical_cols:
+            uniques = df[col].unique()
+            if len(uniques) == 2:
+                self.binary_mappings_[col] = {uniques[0]: 0, uniques[1]: 1}
+            else:
+                vocabulary = sorted(df[col].astype(str).unique())
+                self.label_vocabularies_[col] = {value: code for code, value in enumerate(vocabulary)}
+
+        self.feature_columns_ = feature_cols
+        self._build_plans()
+        return self
+
+    def transform(self, df):
+        """
+        Transform raw rows into the numeric feature matrix expected by the model.
+
+        Unseen categories are encoded as NaN instead of raising.
+
+        Parameters:
+        df (pd.DataFrame): Raw data with the selected features (target optional).
+
+        Returns:
+        pd.DataFrame: Numeric features, in the training column order.
+        """
+        df = _with_object_categories(df)
+        df['Dependents'] = self._clean_dependents(df['Dependents'])
+        df = self._one_hot(df)
+        df = df.reindex(columns=self.feature_columns_)
+        df = df.fillna(self.fill_values_)
+
+        for col, mapping in self.binary_mappings_.items():
+            df[col] = df[col].map(mapping)
+        for col, vocabulary in self.label_vocabularies_.items():
+            df[col] = df[col].astype(str).map(vocabulary)
+
+        return df.astype(float)
+
+    def transform_array(self, df, out=None):
+        """
+        Vectorized fast path of transform: encode all columns in one pass into a float32 matrix.
+
+        Each categorical column is looked up once against its frozen vocabulary
+        (pandas categorical codes), then mapped through a small NumPy table. Gives the
+        same values as transform, without intermediate DataFrames.
+
+        Parameters:
+        df (pd.DataFrame): Raw data with the selected features (target optional).
+        out (np.ndarray, optional): Preallocated (n_rows, n_features) float32 matrix to fill.
+
+        Returns:
+        np.ndarray: Numeric features, in the training column order.
+        """
+        if out is None:
+            out = np.empty((len(df), len(self.feature_columns_)), dtype=np.float32)
+
+        for kind, col, payload in self._array_plan:
+            if kind == 'one_hot':
+                # Modalité absente ou manquante : aucune colonne one-hot active (cf. get_dummies)
+                values = df[col] if col in df.columns else pd.Series(np.nan, index=df.index)
+                codes = pd.Categorical(values, categories=[category for _, category in payload]).codes
+                for k, (j, _) in enumerate(payload):
+                    out[:, j] = codes == k
+            elif col not in df.columns:
+                # Colonne absente : valeur d'imputation
+                out[:, payload[0]] = payload[1]
+            elif kind == 'numeric':
+                j, fill = payload
+                values = df[col].to_numpy(dtype=np.float32, na_value=np.nan)
+                np.copyto(out[:, j], values)
+                out[np.isnan(values), j] = fill
+            elif kind == 'categorical':
+                j, fill, categories, table = payload
+                codes = pd.Categorical(df[col], categories=categories).codes
+                # code -1 : valeur manquante (imputée) ou modalité inconnue (NaN)
+                out[:, j] = table[codes]
+                out[df[col].isna().to_numpy(), j] = fill
+
+        return out
+
+    def transform_target(self, target_values):
+        """
+        Encode the target column with the mapping learned on the training rows.
+
+        Parameters:
+        target_values (pd.Series): Raw target values.
+
+        Returns:
+        pd.Series: Encoded target (NaN for missing or unseen values).
+        """
+        return target_values.astype(object).map(self.target_mapping_)
+
+    def transform_record(self, record):
+        """
+        Transform a single application (dict of raw values) without going through pandas.
+
+        Parameters:
+        record (dict): Raw feature values of one application.
+
+        Returns:
+        np.ndarray: A (1, n_features) float32 array in the training column order.
+        """
+        row = [encode(record) for encode in self._record_plan]
+        return np.array([row], dtype=np.float32)
+
+    def __getstate__(self):
+        # Les plans d'encodage sont dérivés de l'état ajusté (et contiennent des fonctions non
+        # sérialisables) : ils sont reconstruits au chargement
+        state = self.__dict__.copy()
+        state.pop('_record_plan', None)
+        state.pop('_array_plan', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if hasattr(self, 'feature_columns_'):
+            self._build_plans()
+
+    def _build_plans(self):
+        """
+        Precompute the per-column encoders used by transform_record and transform_array.
+        """
+        self._record_plan = [self._column_plan(col) for col in self.feature_columns_]
+
+        self._array_plan = []
+        one_hot_positions = {}
+        for j, (col, encode) in enumerate(zip(self.feature_columns_, self._record_plan)):
+            # Encoder un enregistrement vide donne directement la valeur d'imputation encodée
+            fill = encode({})
+            source = self._one_hot_source(col)
+            if source is not None:
+                one_hot_positions.setdefault(source, []).append((j, col[len(source) + 1:]))
+            elif col in self.binary_mappings_ or col in self.label_vocabularies_:
+                mapping = dict(self.binary_mappings_.get(col) or self.label_vocabularies_[col])
+                if col == 'Dependents' and '3' in mapping:
+                    mapping['3+'] = mapping['3']
+                # Dernière case de la table : modalité inconnue (code -1)
+                table = np.array(list(mapping.values()) + [np.nan], dtype=np.float32)
+                self._array_plan.append(('categorical', col, (j, fill, list(mapping), table)))
+            else:
+                self._array_plan.append(('numeric', col, (j, fill)))
+
+        for source, positions in one_hot_positions.items():
+            self._array_plan.append(('one_hot', source, positions))
+
+    def _one_hot_source(self, col):
+        for source, categories in self.one_hot_categories_.items():
+            if col.startswith(f"{source}_") and col[len(source) + 1:] in categories:
+                return source
+        return None
+
+    def _clean_dependents(self, dependents):
+        return dependents.fillna(self.dependents_mode_).replace('3+', 3)
+
+    def _one_hot(self, df):
+        for col, categories in self.one_hot_categories_.items():
+            values = df[col] if col in df.columns else pd.Series(np.nan, index=df.index)
+            for category in categories:
+                df[f"{col}_{category}"] = (values == category).astype(float)
+            df = df.drop(columns=[col], errors='ignore')
+        return df
+
+    def _column_plan(self, col):
+        """
+        Build the function that encodes one output column from a raw record.
+        """
+        fill_value = self.fill_values_.get(col, np.nan)
+
+        source = self._one_hot_source(col)
+        if source is not None:
+            category = col[len(source) + 1:]
+            return lambda record: float(record.get(source) == category)
+
+        def raw_value(record):
+            value = record.get(col)
+            if col == 'Dependents':
+                if _is_missing(value):
+                    value = self.dependents_mode_
+                if value == '3+':
+                    value = 3
+            return fill_value if _is_missing(value) else value
+
+        if col in self.binary_mappings_:
+            mapping = self.binary_mappings_[col]
+            return lambda record: mapping.get(raw_value(record), np.nan)
+        if col in self.label_vocabularies_:
+            vocabulary = self.label_vocabularies_[col]
+            return lambda record: vocabulary.get(str(raw_value(record)), np.nan)
+        return lambda record: float(raw_value(record))
+
+
+def _with_object_categories(df):
+    """
+    Copy of df where 'category' columns (as read by src.csv) hold their raw values again,
+    so that fit and transform behave exactly as on the original string columns.
+    """
+    categorical_cols = df.select_dtypes(include='category').columns
+    return df.astype({col: object for col in categorical_cols}) if len(categorical_cols) else df.copy()
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and np.isnan(value))
@@ -0,0 +1,304 @@
+import cProfile
+import functools
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Traceur actif (cf. start_tracing) : None tant que le traçage n'est pas demandé, les étapes
+# instrumentées ne coûtent alors qu'un test.
+_active_tracer = None
+# Profileur de l'exécution complète (cProfile.Profile ou SamplingProfiler), si demandé
+_profiler = None
+
+PROFILE_MODES = (None, 'cprofile', 'sampling')
+
+
+def current_rss_mb():
+    """
+    Mémoire résidente (RSS) actuelle du processus en Mo, ou None si la plateforme ne l'expose pas.
+    """
+    try:
+        with open('/proc/self/statm', encoding='ascii') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (FileNotFoundError, OSError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def count_rows(value):
+    """
+    Nombre de lignes d'un DataFrame / tableau, ou du premier élément d'un tuple ; None sinon.
+    """
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    shape = getattr(value, 'shape', None)
+    if shape:
+        return int(shape[0])
+    return None
+
+
+class Tracer:
+    """
+    Enregistre des étapes chronométrées : durée murale, temps CPU du processus, variation de la
+    RSS et nombre de lignes traitées, avec des attributs libres (args).
+
+    Les événements sont exportables en trace Chrome (chrome://tracing, Perfetto) ou en JSON
+    lignes (un événement par ligne), et résumés par print_summary.
+    """
+
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name, rows=None, **args):
+        """
+        Chronomètre le bloc. Le dict retourné peut être complété dans le bloc
+        (ex. stage_args['rows'] = ...).
+        """
+        stage_args = dict(args, rows=rows)
+        start_rss = current_rss_mb()
+        start_cpu = time.process_time()
+        start = time.perf_counter()
+        try:
+            yield stage_args
+        finally:
+            end = time.perf_counter()
+            end_rss = current_rss_mb()
+            self.add_event(name, start, end,
+                           cpu_seconds=time.process_time() - start_cpu,
+                           rss_delta_mb=None if start_rss is None else end_rss - start_rss,
+                           **stage_args)
+
+    def add_event(self, name, start, end, **args):
+        """Ajoute un événement déjà mesuré (instants perf_counter)."""
+        event = {'name': name,
+                 'start': start - self._origin,
+                 'wall_seconds': end - start,
+                 'thread': threading.get_ident(),
+                 'args': {key: value for key, value in args.items() if value is not None}}
+        with self._lock:
+            self.events.append(event)
+
+    def write_chrome_trace(self, path):
+        """
+        Écrit les événements au format Chrome trace (événements complets 'X', en microsecondes).
+        """
+        trace_events = [{'name': event['name'],
+                         'ph': 'X',
+                         'ts': event['start'] * 1e6,
+                         'dur': event['wall_seconds'] * 1e6,
+                         'pid': os.getpid(),
+                         'tid': event['thread'],
+                         'args': event['args']}
+                        for event in self.events]
+        _write_json(path, {'traceEvents': trace_events, 'displayTimeUnit': 'ms'})
+
+    def write_json_lines(self, path):
+        """Écrit un événement JSON par ligne (journal structuré)."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            for event in self.events:
+                file.write(json.dumps(event, default=repr) + '\n')
+
+    def print_summary(self):
+        """Affiche la durée, le temps CPU et la variation de RSS de chaque étape, dans l'ordre."""
+        print("Profil des étapes :")
+        for event in sorted(self.events, key=lambda event: event['start']):
+            args = event['args']
+            cpu = f"{args['cpu_seconds']:8.2f} s CPU" if 'cpu_seconds' in args else ' ' * 14
+            rss = f"{args['rss_delta_mb']:+8.1f} Mo" if 'rss_delta_mb' in args else ' ' * 11
+            rows = f"{args['rows']:>10,} lignes" if 'rows' in args else ''
+            if 'fit_score_seconds' in args:
+                rows = (f"ajustements {args['fit_score_seconds']:.2f} s, "
+                        f"surcoût optimiseur ~{args['estimated_optimizer_overhead_seconds']:.2f} s")
+            print(f"  {event['name']:<48} {event['wall_seconds']:8.2f} s  {cpu}  {rss}  {rows}")
+
+
+class SamplingProfiler:
+    """
+    Profileur par échantillonnage (à la py-spy) : un thread relève la pile du thread observé
+    toutes les interval secondes. Le résultat est au format « piles repliées » (une pile par
+    ligne, suivie de son nombre d'échantillons), lisible par flamegraph.pl ou speedscope.
+    """
+
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples = Counter()
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._done.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def write_collapsed(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            for stack, count in self.samples.most_common():
+                file.write(f"{stack} {count}\n")
+
+    def print_top(self, limit=20):
+        """Fonctions présentes dans le plus d'échantillons (temps inclusif)."""
+        inclusive = Counter()
+        for stack, count in self.samples.items():
+            for function in set(stack.split(';')):
+                inclusive[function] += count
+        total = sum(self.samples.values()) or 1
+        print(f"Points chauds ({total} échantillons) :")
+        for function, count in inclusive.most_common(limit):
+            print(f"  {100 * count / total:5.1f} %  {function}")
+
+
+def start_tracing(profile=None, sample_interval=0.005):
+    """
+    Active le traçage des étapes instrumentées (stage, traced), et éventuellement un profil
+    de l'exécution complète.
+
+    Paramètres :
+        - profile : None, 'cprofile' (profil déterministe) ou 'sampling' (échantillonnage).
+        - sample_interval : Période d'échantillonnage du mode 'sampling' (s).
+
+    Retourne :
+        - Le Tracer actif.
+    """
+    global _active_tracer, _profiler
+    if profile not in PROFILE_MODES:
+        raise ValueError(f"Mode de profilage inconnu : {profile} (attendu : {PROFILE_MODES})")
+
+    _active_tracer = Tracer()
+    if profile == 'cprofile':
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    elif profile == 'sampling':
+        _profiler = SamplingProfiler(sample_interval).start()
+    return _active_tracer
+
+
+def stop_tracing(trace_path=None, log_path=None, profile_path=None):
+    """
+    Désactive le traçage, affiche le résumé et écrit les fichiers demandés.
+
+    Paramètres :
+        - trace_path : Trace Chrome (JSON).
+        - log_path : Journal structuré (JSON lignes).
+        - profile_path : Profil (.prof pour cProfile, piles repliées pour l'échantillonnage).
+
+    Retourne :
+        - Le Tracer désactivé (None si le traçage n'était pas actif).
+    """
+    global _active_tracer, _profiler
+    tracer, profiler = _active_tracer, _profiler
+    _active_tracer, _profiler = None, None
+    if tracer is None:
+        return None
+
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        stats = pstats.Stats(profiler).sort_stats('cumulative')
+        stats.print_stats(20)
+        if profile_path:
+            stats.dump_stats(profile_path)
+    elif isinstance(profiler, SamplingProfiler):
+        profiler.stop()
+        profiler.print_top()
+        if profile_path:
+            profiler.write_collapsed(profile_path)
+
+    tracer.print_summary()
+    if trace_path:
+        tracer.write_chrome_trace(trace_path)
+        print(f"Trace enregistrée dans '{trace_path}'.")
+    if log_path:
+        tracer.write_json_lines(log_path)
+    return tracer
+
+
+def get_tracer():
+    """Retourne le Tracer actif, ou None."""
+    return _active_tracer
+
+
+@contextmanager
+def stage(name, rows=None, **args):
+    """
+    Étape chronométrée si le traçage est actif, sans effet sinon.
+    """
+    if _active_tracer is None:
+        yield dict(args, rows=rows)
+        return
+    with _active_tracer.stage(name, rows, **args) as stage_args:
+        yield stage_args
+
+
+def add_search_iteration(tracer, name, iteration, start, end, candidates, n_splits, cores):
+    """
+    Ajoute l'événement d'une itération de recherche d'hyperparamètres : candidats évalués
+    (params, fit_seconds, score_seconds, mean_test_score), leur temps de calcul cumulé et une
+    estimation du surcoût de l'optimiseur (durée de l'itération moins ce calcul réparti sur les
+    cœurs occupables par les plis des candidats).
+    """
+    busy = sum(candidate['fit_seconds'] + candidate['score_seconds'] for candidate in candidates)
+    parallelism = max(1, min(cores, len(candidates) * n_splits))
+    tracer.add_event(name, start, end,
+                     iteration=iteration,
+                     candidates=candidates,
+                     fit_score_seconds=busy,
+                     estimated_optimizer_overhead_seconds=max(0.0, (end - start) - busy / parallelism))
+
+
+def traced(name=None):
+    """
+    Décorateur : chronomètre chaque appel de la fonction comme une étape (nom de la fonction
+    par défaut), le nombre de lignes étant déduit du résultat (cf. count_rows).
+    """
+
+    def decorator(function):
+        stage_name = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _active_tracer is None:
+                return function(*args, **kwargs)
+            with _active_tracer.stage(stage_name) as stage_args:
+                result = function(*args, **kwargs)
+                stage_args['rows'] = count_rows(result)
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def _write_json(path, payload):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(payload, file, default=repr)
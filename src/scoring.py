@@ -0,0 +1,322 @@
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.csv import SeenIds
+
+
+# Colonnes catégorielles du schéma loan-data : leur type doit être fixé à la lecture,
+# sinon un bloc ne contenant que des chiffres (ex. 'Dependents') serait lu en float.
+CATEGORICAL_FEATURES = ['Gender', 'Married', 'Dependents', 'Education', 'Self_Employed', 'Property_Area']
+# Booster XGBoost natif et schéma figé de ses caractéristiques (cf. export_native_model)
+NATIVE_MODEL_NAME = "xgboost_best_model.ubj"
+FEATURE_SCHEMA_NAME = "feature_schema.json"
+
+
+def peak_rss_mb():
+    """
+    Retourne le pic de mémoire résidente (RSS) du processus courant en Mo,
+    ou None si la plateforme ne l'expose pas.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est exprimé en octets sous macOS et en kilo-octets sous Linux
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+class LatencyRecorder:
+    """
+    Conserve les dernières latences observées (en ms) et calcule leurs percentiles.
+    """
+
+    def __init__(self, window=10_000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, milliseconds):
+        with self._lock:
+            self._samples.append(milliseconds)
+            self.count += 1
+
+    def summary(self):
+        with self._lock:
+            samples = np.array(self._samples)
+            count = self.count
+        if count == 0:
+            return {'count': 0, 'p50_ms': None, 'p99_ms': None}
+        p50, p99 = np.percentile(samples, [50, 99])
+        return {'count': count, 'p50_ms': float(p50), 'p99_ms': float(p99)}
+
+
+class NativeBoosterModel:
+    """
+    Modèle XGBoost chargé depuis son format natif (cf. export_native_model), sans la surcouche
+    sklearn : les prédictions passent directement par Booster.inplace_predict sur des tableaux
+    float32. Expose predict et predict_proba comme le modèle joblib.
+    """
+
+    def __init__(self, booster, schema):
+        self.booster = booster
+        self.schema = schema
+        self.feature_names = schema['feature_names']
+
+    @classmethod
+    def load(cls, model_dir, model_name=NATIVE_MODEL_NAME, schema_name=FEATURE_SCHEMA_NAME, nthread=None):
+        import json
+        import xgboost as xgb
+
+        with open(os.path.join(model_dir, schema_name), encoding='utf-8') as file:
+            schema = json.load(file)
+        booster = xgb.Booster(model_file=os.path.join(model_dir, model_name))
+        if nthread is not None:
+            booster.set_param({'nthread': nthread})
+        return cls(booster, schema)
+
+    def get_booster(self):
+        """Même accès au booster que XGBClassifier (cf. ScoringService)."""
+        return self.booster
+
+    def predict_proba(self, x):
+        """
+        Probabilités des deux classes, comme XGBClassifier.predict_proba.
+        """
+        positive = self.predict_positive(x)
+        return np.column_stack([1 - positive, positive])
+
+    def predict_positive(self, x):
+        """
+        Probabilité de la classe positive, sans copie supplémentaire.
+        """
+        if isinstance(x, pd.DataFrame):
+            x = x[self.feature_names].to_numpy(dtype=np.float32)
+        x = np.asarray(x, dtype=np.float32)
+        if x.shape[1] != len(self.feature_names):
+            raise ValueError(f"{x.shape[1]} colonnes reçues, {len(self.feature_names)} attendues.")
+        return self.booster.inplace_predict(x)
+
+    def predict(self, x):
+        return (self.predict_positive(x) > 0.5).astype(int)
+
+
+# Modèle chargé une seule fois par processus de travail (cf. _init_worker)
+_worker_model = None
+
+
+def _init_worker(model_path):
+    """
+    Charge le modèle dans le processus de travail.
+    mmap_mode='r' permet de partager les tableaux numpy du modèle entre processus.
+    """
+    global _worker_model
+    _worker_model = joblib.load(model_path, mmap_mode='r')
+    # Un seul thread par processus : le parallélisme est assuré par le pool
+    if 'n_jobs' in _worker_model.get_params():
+        _worker_model.set_params(n_jobs=1)
+
+
+def _predict_shard(shard_index, x_shard):
+    return shard_index, _worker_model.predict(x_shard)
+
+
+def predict_in_parallel(model_path, x_predict, n_workers=None, shards_per_worker=4):
+    """
+    Répartit les lignes à scorer entre plusieurs processus et rassemble les prédictions
+    dans l'ordre d'origine des lignes.
+
+    Paramètres :
+        - model_path : Chemin du modèle sauvegardé par save_best_model.
+        - x_predict : Caractéristiques à scorer (DataFrame).
+        - n_workers : Nombre de processus (os.cpu_count() par défaut).
+        - shards_per_worker : Nombre de tranches par processus, pour équilibrer la charge.
+
+    Retourne :
+        - Un tableau numpy des prédictions, aligné sur x_predict.
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    n_shards = max(1, min(len(x_predict), n_workers * shards_per_worker))
+    bounds = np.linspace(0, len(x_predict), n_shards + 1, dtype=int)
+
+    results = [None] * n_shards
+    with ProcessPoolExecutor(max_workers=n_workers,
+                             initializer=_init_worker,
+                             initargs=(model_path,)) as executor:
+        futures = [executor.submit(_predict_shard, i, x_predict.iloc[bounds[i]:bounds[i + 1]])
+                   for i in range(n_shards)]
+        for future in futures:
+            shard_index, predictions = future.result()
+            results[shard_index] = predictions
+
+    return np.concatenate(results)
+
+
+def predict_and_save_in_parallel(model_path,
+                                 predict_data,
+                                 selected_features,
+                                 data_dir,
+                                 n_workers=None,
+                                 output_name='loan_predictions.csv'):
+    """
+    Équivalent parallèle de predict_and_save : score predict_data avec un pool de processus
+    et sauvegarde les résultats, avec un rapport de débit.
+
+    Retourne :
+        - Le chemin du fichier de sortie et le rapport de débit (dict).
+    """
+    start = time.perf_counter()
+    predictions = predict_in_parallel(model_path, predict_data[selected_features], n_workers)
+    seconds = time.perf_counter() - start
+
+    predict_data['Predictions'] = predictions
+    os.makedirs(data_dir, exist_ok=True)
+    output_path = os.path.join(data_dir, output_name)
+    predict_data.to_csv(output_path, index=False)
+
+    report = {
+        'rows': len(predict_data),
+        'seconds': seconds,
+        'rows_per_sec': len(predict_data) / seconds if seconds > 0 else 0.0,
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+    print(f"Les prédictions ont été sauvegardées dans {output_path}.")
+    print_throughput_report(report)
+    return output_path, report
+
+
+def print_throughput_report(report):
+    """
+    Affiche un rapport de débit (lignes, durée, lignes/s, pic RSS).
+    """
+    print(f"Lignes scorées : {report['rows']}")
+    print(f"Durée : {report['seconds']:.2f} s")
+    print(f"Débit : {report['rows_per_sec']:.0f} lignes/s")
+    if report['peak_rss_mb'] is not None:
+        print(f"Pic de mémoire (RSS) : {report['peak_rss_mb']:.1f} Mo")
+
+
+def predict_and_save_in_chunks(best_model,
+                               preprocessor,
+                               csv_path,
+                               target,
+                               selected_features,
+                               column_id,
+                               data_dir,
+                               chunksize=100_000,
+                               output_name='loan_predictions.csv',
+                               categorical_features=None,
+                               policy=None,
+                               probability_mode=False,
+                               monitor=None,
+                               deduplicate=True):
+    """
+    Score un fichier CSV par blocs de taille fixe et ajoute les prédictions au fichier de sortie.
+
+    Chaque bloc suit le même chemin que prepare_data pour les lignes à prédire
+    (dédoublonnage sur l'identifiant, lignes sans cible, puis le prétraitement figé
+    sauvegardé avec le modèle), de sorte que la mémoire reste bornée par la taille
+    du bloc et non par celle du fichier. Les identifiants déjà vus sont des empreintes
+    triées, écrites sur disque au-delà d'un plafond (cf. src.csv.SeenIds).
+
+    Paramètres :
+        - best_model : Modèle entraîné.
+        - preprocessor : LoanPreprocessor ajusté sur les données d'entraînement.
+        - csv_path : Chemin du fichier CSV brut à scorer.
+        - target : Nom de la colonne cible.
+        - selected_features : Colonnes brutes à conserver.
+        - column_id : Colonne identifiant utilisée pour le dédoublonnage.
+        - data_dir : Répertoire de sortie.
+        - chunksize : Nombre de lignes lues par bloc.
+        - output_name : Nom du fichier de sortie.
+        - categorical_features : Colonnes lues comme chaînes (CATEGORICAL_FEATURES par défaut).
+        - policy : Politique de décision (calibration et seuil, cf. src.thresholds), ou None
+          pour model.predict.
+        - probability_mode : Ajoute la probabilité (calibrée) de la classe positive ('Probability').
+        - monitor : DriftMonitor (cf. src.monitoring) auquel chaque bloc brut est ajouté, ou None.
+        - deduplicate : Écarter les identifiants déjà rencontrés (False : fichier réputé sans doublons).
+
+    Retourne :
+        - Le chemin du fichier de sortie et le rapport de débit (dict).
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    output_path = os.path.join(data_dir, output_name)
+    if os.path.exists(output_path):
+        os.remove(output_path)
+
+    seen_ids = SeenIds() if deduplicate else None
+    rows = 0
+    write_header = True
+    start = time.perf_counter()
+
+    if categorical_features is None:
+        categorical_features = CATEGORICAL_FEATURES
+    # La cible est toujours vide dans les blocs à prédire : on la force en objet
+    # comme dans le fichier complet, au lieu d'un float64 entièrement NaN.
+    string_columns = [column_id, target] + [col for col in categorical_features if col in selected_features]
+    dtypes = {col: 'object' for col in string_columns}
+
+    reader = pd.read_csv(csv_path,
+                         usecols=[column_id, target] + selected_features,
+                         dtype=dtypes,
+                         chunksize=chunksize)
+    # Les séries d'identifiants déversées sur disque sont supprimées même si un bloc échoue
+    try:
+        for chunk in reader:
+            # Dédoublonnage dans le bloc et par rapport aux blocs précédents
+            if seen_ids is not None:
+                chunk = chunk[seen_ids.first_occurrences(chunk[column_id])]
+
+            # Seules les lignes sans cible sont à prédire (cf. split_train_predict)
+            chunk = chunk.loc[chunk[target].isna(), [target] + selected_features].copy()
+            if chunk.empty:
+                continue
+
+            # Surveillance de dérive sur les valeurs brutes, avant imputation
+            if monitor is not None:
+                monitor.update(chunk)
+
+            # Transformation pure et vectorisée : aucune statistique n'est recalculée sur le bloc
+            x_predict = preprocessor.transform_array(chunk)
+            if policy is None and not probability_mode:
+                predictions = best_model.predict(x_predict)
+            else:
+                probabilities = best_model.predict_proba(x_predict)[:, 1]
+                probabilities = policy.calibrate(probabilities) if policy is not None else probabilities
+                predictions = policy.decide(probabilities) if policy is not None else (probabilities > 0.5).astype(int)
+            chunk = pd.DataFrame(x_predict, columns=preprocessor.feature_columns_)
+            chunk.insert(0, target, np.nan)
+            if probability_mode:
+                chunk['Probability'] = probabilities
+            chunk['Predictions'] = predictions
+
+            chunk.to_csv(output_path, mode='a', header=write_header, index=False)
+            write_header = False
+            rows += len(chunk)
+    finally:
+        if seen_ids is not None:
+            seen_ids.close()
+
+    seconds = time.perf_counter() - start
+    report = {
+        'rows': rows,
+        'seconds': seconds,
+        'rows_per_sec': rows / seconds if seconds > 0 else 0.0,
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+    print(f"Les prédictions ont été sauvegardées dans {output_path}.")
+    print_throughput_report(report)
+    return output_path, report
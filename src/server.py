@@ -0,0 +1,187 @@
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from src.batching import MicroBatcher
+from src.main_pipeline import load_best_model, load_preprocessor
+from src.scoring import LatencyRecorder, NativeBoosterModel
+from src.thresholds import DecisionPolicy
+
+# Répertoire des artefacts, identique à celui de main.py
+MODEL_DIR = "models"
+
+
+class ScoringService:
+    """
+    Modèle et prétraitement chargés une seule fois, prêts à scorer une demande à la fois.
+
+    Avec micro_batching, les demandes concurrentes sont regroupées par un MicroBatcher
+    (max_wait_ms, max_batch_size) avant d'appeler le modèle.
+
+    La politique de décision (cf. src.thresholds) recalibre la probabilité retournée et
+    fixe le seuil de la prédiction (0.5 sans calibration par défaut).
+    """
+
+    def __init__(self, model, preprocessor, micro_batching=False, max_wait_ms=2.0, max_batch_size=64,
+                 policy=None):
+        self.model = model
+        self.preprocessor = preprocessor
+        self.policy = policy if policy is not None else DecisionPolicy()
+        self.model_latency = LatencyRecorder()
+        self.request_latency = LatencyRecorder()
+
+        if hasattr(model, 'get_booster'):
+            # XGBoost : prédiction directe sur le booster, sans la surcouche sklearn.
+            # Un seul thread : pour une ligne, le démarrage d'OpenMP coûterait plus que le calcul.
+            booster = model.get_booster()
+            booster.set_param({'nthread': 1})
+            predict_positive = booster.inplace_predict
+        else:
+            predict_positive = lambda rows: model.predict_proba(rows)[:, 1]
+        if self.policy.calibrator is None:
+            self._predict_batch = predict_positive
+        else:
+            self._predict_batch = lambda rows: self.policy.calibrate(predict_positive(rows))
+
+        # Premier appel à vide pour que la première vraie demande ne paie pas l'initialisation
+        self._predict_batch(np.zeros((1, len(preprocessor.feature_columns_)), dtype=np.float32))
+
+        self.batcher = None
+        if micro_batching:
+            self.batcher = MicroBatcher(self._predict_batch, max_wait_ms, max_batch_size).start_in_thread()
+
+    def score(self, application):
+        """
+        Score une demande brute (dict JSON) et retourne la prédiction et sa probabilité.
+        """
+        row = self.preprocessor.transform_record(application)
+
+        if self.batcher is not None:
+            # Le temps modèle est alors mesuré par lot (cf. metrics()['batching'])
+            probability = self.batcher.score_threadsafe(row)
+            return {'prediction': int(probability > self.policy.threshold), 'probability': probability}
+
+        start = time.perf_counter()
+        probability = float(self._predict_batch(row)[0])
+        model_ms = (time.perf_counter() - start) * 1000
+        self.model_latency.record(model_ms)
+
+        return {'prediction': int(probability > self.policy.threshold),
+                'probability': probability,
+                'model_time_ms': model_ms}
+
+    def metrics(self):
+        metrics = {'model': self.model_latency.summary(),
+                   'request': self.request_latency.summary()}
+        if self.batcher is not None:
+            metrics['batching'] = self.batcher.metrics()
+        return metrics
+
+
+def load_scoring_service(model_dir=MODEL_DIR, native=False, **service_options):
+    """
+    Charge le modèle et le prétraitement sauvegardés par save_best_model, une seule fois
+    au démarrage du serveur. Avec native, le modèle est le booster exporté par
+    export_native_model. service_options est transmis à ScoringService, avec la politique de
+    décision sauvegardée dans model_dir.
+    """
+    if native:
+        model, preprocessor = NativeBoosterModel.load(model_dir), load_preprocessor(model_dir)
+    else:
+        model, preprocessor = load_best_model(model_dir)
+    service_options.setdefault('policy', DecisionPolicy.load(model_dir))
+    return ScoringService(model, preprocessor, **service_options)
+
+
+def make_handler(service):
+    """
+    Construit le gestionnaire HTTP lié au service de scoring.
+
+    Routes :
+        - POST /score : score une demande JSON.
+        - GET /metrics : compteurs de latence p50/p99.
+        - GET /health : état du serveur.
+    """
+
+    class ScoringHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path == '/metrics':
+                self._send_json(200, service.metrics())
+            elif self.path == '/health':
+                self._send_json(200, {'status': 'ok'})
+            else:
+                self._send_json(404, {'error': f"Route inconnue : {self.path}"})
+
+        def do_POST(self):
+            if self.path != '/score':
+                self._send_json(404, {'error': f"Route inconnue : {self.path}"})
+                return
+
+            start = time.perf_counter()
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                application = json.loads(self.rfile.read(length))
+                result = service.score(application)
+            except (ValueError, TypeError, AttributeError) as error:
+                self._send_json(400, {'error': str(error)})
+                return
+            service.request_latency.record((time.perf_counter() - start) * 1000)
+            self._send_json(200, result)
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Pas de journal par requête : il dominerait la latence
+            pass
+
+    return ScoringHandler
+
+
+class ScoringHTTPServer(ThreadingHTTPServer):
+    # File d'attente de connexions plus longue que la valeur par défaut (5) pour les pics de charge
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def serve(host='127.0.0.1', port=8000, model_dir=MODEL_DIR, **service_options):
+    """
+    Démarre le serveur de scoring et le laisse tourner jusqu'à interruption.
+    """
+    service = load_scoring_service(model_dir, **service_options)
+    server = ScoringHTTPServer((host, port), make_handler(service))
+    print(f"Serveur de scoring à l'écoute sur http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serveur de scoring des demandes de crédit.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    parser.add_argument('--micro-batching', action='store_true',
+                        help="Regroupe les demandes concurrentes avant d'appeler le modèle.")
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--native', action='store_true',
+                        help="Utilise le booster XGBoost natif exporté plutôt que le modèle joblib.")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.model_dir,
+          native=args.native,
+          micro_batching=args.micro_batching,
+          max_wait_ms=args.max_wait_ms,
+          max_batch_size=args.max_batch_size)
@@ -0,0 +1,272 @@
+import json
+import os
+
+import numpy as np
+
+# scikit-learn n'est importé que pour l'ajustement (ProbabilityCalibrator.fit, fit_decision_policy) :
+# appliquer une politique de décision au scoring ne demande que numpy.
+
+DECISION_POLICY_NAME = "decision_policy.json"
+CALIBRATION_METHODS = (None, 'isotonic', 'sigmoid')
+THRESHOLD_OBJECTIVES = ('cost', 'f1', 'accuracy')
+
+
+class ProbabilityCalibrator:
+    """
+    Recalibrage de la probabilité de la classe positive, ajusté sur des probabilités non vues
+    à l'entraînement :
+        - 'isotonic' : régression isotone, appliquée par interpolation linéaire entre ses
+          seuils (comme IsotonicRegression.predict, bornée aux extrémités) ;
+        - 'sigmoid' : Platt, sigmoïde de a * logit(p) + b.
+
+    L'état se réduit à quelques tableaux, sérialisés en JSON avec le seuil de décision.
+    """
+
+    def __init__(self, method, x_thresholds=None, y_thresholds=None, a=None, b=None):
+        if method not in CALIBRATION_METHODS[1:]:
+            raise ValueError(f"Méthode de calibration inconnue : {method} (attendu : {CALIBRATION_METHODS[1:]})")
+        self.method = method
+        self.x_thresholds = x_thresholds
+        self.y_thresholds = y_thresholds
+        self.a = a
+        self.b = b
+
+    def fit(self, probabilities, y):
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        y = np.asarray(y)
+        if self.method == 'isotonic':
+            from sklearn.isotonic import IsotonicRegression
+
+            isotonic = IsotonicRegression(out_of_bounds='clip', y_min=0.0, y_max=1.0).fit(probabilities, y)
+            self.x_thresholds = isotonic.X_thresholds_.tolist()
+            self.y_thresholds = isotonic.y_thresholds_.tolist()
+        else:
+            from sklearn.linear_model import LogisticRegression
+
+            # Régularisation quasi nulle : ajustement de Platt par maximum de vraisemblance
+            platt = LogisticRegression(C=1e10).fit(_logit(probabilities)[:, None], y)
+            self.a, self.b = float(platt.coef_[0, 0]), float(platt.intercept_[0])
+        return self
+
+    def transform(self, probabilities):
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        if self.method == 'isotonic':
+            return np.interp(probabilities, self.x_thresholds, self.y_thresholds)
+        return 1.0 / (1.0 + np.exp(-(self.a * _logit(probabilities) + self.b)))
+
+    def to_dict(self):
+        return {'method': self.method, 'x_thresholds': self.x_thresholds, 'y_thresholds': self.y_thresholds,
+                'a': self.a, 'b': self.b}
+
+    @classmethod
+    def from_dict(cls, payload):
+        return cls(**payload)
+
+
+def _logit(probabilities):
+    eps = np.finfo(np.float64).eps
+    probabilities = np.clip(probabilities, eps, 1 - eps)
+    return np.log(probabilities) - np.log1p(-probabilities)
+
+
+def threshold_sweep(y_true, probabilities, cost_fp=1.0, cost_fn=1.0):
+    """
+    Matrice de confusion pour chaque seuil en une seule passe triée : les probabilités sont
+    triées par ordre décroissant, et les vrais / faux positifs au seuil t (prédiction positive
+    si p >= t) sont les sommes cumulées des étiquettes jusqu'au dernier score égal à t.
+
+    Paramètres :
+        - y_true : Cibles 0/1 (1 = classe positive).
+        - probabilities : Probabilités de la classe positive.
+        - cost_fp, cost_fn : Coût d'un faux positif et d'un faux négatif.
+
+    Retourne :
+        - Un dict de tableaux alignés sur les seuils (valeurs distinctes, décroissantes, précédées
+          de +inf, où rien n'est prédit positif) : threshold, tp, fp, fn, tn, precision, recall,
+          f1, accuracy et cost (coût total).
+    """
+    y_true = np.asarray(y_true).astype(bool)
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    order = np.argsort(probabilities, kind='mergesort')[::-1]
+    sorted_probabilities = probabilities[order]
+    sorted_labels = y_true[order]
+
+    # Dernière position de chaque valeur distincte : les ex aequo passent ensemble
+    last_of_value = np.r_[np.flatnonzero(np.diff(sorted_probabilities)), len(sorted_probabilities) - 1]
+    tp = np.r_[0, np.cumsum(sorted_labels)[last_of_value]]
+    fp = np.r_[0, last_of_value + 1 - tp[1:]]
+    n_positive = int(y_true.sum())
+    n_negative = len(y_true) - n_positive
+    fn = n_positive - tp
+    tn = n_negative - fp
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = np.where(n_positive > 0, tp / max(n_positive, 1), 0.0)
+        f1 = np.where(2 * tp + fp + fn > 0, 2 * tp / (2 * tp + fp + fn), 0.0)
+    return {
+        'threshold': np.r_[np.inf, sorted_probabilities[last_of_value]],
+        'tp': tp, 'fp': fp, 'fn': fn, 'tn': tn,
+        'precision': precision,
+        'recall': recall,
+        'f1': f1,
+        'accuracy': (tp + tn) / max(len(y_true), 1),
+        'cost': cost_fp * fp + cost_fn * fn,
+    }
+
+
+def best_threshold(sweep, objective='cost'):
+    """
+    Seuil optimal d'un balayage : coût minimal, ou F1 / accuracy maximal. Le seuil retenu est
+    le milieu entre la valeur optimale et la suivante (plus robuste qu'un score observé) :
+    p > seuil donne alors les mêmes décisions que p >= valeur optimale sur le balayage. Pour
+    la plus petite valeur (tout est prédit positif), c'est le flottant immédiatement inférieur.
+
+    Retourne :
+        - (seuil, indice dans le balayage).
+    """
+    if objective not in THRESHOLD_OBJECTIVES:
+        raise ValueError(f"Objectif inconnu : {objective} (attendu : {THRESHOLD_OBJECTIVES})")
+    values = -sweep['cost'] if objective == 'cost' else sweep[objective]
+    index = int(np.argmax(values))
+    thresholds = sweep['threshold']
+    if index == 0:
+        # Rien n'est prédit positif
+        return 1.0, index
+    if index + 1 == len(thresholds):
+        # Tout est prédit positif, y compris les probabilités égales à la plus petite valeur
+        return float(np.nextafter(thresholds[index], -np.inf)), index
+    return float((thresholds[index] + thresholds[index + 1]) / 2), index
+
+
+class DecisionPolicy:
+    """
+    Politique de décision persistée à côté du modèle : recalibrage facultatif des probabilités
+    et seuil de la classe positive (prédiction positive si probabilité calibrée > threshold,
+    comme predict au seuil 0.5).
+
+    Sans fichier decision_policy.json, la politique par défaut (pas de calibration, seuil 0.5)
+    reproduit model.predict. Chaque version du registre (src.incremental.ModelRegistry) garde
+    la sienne, recopiée dans le répertoire des modèles quand elle est promue.
+
+    Paramètres :
+        - calibrator : ProbabilityCalibrator ajusté, ou None.
+        - threshold : Seuil de décision.
+        - details : Informations sur l'ajustement (objectif, coûts, métriques au seuil).
+    """
+
+    def __init__(self, calibrator=None, threshold=0.5, details=None):
+        self.calibrator = calibrator
+        self.threshold = threshold
+        self.details = details or {}
+
+    def calibrate(self, positive_probabilities):
+        """Probabilités de la classe positive, recalibrées si un calibrateur est défini."""
+        if self.calibrator is None:
+            return np.asarray(positive_probabilities)
+        return self.calibrator.transform(positive_probabilities)
+
+    def probabilities(self, model, x):
+        """Probabilités calibrées de la classe positive pour x."""
+        return self.calibrate(model.predict_proba(x)[:, 1])
+
+    def decide(self, positive_probabilities):
+        """Décisions 0/1 à partir de probabilités (déjà calibrées)."""
+        return (np.asarray(positive_probabilities) > self.threshold).astype(int)
+
+    def to_dict(self):
+        return {'threshold': self.threshold,
+                'calibrator': self.calibrator.to_dict() if self.calibrator is not None else None,
+                'details': self.details}
+
+    @classmethod
+    def from_dict(cls, payload):
+        calibrator = payload.get('calibrator')
+        return cls(ProbabilityCalibrator.from_dict(calibrator) if calibrator else None,
+                   payload.get('threshold', 0.5), payload.get('details'))
+
+    def save(self, model_dir, name=DECISION_POLICY_NAME):
+        os.makedirs(model_dir, exist_ok=True)
+        path = os.path.join(model_dir, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, indent=2, default=float)
+        print(f"La politique de décision (seuil {self.threshold:.4f}) a été sauvegardée sous '{path}'.")
+        return path
+
+    @classmethod
+    def load(cls, model_dir, name=DECISION_POLICY_NAME):
+        """Politique sauvegardée dans model_dir, ou la politique par défaut si absente."""
+        try:
+            with open(os.path.join(model_dir, name), encoding='utf-8') as file:
+                return cls.from_dict(json.load(file))
+        except FileNotFoundError:
+            return cls()
+
+
+def fit_decision_policy(model, x, y, method='isotonic', objective='cost', cost_fp=1.0, cost_fn=1.0, cv=5):
+    """
+    Ajuste la politique de décision d'un modèle sur des probabilités hors échantillon : celles
+    d'une validation croisée (cross_val_predict) de copies du modèle sur (x, y), comme
+    CalibratedClassifierCV(ensemble=False). Le modèle lui-même n'est pas réajusté.
+
+    Paramètres :
+        - model : Modèle entraîné (ses hyperparamètres servent aux copies).
+        - x, y : Données d'entraînement.
+        - method : None, 'isotonic' ou 'sigmoid'.
+        - objective : Critère du seuil ('cost', 'f1' ou 'accuracy').
+        - cost_fp, cost_fn : Coûts d'un faux positif et d'un faux négatif (objectif 'cost').
+        - cv : Nombre de plis.
+
+    Retourne :
+        - La DecisionPolicy et le balayage des seuils (cf. threshold_sweep).
+    """
+    from sklearn.base import clone
+    from sklearn.model_selection import cross_val_predict
+
+    if method not in CALIBRATION_METHODS:
+        raise ValueError(f"Méthode de calibration inconnue : {method} (attendu : {CALIBRATION_METHODS})")
+    y = np.asarray(y)
+    out_of_fold = cross_val_predict(clone(model), x, y, cv=cv, method='predict_proba')[:, 1]
+    return decision_policy_from_probabilities(out_of_fold, y, method, objective, cost_fp, cost_fn, {'cv': cv})
+
+
+def decision_policy_from_probabilities(probabilities, y, method='isotonic', objective='cost', cost_fp=1.0,
+                                       cost_fn=1.0, details=None):
+    """
+    Ajuste calibration et seuil sur des probabilités de la classe positive déjà hors échantillon
+    (validation croisée, ou lignes de validation mises de côté).
+
+    Paramètres :
+        - probabilities : Probabilités de la classe positive, non vues à l'entraînement.
+        - y : Cibles 0/1 correspondantes.
+        - method, objective, cost_fp, cost_fn : Comme fit_decision_policy.
+        - details : Informations ajoutées aux détails de la politique (ex. origine des probabilités).
+
+    Retourne :
+        - La DecisionPolicy et le balayage des seuils (cf. threshold_sweep).
+    """
+    if method not in CALIBRATION_METHODS:
+        raise ValueError(f"Méthode de calibration inconnue : {method} (attendu : {CALIBRATION_METHODS})")
+    y = np.asarray(y)
+    calibrator = ProbabilityCalibrator(method).fit(probabilities, y) if method is not None else None
+    calibrated = calibrator.transform(probabilities) if calibrator is not None else np.asarray(probabilities)
+    sweep = threshold_sweep(y, calibrated, cost_fp, cost_fn)
+    threshold, index = best_threshold(sweep, objective)
+
+    details = dict(details or {}, objective=objective, cost_fp=cost_fp, cost_fn=cost_fn,
+                   calibration=method, rows=len(y))
+    details.update({key: float(sweep[key][index]) for key in ['precision', 'recall', 'f1', 'accuracy', 'cost']})
+    return DecisionPolicy(calibrator, threshold, details), sweep
+
+
+def print_threshold_summary(policy, sweep, thresholds=(0.3, 0.4, 0.5, 0.6, 0.7)):
+    """
+    Affiche précision, rappel et coût à quelques seuils, puis au seuil retenu.
+    """
+    print("Seuil      Précision  Rappel     F1         Coût")
+    for threshold in sorted(set(thresholds) | {policy.threshold}):
+        # Dernier seuil du balayage > threshold : mêmes prédictions que p > threshold
+        index = int(np.searchsorted(-sweep['threshold'], -threshold, side='left')) - 1
+        marker = '  <- retenu' if threshold == policy.threshold else ''
+        print(f"{threshold:<10.4f} {sweep['precision'][index]:<10.4f} {sweep['recall'][index]:<10.4f} "
+              f"{sweep['f1'][index]:<10.4f} {sweep['cost'][index]:<10.1f}{marker}")
@@ -0,0 +1,255 @@
+import json
+
+import numpy as np
+
+# Nombre de lignes parcourues ensemble : des blocs courts restent dans le cache du processeur
+BLOCK_SIZE = 1024
+
+
+class CompiledTreeEnsemble:
+    """
+    Forêt aléatoire ou booster XGBoost compilé en tableaux numpy contigus : pour chaque nœud,
+    la caractéristique testée, le seuil, les deux enfants, la direction des valeurs manquantes
+    et la valeur de feuille. Les arbres sont mis bout à bout ; roots indique la racine de chacun.
+
+    Le parcours est synchrone par niveau : à chaque niveau, toutes les lignes avancent d'un nœud
+    dans tous les arbres à la fois. Les feuilles pointent vers elles-mêmes, de sorte que max_depth
+    itérations suffisent quelle que soit la profondeur de chaque branche.
+
+    Les deux modèles d'origine comparent des valeurs float32 : leurs seuils sont convertis en
+    « plus grande valeur float32 qui part à gauche », et le test devient x > seuil pour aller à
+    droite dans les deux cas. L'agrégation reproduit exactement les modèles d'origine :
+        - forest : moyenne des probabilités normalisées des arbres, sommées dans l'ordre des
+          arbres (comme RandomForestClassifier.predict_proba).
+        - xgboost : marge float32 = base + feuilles dans l'ordre des arbres, puis sigmoïde
+          (comme XGBClassifier, objectif binary:logistic).
+
+    Cf. compile_model pour construire l'ensemble à partir d'un modèle entraîné.
+    """
+
+    def __init__(self, kind, feature, threshold, children, missing_left, leaf_value, roots, max_depth,
+                 n_features, classes, base_margin=0.0):
+        self.kind = kind
+        self.feature = feature
+        self.threshold = threshold
+        # Enfants entrelacés (gauche, droite) : un seul accès mémoire par niveau
+        self.children = children
+        self.missing_left = missing_left
+        self.leaf_value = leaf_value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.classes_ = classes
+        self.base_margin = base_margin
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def apply(self, x):
+        """
+        Indice de la feuille atteinte par chaque ligne dans chaque arbre, (n_lignes, n_arbres).
+        """
+        x = self._check_input(x)
+        return np.concatenate([self._apply_block(x[start:start + BLOCK_SIZE])
+                               for start in range(0, len(x), BLOCK_SIZE)]) if len(x) else \
+            np.empty((0, self.n_trees), dtype=np.int32)
+
+    def predict_proba(self, x):
+        """
+        Probabilités des classes, identiques à celles du modèle d'origine.
+        """
+        x = self._check_input(x)
+        blocks = [self._proba_block(self._apply_block(x[start:start + BLOCK_SIZE]))
+                  for start in range(0, len(x), BLOCK_SIZE)]
+        if not blocks:
+            return np.empty((0, len(self.classes_)))
+        return np.concatenate(blocks)
+
+    def predict(self, x):
+        proba = self.predict_proba(x)
+        if self.kind == 'xgboost':
+            # Même règle que XGBClassifier.predict en binaire
+            return self.classes_[(proba[:, 1] > 0.5).astype(int)]
+        return self.classes_.take(np.argmax(proba, axis=1))
+
+    def _check_input(self, x):
+        if hasattr(x, 'to_numpy'):
+            x = x.to_numpy(dtype=np.float32)
+        # Les deux modèles d'origine comparent les valeurs en float32
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        if x.ndim != 2 or x.shape[1] != self.n_features:
+            raise ValueError(f"Tableau de forme {x.shape} reçu, {self.n_features} colonnes attendues.")
+        return x
+
+    def _apply_block(self, x):
+        n_rows, n_features = x.shape
+        values = x.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.int32) * n_features)[:, None]
+        nodes = np.tile(self.roots, (n_rows, 1))
+        has_missing = np.isnan(x).any()
+
+        # np.take et les opérations en place évitent les copies de l'indexation avancée
+        for _ in range(self.max_depth):
+            positions = np.take(self.feature, nodes)
+            positions += row_offsets
+            node_values = np.take(values, positions)
+            go_right = node_values > np.take(self.threshold, nodes)
+            if has_missing:
+                missing = np.isnan(node_values)
+                go_right[missing] = ~self.missing_left[nodes[missing]]
+            nodes <<= 1
+            nodes += go_right
+            nodes = np.take(self.children, nodes)
+        return nodes
+
+    def _proba_block(self, nodes):
+        if self.kind == 'forest':
+            # cumsum est séquentiel : même ordre d'addition que la boucle sur les arbres de sklearn
+            proba = np.cumsum(self.leaf_value[nodes], axis=1)[:, -1]
+            proba /= self.n_trees
+            return proba
+
+        margins = np.empty((len(nodes), self.n_trees + 1), dtype=np.float32)
+        margins[:, 0] = self.base_margin
+        margins[:, 1:] = self.leaf_value[nodes]
+        margin = np.cumsum(margins, axis=1, dtype=np.float32)[:, -1]
+        positive = _sigmoid(margin)
+        return np.column_stack([np.float32(1) - positive, positive])
+
+
+def _sigmoid(margin):
+    """Sigmoïde float32 calculée comme XGBoost : 1 / (exp(min(-x, 88.7)) + 1)."""
+    exponent = np.exp(np.minimum(-margin, np.float32(88.7)).astype(np.float64)).astype(np.float32)
+    return np.float32(1) / (exponent + np.float32(1))
+
+
+def _float32_left_bound(threshold, strict):
+    """
+    Plus grande valeur float32 envoyée à gauche par le test x <= threshold (ou x < threshold
+    si strict), pour x float32 : le test devient x <= borne, exact et entièrement en float32.
+    """
+    threshold = np.asarray(threshold, dtype=np.float64)
+    bound = threshold.astype(np.float32)
+    # Arrondi vers le bas du seuil float64 : aucune valeur float32 ne se trouve entre les deux
+    too_high = (bound > threshold) | (strict & (bound == threshold))
+    bound[too_high] = np.nextafter(bound[too_high], np.float32(-np.inf))
+    return bound
+
+
+def _tree_depth(left, right):
+    """Profondeur maximale d'un arbre donné par ses tableaux d'enfants (-1 pour une feuille)."""
+    depth, level = 0, [0]
+    while True:
+        level = [child for node in level for child in (left[node], right[node]) if child != -1]
+        if not level:
+            return depth
+        depth += 1
+
+
+def _concatenate_trees(trees):
+    """
+    Met bout à bout des arbres décrits par (left, right, feature, threshold, missing_left, leaf_value)
+    en décalant les indices d'enfants ; les feuilles deviennent leurs propres enfants.
+    """
+    features, thresholds, children, missing_left, leaf_values, roots = [], [], [], [], [], []
+    offset, max_depth = 0, 0
+    for left, right, feature, threshold, tree_missing_left, leaf_value in trees:
+        n_nodes = len(left)
+        nodes = np.arange(n_nodes) + offset
+        is_leaf = left == -1
+
+        tree_children = np.empty((n_nodes, 2), dtype=np.int64)
+        tree_children[:, 0] = np.where(is_leaf, nodes, left + offset)
+        tree_children[:, 1] = np.where(is_leaf, nodes, right + offset)
+
+        features.append(np.where(is_leaf, 0, feature))
+        thresholds.append(np.where(is_leaf, 0.0, threshold))
+        children.append(tree_children.ravel())
+        missing_left.append(np.asarray(tree_missing_left, dtype=bool))
+        leaf_values.append(leaf_value)
+        roots.append(offset)
+
+        max_depth = max(max_depth, _tree_depth(left, right))
+        offset += n_nodes
+
+    return (np.concatenate(features).astype(np.int32),
+            np.concatenate(thresholds).astype(np.float32),
+            np.concatenate(children).astype(np.int32),
+            np.concatenate(missing_left),
+            np.concatenate(leaf_values),
+            np.array(roots, dtype=np.int32),
+            max_depth)
+
+
+def compile_random_forest(model):
+    """
+    Compile un RandomForestClassifier entraîné (sklearn) en CompiledTreeEnsemble.
+    """
+    trees = []
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        value = tree.value[:, 0, :]
+        # Normalisation de DecisionTreeClassifier.predict_proba, appliquée une fois par feuille
+        normalizer = value.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        missing_left = getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=bool))
+        trees.append((tree.children_left, tree.children_right, tree.feature,
+                      _float32_left_bound(tree.threshold, strict=False), missing_left, value / normalizer))
+
+    feature, threshold, children, missing_left, leaf_value, roots, max_depth = _concatenate_trees(trees)
+    return CompiledTreeEnsemble('forest', feature, threshold, children, missing_left, leaf_value, roots,
+                                max_depth, model.n_features_in_, np.asarray(model.classes_))
+
+
+def compile_xgboost(model):
+    """
+    Compile un booster XGBoost binaire (XGBClassifier, Booster ou NativeBoosterModel) en
+    CompiledTreeEnsemble, à partir de son export JSON. Un objectif autre que binary:logistic,
+    un booster autre que gbtree ou une division catégorielle lèvent ValueError.
+    """
+    booster = model.get_booster() if hasattr(model, 'get_booster') else model
+    learner = json.loads(booster.save_raw('json'))['learner']
+    if learner['objective']['name'] != 'binary:logistic':
+        raise ValueError(f"Objectif non pris en charge : {learner['objective']['name']}")
+    if learner['gradient_booster']['name'] != 'gbtree':
+        raise ValueError(f"Booster non pris en charge : {learner['gradient_booster']['name']}")
+
+    trees = []
+    for tree in learner['gradient_booster']['model']['trees']:
+        if tree['categories_nodes']:
+            raise ValueError("Les divisions catégorielles ne sont pas prises en charge.")
+        left = np.array(tree['left_children'])
+        # Pour une feuille, split_conditions contient la valeur de la feuille
+        split_conditions = np.array(tree['split_conditions'], dtype=np.float32)
+        trees.append((left, np.array(tree['right_children']), np.array(tree['split_indices']),
+                      _float32_left_bound(split_conditions, strict=True), np.array(tree['default_left']),
+                      np.where(left == -1, split_conditions, np.float32(0))))
+
+    feature, threshold, children, missing_left, leaf_value, roots, max_depth = _concatenate_trees(trees)
+
+    # base_score est stocké comme une probabilité ; la marge initiale est son logit en float32
+    base_score = np.float32(learner['learner_model_param']['base_score'])
+    base_margin = -np.float32(np.log(np.float32(1) / base_score - np.float32(1)))
+
+    n_features = int(learner['learner_model_param']['num_feature'])
+    return CompiledTreeEnsemble('xgboost', feature, threshold, children, missing_left,
+                                leaf_value.astype(np.float32), roots, max_depth, n_features,
+                                np.array([0, 1]), base_margin)
+
+
+def compile_model(model):
+    """
+    Compile un modèle à arbres entraîné (RandomForestClassifier ou XGBoost binaire).
+
+    Paramètres :
+        - model : Modèle entraîné, par exemple issu de get_best_models.
+
+    Retourne :
+        - Un CompiledTreeEnsemble exposant predict, predict_proba et apply.
+    """
+    if hasattr(model, 'estimators_') and hasattr(model.estimators_[0], 'tree_'):
+        return compile_random_forest(model)
+    if hasattr(model, 'get_booster') or hasattr(model, 'save_raw'):
+        return compile_xgboost(model)
+    raise TypeError(f"Modèle non compilable : {type(model).__name__}")
@@ -0,0 +1,83 @@
+import os
+
+from sklearn.datasets import make_classification
+from sklearn.linear_model import LogisticRegression
+from skopt.space import Real
+
+from src.cv_cache import CachedBayesSearchCV, CVResultCache
+from src.profiling import start_tracing, stop_tracing
+
+
+def _record(index):
+    return {'params': {'C': index}, 'scores': [0.5] * 50, 'fit_time': [0.1] * 50, 'score_time': [0.1] * 50}
+
+
+def _set_mtime(cache, group, point, when):
+    os.utime(cache._path(group, point, '.json'), (when, when))
+
+
+def test_eviction_removes_least_recently_used_points_with_their_estimators(tmp_path):
+    cache = CVResultCache(str(tmp_path), max_bytes=10**9, store_estimators=True)
+    for index in range(4):
+        cache.put('group', f'p{index}', _record(index), estimators=[list(range(200))])
+        _set_mtime(cache, 'group', f'p{index}', 1_000 + index)
+    # p0 est le plus ancien, mais vient d'être relu : p1 devient le moins récemment utilisé
+    cache.get('group', 'p0')
+
+    point_bytes = sum(os.path.getsize(cache._path('group', 'p1', ext)) for ext in CVResultCache.EXTENSIONS)
+    cache.max_bytes = int(3.5 * point_bytes)
+    cache.evict()
+
+    remaining = sorted(os.listdir(tmp_path / 'group'))
+    assert remaining == ['p0.joblib', 'p0.json', 'p2.joblib', 'p2.json', 'p3.joblib', 'p3.json']
+
+
+def test_records_do_not_refresh_usage(tmp_path):
+    cache = CVResultCache(str(tmp_path))
+    cache.put('group', 'p0', _record(0))
+    _set_mtime(cache, 'group', 'p0', 1_000)
+
+    assert [record['params'] for record in cache.records('group')] == [{'C': 0}]
+    assert os.path.getmtime(cache._path('group', 'p0', '.json')) == 1_000
+
+
+def test_put_tracks_size_without_rescanning(tmp_path, monkeypatch):
+    cache = CVResultCache(str(tmp_path))
+    cache.put('group', 'p0', _record(0))
+    scans = []
+    monkeypatch.setattr(cache, '_scan', lambda: scans.append(1))
+    for index in range(1, 20):
+        cache.put('group', f'p{index}', _record(index))
+    assert not scans
+    assert cache._total_bytes == sum(entry.stat().st_size for entry in (tmp_path / 'group').iterdir())
+
+
+def test_search_batches_reuse_cache_on_rerun(tmp_path):
+    x, y = make_classification(n_samples=200, n_features=5, random_state=0)
+
+    def search():
+        return CachedBayesSearchCV(LogisticRegression(), {'C': Real(0.01, 10.0, prior='log-uniform')},
+                                   n_iter=6, cv=3, n_points=3, cache=CVResultCache(str(tmp_path)),
+                                   random_state=0).fit(x, y)
+
+    first, second = search(), search()
+    assert not first.cv_results_['cached'].any()
+    assert second.cv_results_['cached'].all()
+    # Les points repris du cache sont lus dans un autre ordre : on compare les ensembles
+    assert sorted(p['C'] for p in second.cv_results_['params']) == sorted(p['C'] for p in first.cv_results_['params'])
+    assert second.best_score_ == first.best_score_
+
+
+def test_search_traces_each_iteration(tmp_path):
+    x, y = make_classification(n_samples=200, n_features=5, random_state=0)
+    start_tracing()
+    try:
+        CachedBayesSearchCV(LogisticRegression(), {'C': Real(0.01, 10.0, prior='log-uniform')}, n_iter=4, cv=3,
+                            n_points=2, cache=CVResultCache(str(tmp_path)), random_state=0).fit(x, y, trace_name='LR')
+    finally:
+        tracer = stop_tracing()
+
+    iterations = [event for event in tracer.events if event['name'] == 'search_iteration[LR]']
+    assert [event['args']['iteration'] for event in iterations] == [0, 1]
+    assert all(len(event['args']['candidates']) == 2 for event in iterations)
+    assert {'search_prepare[LR]', 'refit[LR]'} <= {event['name'] for event in tracer.events}
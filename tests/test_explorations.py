@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.explorations import reservoir_sample, streamed_correlation
+
+
+def _frame(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({'a': rng.normal(size=n_rows), 'b': rng.normal(size=n_rows),
+                       'label': rng.choice(['x', 'y'], n_rows)})
+    df['c'] = df['a'] * 2 + rng.normal(size=n_rows)
+    df.loc[df.sample(frac=0.1, random_state=seed).index, 'b'] = np.nan
+    return df
+
+
+def _chunks(df, size):
+    return (df.iloc[start:start + size] for start in range(0, len(df), size))
+
+
+def test_reservoir_sample_with_chunks_smaller_than_sample():
+    df = _frame(500)
+    sample = reservoir_sample(_chunks(df, 10), sample_size=100)
+    assert len(sample) == 100
+    assert sample.index.is_unique
+    # Chaque ligne échantillonnée est une ligne du flux, avec ses valeurs d'origine
+    pd.testing.assert_frame_equal(sample, df.loc[sample.index])
+
+
+def test_reservoir_sample_dataframe_larger_than_chunk_size(monkeypatch):
+    monkeypatch.setattr('src.explorations.CHUNK_SIZE', 7)
+    df = _frame(200)
+    sample = reservoir_sample(df, sample_size=50)
+    assert len(sample) == 50
+    pd.testing.assert_frame_equal(sample, df.loc[sample.index])
+
+
+@pytest.mark.parametrize('n_rows', [0, 30, 100])
+def test_reservoir_sample_short_stream_returns_all_rows(n_rows):
+    df = _frame(n_rows)
+    sample = reservoir_sample(_chunks(df, 10), sample_size=100)
+    if n_rows == 0:
+        assert sample is None
+    else:
+        pd.testing.assert_frame_equal(sample, df)
+
+
+def test_reservoir_sample_is_uniform():
+    df = pd.DataFrame({'value': np.arange(1_000)})
+    hits = np.zeros(len(df))
+    for seed in range(200):
+        hits[reservoir_sample(_chunks(df, 30), sample_size=100, seed=seed).index] += 1
+    # Probabilité d'inclusion 0.1 pour chaque ligne : 20 tirages attendus par ligne et par décile
+    per_decile = hits.reshape(10, -1).mean(axis=1)
+    np.testing.assert_allclose(per_decile, 20, rtol=0.1)
+
+
+def test_streamed_correlation_matches_pandas():
+    df = _frame(1_000)
+    expected = df[['a', 'b', 'c']].corr()
+    result = streamed_correlation(df, chunk_size=64)
+    pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-10)
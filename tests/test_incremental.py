@@ -0,0 +1,68 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBClassifier
+
+from src.incremental import ModelRegistry, update_model
+from src.monitoring import DRIFT_MONITOR_NAME, DriftMonitor
+from src.scoring import FEATURE_SCHEMA_NAME, NATIVE_MODEL_NAME
+from src.thresholds import DECISION_POLICY_NAME, DecisionPolicy
+
+
+def _publish(registry, policy=None, monitor=None, model=None, preprocessor=None):
+    model = model if model is not None else LogisticRegression().fit(np.array([[0.0], [1.0]]), [0, 1])
+    return registry.publish(model, preprocessor if preprocessor is not None else {}, SimpleNamespace(rows_seen=2),
+                            {'mode': 'full', 'new_rows': 2}, policy=policy, monitor=monitor)
+
+
+def test_promote_installs_or_removes_the_version_artefacts(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    monitor = DriftMonitor.from_reference(pd.DataFrame({'LoanAmount': [100.0, 120.0, 150.0]}))
+    with_artefacts = _publish(registry, DecisionPolicy(threshold=0.3), monitor)
+    assert DecisionPolicy.load(str(tmp_path)).threshold == 0.3
+    assert DriftMonitor.load(str(tmp_path)).reference['LoanAmount'].rows == 3
+
+    # Version sans politique ni référence : celles de l'ancienne version ne doivent plus s'appliquer
+    _publish(registry)
+    assert not os.path.exists(tmp_path / DECISION_POLICY_NAME)
+    assert not os.path.exists(tmp_path / DRIFT_MONITOR_NAME)
+    assert DecisionPolicy.load(str(tmp_path)).threshold == 0.5
+
+    # Retour arrière : les artefacts de la version promue reviennent avec elle
+    registry.promote(with_artefacts)
+    assert DecisionPolicy.load(str(tmp_path)).threshold == 0.3
+    assert DriftMonitor.load(str(tmp_path)).reference['LoanAmount'].rows == 3
+
+
+def test_update_model_partial_fits_the_last_pipeline_step():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(200, 3))
+    y = (x[:, 0] > 0).astype(int)
+    model = Pipeline([('scaler', StandardScaler().fit(x)),
+                      ('classifier', SGDClassifier(loss='log_loss', random_state=0).partial_fit(x, y, classes=[0, 1]))])
+
+    updated = update_model(model, x[:50], 1 - y[:50])
+
+    assert updated is not model
+    assert updated['classifier'].t_ > model['classifier'].t_
+    np.testing.assert_array_equal(updated['scaler'].mean_, model['scaler'].mean_)
+
+
+def test_promoting_a_non_xgboost_version_removes_the_native_export(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    x = np.array([[0.0], [1.0], [0.2], [0.9]])
+    booster = XGBClassifier(n_estimators=2).fit(x, [0, 1, 0, 1])
+    _publish(registry, model=booster, preprocessor=SimpleNamespace(
+        feature_columns_=['LoanAmount'], target='Loan_Status', target_mapping_={'Y': 0, 'N': 1}))
+    assert os.path.exists(tmp_path / NATIVE_MODEL_NAME)
+    assert os.path.exists(tmp_path / FEATURE_SCHEMA_NAME)
+
+    # Le booster de la version précédente ne doit plus être chargé par --native
+    _publish(registry)
+    assert not os.path.exists(tmp_path / NATIVE_MODEL_NAME)
+    assert not os.path.exists(tmp_path / FEATURE_SCHEMA_NAME)
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+import src.out_of_core
+from src.out_of_core import ChunkedLoanDataset
+
+FEATURES = ['ApplicantIncome', 'Property_Area']
+
+
+def _write_history(path):
+    ids = [f"LP{i % 70:04d}" for i in range(100)]  # 30 doublons, dont beaucoup d'un bloc à l'autre
+    pd.DataFrame({'Loan_ID': ids,
+                  'ApplicantIncome': np.arange(100.0),
+                  'Property_Area': ['Urban', 'Rural'] * 50,
+                  'Loan_Status': ['Y', 'N', None, 'Y'] * 25}).to_csv(path, index=False)
+    return pd.read_csv(path)
+
+
+def _rows(dataset):
+    return pd.concat(chunk for chunk, _ in dataset.raw_chunks())
+
+
+def test_raw_chunks_deduplicate_once_and_replay_the_same_rows(tmp_path, monkeypatch):
+    history = _write_history(tmp_path / 'history.csv')
+    labelled = history[history['Loan_Status'].notna()]
+    expected = labelled[~labelled['Loan_ID'].duplicated()]
+    dataset = ChunkedLoanDataset(str(tmp_path / 'history.csv'), 'Loan_Status', FEATURES, 'Loan_ID', chunksize=16)
+
+    # Une passe interrompue (ex. échantillon de fit_preprocessor) ne fige pas le dédoublonnage
+    next(dataset.raw_chunks())
+    first = _rows(dataset)
+    assert first['ApplicantIncome'].tolist() == expected['ApplicantIncome'].tolist()
+
+    # Passes suivantes : masques réappliqués, sans nouvel index d'identifiants
+    monkeypatch.setattr(src.out_of_core, 'SeenIds', None)
+    assert _rows(dataset).equals(first)
@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.scoring
+from src.csv import SeenIds
+from src.scoring import predict_and_save_in_chunks
+
+
+class _FailingModel:
+    def __init__(self, fail_after):
+        self.calls = 0
+        self.fail_after = fail_after
+
+    def predict(self, x):
+        self.calls += 1
+        if self.calls > self.fail_after:
+            raise RuntimeError("bloc invalide")
+        return np.zeros(len(x), dtype=int)
+
+
+class _IdentityPreprocessor:
+    feature_columns_ = ['LoanAmount']
+
+    def transform_array(self, df):
+        return df[self.feature_columns_].to_numpy(dtype=np.float32)
+
+
+def test_spilled_ids_are_removed_when_a_chunk_fails(tmp_path, monkeypatch):
+    csv_path = tmp_path / 'requests.csv'
+    pd.DataFrame({'Loan_ID': [f"LP{i:04d}" for i in range(40)],
+                  'Loan_Status': [None] * 40,
+                  'LoanAmount': np.arange(40.0)}).to_csv(csv_path, index=False)
+    spill_dir = tmp_path / 'spill'
+    spill_dir.mkdir()
+    # Une empreinte en mémoire au plus : chaque fusion est écrite sur disque. L'index reste
+    # référencé : seul close() (et non le ramasse-miettes) peut vider le répertoire.
+    indexes = []
+    monkeypatch.setattr(src.scoring, 'SeenIds',
+                        lambda: indexes.append(SeenIds(max_in_memory=1, spill_dir=str(spill_dir))) or indexes[-1])
+
+    with pytest.raises(RuntimeError):
+        predict_and_save_in_chunks(_FailingModel(fail_after=3), _IdentityPreprocessor(), str(csv_path),
+                                   'Loan_Status', ['LoanAmount'], 'Loan_ID', str(tmp_path / 'out'),
+                                   chunksize=5, categorical_features=[])
+    assert indexes and indexes[0]._spilled
+    assert os.listdir(spill_dir) == []
@@ -0,0 +1,55 @@
+import json
+
+import numpy as np
+import pytest
+from sklearn.metrics import confusion_matrix
+
+from src.thresholds import DecisionPolicy, ProbabilityCalibrator, best_threshold, threshold_sweep
+
+
+def test_sweep_matches_confusion_matrix():
+    rng = np.random.default_rng(0)
+    y = rng.integers(0, 2, 500)
+    # Probabilités arrondies : nombreux ex aequo
+    probabilities = np.round(np.clip(0.3 * y + rng.random(500) * 0.7, 0, 1), 2)
+    sweep = threshold_sweep(y, probabilities)
+
+    for i, threshold in enumerate(sweep['threshold']):
+        tn, fp, fn, tp = confusion_matrix(y, (probabilities >= threshold).astype(int), labels=[0, 1]).ravel()
+        assert (sweep['tn'][i], sweep['fp'][i], sweep['fn'][i], sweep['tp'][i]) == (tn, fp, fn, tp)
+
+
+def test_best_threshold_keeps_lowest_score_positive():
+    sweep = threshold_sweep([1, 1, 0], [0, 0, 0])
+    threshold, index = best_threshold(sweep, 'f1')
+
+    assert index == len(sweep['threshold']) - 1
+    assert threshold < 0.0
+    assert DecisionPolicy(threshold=threshold).decide([0.0, 0.0, 0.0]).tolist() == [1, 1, 1]
+
+
+@pytest.mark.parametrize('threshold_index', [1, 2, 3, 4])
+def test_best_threshold_reproduces_sweep_decisions(threshold_index):
+    y = np.array([0, 1, 0, 1, 1])
+    probabilities = np.array([0.1, 0.4, 0.4, 0.8, 0.9])
+    sweep = threshold_sweep(y, probabilities)
+    sweep['cost'] = np.where(np.arange(len(sweep['cost'])) == threshold_index, -1.0, 1.0)
+    threshold, _ = best_threshold(sweep, 'cost')
+
+    expected = probabilities >= sweep['threshold'][threshold_index]
+    assert np.array_equal(probabilities > threshold, expected)
+
+
+@pytest.mark.parametrize('method', ['isotonic', 'sigmoid'])
+def test_calibrator_round_trip(method):
+    rng = np.random.default_rng(1)
+    probabilities = rng.random(300)
+    y = (rng.random(300) < probabilities ** 2).astype(int)
+    calibrator = ProbabilityCalibrator(method).fit(probabilities, y)
+
+    policy = DecisionPolicy(calibrator, threshold=0.42)
+    restored = DecisionPolicy.from_dict(json.loads(json.dumps(policy.to_dict())))
+
+    grid = np.linspace(0, 1, 101)
+    assert restored.threshold == 0.42
+    np.testing.assert_allclose(restored.calibrate(grid), policy.calibrate(grid))
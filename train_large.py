@@ -0,0 +1,59 @@
+import argparse
+
+from src.incremental import ModelRegistry
+from src.out_of_core import CHUNK_ROWS, FIT_ROWS, STORAGE_MODES, VALIDATION_FRACTION, train_out_of_core
+from src.thresholds import THRESHOLD_OBJECTIVES
+
+# Paramètres par défaut, identiques à ceux de main.py
+TARGET = "Loan_Status"
+COLUMN_ID = "Loan_ID"
+SELECTED_FEATURES = [
+    'Gender', 'Married', 'Dependents', 'Education',
+    'Self_Employed', 'ApplicantIncome', 'CoapplicantIncome',
+    'LoanAmount', 'Loan_Amount_Term', 'Credit_History', 'Property_Area'
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Entraîne le modèle par blocs sur un historique plus grand que la mémoire, "
+                    "puis le publie comme nouvelle version.")
+    parser.add_argument('data_path', help="Historique étiqueté (CSV, Parquet ou Feather).")
+    parser.add_argument('--model-dir', default='models')
+    parser.add_argument('--model', choices=['xgboost', 'sgd'], default='xgboost')
+    parser.add_argument('--storage', choices=STORAGE_MODES, default='quantile',
+                        help="XGBoost : matrice quantifiée en mémoire ou pages sur disque (mémoire externe).")
+    parser.add_argument('--cache-dir', help="Répertoire des pages de la mémoire externe (temporaire par défaut).")
+    parser.add_argument('--chunksize', type=int, default=CHUNK_ROWS, help="Lignes lues par bloc.")
+    parser.add_argument('--fit-rows', type=int, default=FIT_ROWS,
+                        help="Lignes sur lesquelles les vocabulaires du prétraitement sont appris.")
+    parser.add_argument('--validation-fraction', type=float, default=VALIDATION_FRACTION)
+    parser.add_argument('--n-rounds', type=int, default=200, help="Arbres du booster XGBoost.")
+    parser.add_argument('--n-epochs', type=int, default=3, help="Passes sur l'historique (SGD).")
+    parser.add_argument('--calibration', choices=['isotonic', 'sigmoid', 'none'], default='isotonic',
+                        help="Recalibrage des probabilités, ajusté sur la validation.")
+    parser.add_argument('--threshold-objective', choices=THRESHOLD_OBJECTIVES, default='cost',
+                        help="Critère du seuil de décision, choisi sur la validation.")
+    parser.add_argument('--cost-fp', type=float, default=1.0, help="Coût d'un faux positif (objectif 'cost').")
+    parser.add_argument('--cost-fn', type=float, default=1.0, help="Coût d'un faux négatif (objectif 'cost').")
+    parser.add_argument('--no-promote', action='store_true', help="Enregistre la version sans la mettre en production.")
+    args = parser.parse_args()
+
+    if args.model == 'xgboost':
+        options = {'num_boost_round': args.n_rounds, 'storage': args.storage, 'cache_dir': args.cache_dir}
+    else:
+        options = {'n_epochs': args.n_epochs}
+    policy_options = {'method': None if args.calibration == 'none' else args.calibration,
+                      'objective': args.threshold_objective, 'cost_fp': args.cost_fp, 'cost_fn': args.cost_fn}
+    model, preprocessor, stats, metrics, policy, monitor = train_out_of_core(
+        args.data_path, TARGET, SELECTED_FEATURES, COLUMN_ID, args.model, args.chunksize, args.fit_rows,
+        args.validation_fraction, policy_options, **options)
+
+    metadata = {'mode': 'out_of_core', 'new_rows': stats.rows_seen, 'model': args.model,
+                'validation_metrics': metrics}
+    ModelRegistry(args.model_dir).publish(model, preprocessor, stats, metadata, policy=policy, monitor=monitor,
+                                          promote=not args.no_promote)
+
+
+if __name__ == '__main__':
+    main()
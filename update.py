@@ -0,0 +1,46 @@
+import argparse
+
+from src.csv import get_data_from_csv
+from src.incremental import ModelRegistry, incremental_update
+
+# Paramètres par défaut, identiques à ceux de main.py
+TARGET = "Loan_Status"
+COLUMN_ID = "Loan_ID"
+SELECTED_FEATURES = [
+    'Gender', 'Married', 'Dependents', 'Education',
+    'Self_Employed', 'ApplicantIncome', 'CoapplicantIncome',
+    'LoanAmount', 'Loan_Amount_Term', 'Credit_History', 'Property_Area'
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Met à jour le modèle de production avec de nouvelles demandes étiquetées, sans réentraînement complet.")
+    parser.add_argument('csv_path', nargs='?', help="Fichier (CSV, Parquet ou Feather) des nouvelles lignes étiquetées.")
+    parser.add_argument('--model-dir', default='models')
+    parser.add_argument('--n-rounds', type=int, default=20, help="Arbres ajoutés au booster XGBoost.")
+    parser.add_argument('--list', action='store_true', help="Liste les versions enregistrées.")
+    parser.add_argument('--promote', metavar='VERSION', help="Remet VERSION en production (ex. retour arrière).")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.model_dir)
+    if args.list:
+        current = registry.current_version()
+        for version in registry.list_versions():
+            metadata = registry.read_metadata(version)
+            marker = '*' if version == current else ' '
+            print(f"{marker} {version}  {metadata['created']}  {metadata['mode']:<12} "
+                  f"{metadata['new_rows']:>8} nouvelles lignes  {metadata['rows_seen']:>8} au total")
+    elif args.promote:
+        registry.promote(args.promote)
+    elif args.csv_path:
+        new_data = get_data_from_csv(args.csv_path, TARGET, SELECTED_FEATURES, COLUMN_ID)
+        if new_data is None:
+            parser.error(f"impossible de lire '{args.csv_path}'.")
+        incremental_update(registry, new_data, TARGET, n_rounds=args.n_rounds)
+    else:
+        parser.error("indiquer un fichier de nouvelles lignes, --list ou --promote.")
+
+
+if __name__ == '__main__':
+    main()